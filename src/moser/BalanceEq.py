@@ -1,12 +1,48 @@
 from Decompose import *
+from ElementMatrix import ElementMatrix
 from sympy import *
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import math
+
+class BalanceError(ValueError):
+    '''Raised when a chemical reaction cannot be balanced.'''
+
+class ElementMismatchError(BalanceError):
+    '''Raised when an element shows up only in the reactants or only in the products.'''
+
+class NoBalanceError(BalanceError):
+    '''Raised when no positive stoichiometric coefficients conserve every element (and the charge).'''
+
+class UnderdeterminedReactionError(BalanceError):
+    '''Raised when a reaction has several independent balancings (nullspace of dimension > 1).'''
+
+def UnmatchedElements(M, l_elements, n_reactants):
+    '''Lists the elements showing up only in the reactants or only in the products.
+
+        The charge is conserved as an extra row, but it may show up on one side only (e.g. H2O → H+ + OH-).
+
+        Args:
+            M (csr_matrix) :        species-by-element matrix, reactants first (-> ElementMatrix function)
+            l_elements (list) :     element index of the columns of M
+            n_reactants (int) :     number of reactants
+
+        Returns:
+            l_unmatched (list) :    elements missing from one side of the reaction'''
+
+    elements_reactants = M[:n_reactants].getnnz(axis=0) > 0
+    elements_products = M[n_reactants:].getnnz(axis=0) > 0
+    return [element for j, element in enumerate(l_elements)
+            if element != "charge" and elements_reactants[j] != elements_products[j]]
 
 def BalanceEq(l_reactants, l_products):
     '''Calculates the stoichiometric coefficients to balance the chemical reaction.
 
-        Sorts the reactants and products alphabetically and solves the linear system to find the
-        minimal stoichiometric coefficients. The output lists respect the alphabetical order.
-        * Requires: Decompose, sympy
+        Sorts the reactants and products alphabetically and finds the minimal stoichiometric
+        coefficients by an exact elimination (-> BalanceEqBasis). The output lists respect the
+        alphabetical order. Ions (e.g. 'MnO4-', 'Fe2+', '[SO4]2-') and electrons ('e-') are
+        balanced by adding the conservation of charge to the system.
+        * Requires: BalanceEqBasis
 
         Args:
             l_reactants (list) :    contains the reactants
@@ -15,104 +51,221 @@ def BalanceEq(l_reactants, l_products):
         Returns:
             l_coefs_reactants (list) :  contains the stoichiometric coefficients for the reactants only
             l_coefs_products (list) :   contains the stoichiometric coefficients for the products only
-            l_coefs (list) :    contains all the stoichiometric coefficients in the correct order'''
-
-    l_dics_elements_reactants = Decompose(sorted(l_reactants))
-    l_dics_elements_products = Decompose(sorted(l_products))
-
-    '''Creates list of elements contained in the reactants'''
-    l_elements_reactants = []
-    for i in range(len(l_dics_elements_reactants)):
-        l_keys = list(l_dics_elements_reactants[i].keys())
-        for j in range(len(l_keys)):
-            l_elements_reactants.append(l_keys[j])
-    l_elements_reactants = list(set(l_elements_reactants))
-
-    '''Creates list of elements contained in the products'''
-    l_elements_products = []
-    for i in range(len(l_dics_elements_products)):
-        l_keys = list(l_dics_elements_products[i].keys())
-        for j in range(len(l_keys)):
-            l_elements_products.append(l_keys[j])
-    l_elements_products = list(set(l_elements_products))
-
-    '''Checks if the given reaction is valid (same elements show up in reactants and products)'''
-    if l_elements_reactants != l_elements_products:
+            l_coefs (list) :    contains all the stoichiometric coefficients in the correct order
+            (False if an element shows up only on one side of the reaction)
+
+        Raises:
+            NoBalanceError :    if only null or negative coefficients conserve every element and the charge (e.g. Fe2+ → Fe3+)
+            UnderdeterminedReactionError :  if the reaction has several independent balancings (e.g. H2 + O2 → H2O + H2O2)'''
+
+    try:
+        return BalanceEqBasis(l_reactants, l_products).to_tuple()
+    except ElementMismatchError:
         return False
+
+class BalanceResult:
+    '''Outcome of the exact elimination of a chemical reaction (-> BalanceEqBasis function).
+
+        Attributes:
+            l_reactants (list) :    reactants, sorted alphabetically
+            l_products (list) :     products, sorted alphabetically
+            dimension (int) :       dimension of the nullspace, i.e. number of independent balancings
+            basis (list) :          integer basis of the nullspace, one list of coefficients
+                                    (reactants then products) per independent balancing
+            l_coefs (list) :        minimal positive integer coefficients when the nullspace is 1-D, else None'''
+
+    def __init__(self, l_reactants, l_products, basis):
+        self.l_reactants = l_reactants
+        self.l_products = l_products
+        self.basis = basis
+        self.dimension = len(basis)
+        self.l_coefs = None
+        if self.dimension == 1 and all(coef > 0 for coef in basis[0]):
+            self.l_coefs = list(basis[0])
+
+    def coefficients(self):
+        '''Returns the minimal positive integer stoichiometric coefficients.
+
+            Returns:
+                l_coefs (list) :    coefficients of the reactants then of the products
+
+            Raises:
+                UnderdeterminedReactionError :  if the reaction has several independent balancings
+                NoBalanceError :    if the only balancing needs a null or negative coefficient'''
+
+        if self.dimension > 1:
+            raise UnderdeterminedReactionError(f"The reaction has {self.dimension} independent balancings: {self.basis}.")
+        if self.l_coefs is None:
+            raise NoBalanceError(f"The only balancing {self.basis[0]} needs a null or negative coefficient.")
+        return self.l_coefs
+
+    def to_tuple(self):
+        '''Returns the coefficients in the format of BalanceEq.
+
+            Returns:
+                result (tuple) :    reactants, products, their coefficients and all the coefficients'''
+
+        l_coefs = self.coefficients()
+        n_reactants = len(self.l_reactants)
+        return self.l_reactants, self.l_products, l_coefs[:n_reactants], l_coefs[n_reactants:], l_coefs
+
+    def __repr__(self):
+        return f"BalanceResult(l_reactants={self.l_reactants}, l_products={self.l_products}, dimension={self.dimension}, basis={self.basis})"
+
+def BalanceEqBasis(l_reactants, l_products):
+    '''Determines every balancing of a chemical reaction with one exact elimination.
+
+        The nullspace of the element (and charge) conservation matrix is read from its reduced
+        row echelon form: each free coefficient gives one basis vector, which is scaled to the
+        smallest integers. The reactants and products are sorted alphabetically, as in BalanceEq.
+        * Requires: ElementMatrix, sympy
+
+        Args:
+            l_reactants (list) :    contains the reactants
+            l_products (list) :  contains the products
+
+        Returns:
+            result (BalanceResult) :    dimension of the nullspace, integer basis and minimal coefficients
+
+        Raises:
+            ElementMismatchError :  if an element shows up only on one side of the reaction
+            NoBalanceError :    if the only solution is the null one'''
+
+    l_reactants = sorted(l_reactants)
+    l_products = sorted(l_products)
+    n_reactants = len(l_reactants)
+
+    M, l_elements = ElementMatrix(l_reactants + l_products)
+    l_unmatched = UnmatchedElements(M, l_elements, n_reactants)
+    if l_unmatched:
+        raise ElementMismatchError(f"{', '.join(l_unmatched)} must show up in both the reactants and the products.")
+
+    A = Matrix(M[:n_reactants].T.toarray().tolist()).row_join(-1*Matrix(M[n_reactants:].T.toarray().tolist()))
+    A, l_pivots = A.rref()
+
+    '''Builds one basis vector per free coefficient'''
+    basis = []
+    for free in range(A.cols):
+        if free in l_pivots:
+            continue
+        vec = [Rational(0)] * A.cols
+        vec[free] = Rational(1)
+        for i, pivot in enumerate(l_pivots):
+            vec[pivot] = -A[i, free]
+
+        '''Scales the vector to the smallest integers, with a positive first coefficient'''
+        scalar = math.lcm(*[int(coef.q) for coef in vec])
+        l_ints = [int(coef * scalar) for coef in vec]
+        divisor = math.gcd(*l_ints)
+        sign = -1 if next(coef for coef in l_ints if coef != 0) < 0 else 1
+        basis.append([sign * coef // divisor for coef in l_ints])
+
+    if not basis:
+        raise NoBalanceError("Only null coefficients conserve every element.")
+
+    return BalanceResult(l_reactants, l_products, basis)
+
+BALANCE_CACHE_SIZE = 65536
+'''Balanced reactions, least recently used first, bounded by BALANCE_CACHE_SIZE (-> balance_many function)'''
+d_balance_cache = OrderedDict()
+
+def ClearBalanceCache():
+    '''Empties the cache of balanced reactions (-> balance_many function).'''
+
+    d_balance_cache.clear()
+
+def CanonicalReaction(l_reactants, l_products):
+    '''Writes a chemical reaction in a canonical, hashable form.
+
+        Strips the whitespace around each molecule and sorts the reactants and products
+        alphabetically, as BalanceEq does, so that equivalent inputs share one cache entry.
+
+        Args:
+            l_reactants (list) :    contains the reactants
+            l_products (list) :  contains the products
+
+        Returns:
+            reaction (tuple) :  sorted tuple of reactants and sorted tuple of products'''
+
+    return tuple(sorted(reactant.strip() for reactant in l_reactants)), tuple(sorted(product.strip() for product in l_products))
+
+def BalanceEqSafe(reaction):
+    '''Balances a canonical reaction and returns the error instead of raising it.
+
+        * Requires: BalanceEq
+
+        Args:
+            reaction (tuple) :  reactants and products (-> CanonicalReaction function)
+
+        Returns:
+            result (tuple or Exception) :   output of BalanceEq, or the error that prevented the balancing'''
+
+    l_reactants, l_products = reaction
+    try:
+        result = BalanceEq(list(l_reactants), list(l_products))
+    except Exception as error:
+        return error
+    if result is False:
+        return ElementMismatchError(f"The reactants {list(l_reactants)} and products {list(l_products)} do not contain the same elements.")
+    return result
+
+def balance_many(l_reactions, processes=None, chunksize=16, cache=True):
+    '''Balances a list of chemical reactions.
+
+        The reactions are canonicalized and deduplicated, previously balanced reactions are taken
+        from the cache and the remaining ones are balanced on a pool of processes. The cache keeps
+        the BALANCE_CACHE_SIZE most recently used reactions (-> ClearBalanceCache function) and
+        every call returns fresh lists, so that editing a result leaves the cache untouched.
+        A reaction that cannot be balanced does not interrupt the batch: its entry holds the
+        error instead.
+        * Requires: CanonicalReaction, BalanceEqSafe, concurrent.futures, collections
+
+        Args:
+            l_reactions (list) :    contains a (reactants, products) pair for each reaction
+            processes (int) :       number of worker processes (default: number of CPUs); 1 balances in this process
+            chunksize (int) :       number of reactions sent to a worker at once
+            cache (bool) :          whether to read and fill the cache of balanced reactions
+
+        Returns:
+            l_results (list) :  contains, in the input order, the output of BalanceEq for each reaction
+                                or the exception describing why it could not be balanced'''
+
+    l_keys = []
+    for reaction in l_reactions:
+        try:
+            l_reactants, l_products = reaction
+            l_keys.append(CanonicalReaction(l_reactants, l_products))
+        except Exception as error:
+            l_keys.append(error)
+
+    d_results = {}
+    for key in l_keys:
+        if isinstance(key, tuple) and key not in d_results and cache and key in d_balance_cache:
+            d_balance_cache.move_to_end(key)
+            d_results[key] = d_balance_cache[key]
+    l_uncached = list(dict.fromkeys(key for key in l_keys if isinstance(key, tuple) and key not in d_results))
+
+    if processes == 1 or len(l_uncached) <= chunksize:
+        l_balanced = [BalanceEqSafe(key) for key in l_uncached]
     else:
-        l_elements = sorted(l_elements_reactants)
-
-        '''Creates reactant coefficient matrix R'''
-        RT = []
-        for i in range(len(l_dics_elements_reactants)):
-            for j in range(len(l_elements)):
-                if l_elements[j] not in l_dics_elements_reactants[i].keys():
-                    l_dics_elements_reactants[i][l_elements[j]] = 0
-            l_dics_elements_reactants[i] = dict(sorted(l_dics_elements_reactants[i].items()))
-            RT.append(list(l_dics_elements_reactants[i].values()))
-        R = Matrix(RT).T
-
-        '''Creates product coefficient matrix P'''
-        PT = []
-        for i in range(len(l_dics_elements_products)):
-            for j in range(len(l_elements)):
-                if l_elements[j] not in l_dics_elements_products[i].keys():
-                    l_dics_elements_products[i][l_elements[j]] = 0
-            l_dics_elements_products[i] = dict(sorted(l_dics_elements_products[i].items()))
-            PT.append(list(l_dics_elements_products[i].values()))
-        P = -1*Matrix(PT).T
-
-        '''Creates total coefficient matrix A'''
-        A = R.row_join(P)
-        A = A.rref()[0]
-        AT = A.T
-        l_AT = AT.tolist()
-
-        '''Deletes the unit vectors in the matrix'''
-        l_unit_vecs = []
-        for vec in l_AT:
-            if vec.count(1) == 1 and vec.count(0) == len(vec)-1:
-                l_unit_vecs.append(vec)
-
-        for unit_vec in l_unit_vecs:
-            if unit_vec in l_AT:
-                l_AT.remove(unit_vec)
-        l_raw_vecs = l_AT
-
-        '''Determines the scalar giving the smallest integer solution'''
-        l_scalars = []
-        for vec in l_raw_vecs:
-            l_temp = []
-            for coef in vec:
-                if "/" in str(coef):
-                    numerator, denominator = str(coef).split('/')
-                    l_temp.append(int(denominator))
-                else:
-                    l_temp.append(1)
-            l_scalars.append(int(max(l_temp)))
-
-        '''Extracts the coefficional vectors from the matrix'''
-        l_vecs = []
-        for i in range(len(l_raw_vecs)):
-            for j in range(len(l_dics_elements_reactants)+len(l_dics_elements_products)-len(vec)-1):
-                vec.append(0)
-            for j in range(len(l_dics_elements_reactants)+len(l_dics_elements_products)-len(vec)):
-                vec.append(1)
-            l_vecs.append(vec)
-
-        '''Evaluates the stoichiometric coefficients'''
-        for i in range(len(l_raw_vecs)):
-            scalar = l_scalars[i]
-            for j in range(len(l_raw_vecs[i])):
-                l_raw_vecs[i][j] = abs(int(l_raw_vecs[i][j]*scalar))
-        l_vecs = l_raw_vecs
-
-        '''Creates corresponding lists'''
-        l_coefs = [sum(coef) for coef in zip(*l_vecs)]
-        l_coefs_reactants = l_coefs[:len(l_dics_elements_reactants)]
-        l_coefs_products = l_coefs[-len(l_dics_elements_products):]
-
-    return sorted(l_reactants) , sorted(l_products), l_coefs_reactants, l_coefs_products, l_coefs,
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            l_balanced = list(executor.map(BalanceEqSafe, l_uncached, chunksize=chunksize))
+
+    for key, result in zip(l_uncached, l_balanced):
+        d_results[key] = result
+        if cache and not isinstance(result, Exception):
+            '''The cache holds tuples only, and drops the least recently used reactions'''
+            d_balance_cache[key] = tuple(tuple(item) for item in result)
+            while len(d_balance_cache) > BALANCE_CACHE_SIZE:
+                d_balance_cache.popitem(last=False)
+
+    l_results = []
+    for key in l_keys:
+        result = key if isinstance(key, Exception) else d_results[key]
+        if not isinstance(result, Exception):
+            result = tuple(list(item) for item in result)
+        l_results.append(result)
+    return l_results
 
 def BalanceEqUI():
     '''User interface to facilitate the usage of the BalanceEq function.
@@ -135,8 +288,15 @@ def BalanceEqUI():
                 break
             l_products.append(product)
 
+        if not l_reactants or not l_products:
+            print(f"\033[1m" + "Invalid chemical reaction! Enter at least one reactant and one product." + "\033[0m")
+            continue
+
         try:
-            l_reactants, l_products, l_coefs_reactants, l_coefs_products, l_coefs = BalanceEq(l_reactants, l_products)
+            result = BalanceEq(l_reactants, l_products)
+            if result is False:
+                raise ElementMismatchError("The reactants and products do not contain the same elements.")
+            l_reactants, l_products, l_coefs_reactants, l_coefs_products, l_coefs = result
             l_reaction1 = [reactant for coef in zip(l_coefs_reactants, l_reactants) for reactant in coef]
             l_reaction2 = [product for coef in zip(l_coefs_products, l_products) for product in coef]
 
@@ -159,8 +319,8 @@ def BalanceEqUI():
             chemical_equation = f"{coefs_reactants} → {coefs_products}"
             print(chemical_equation)
             break
-        except:
-            print(f"\033[1m" + "Invalid chemical reaction!" + "\033[0m")
+        except (FormulaError, BalanceError) as error:
+            print(f"\033[1m" + f"Invalid chemical reaction! {error}" + "\033[0m")
 
 #print(BalanceEq(["H2", "O2"], ["H2O"]))
 #print(BalanceEq(["C2H4", "O2"], ["H2O", "CO2"]))
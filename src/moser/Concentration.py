@@ -1,4 +1,5 @@
 from MolarMass import *
+import numpy as np
 
 compound = str()
 def ConcentrationA(n, V):
@@ -48,6 +49,213 @@ def ConcentrationC(Ci, Vi, Vf):
     C = float(Vi)/float(Vf)*float(Ci)
     return C
 
+d_volume_units = {"L": 1, "dL": 1e-1, "cL": 1e-2, "mL": 1e-3, "µL": 1e-6, "uL": 1e-6, "m3": 1e3}
+d_mass_units = {"kg": 1e3, "g": 1, "mg": 1e-3, "µg": 1e-6, "ug": 1e-6}
+d_amount_units = {"mol": 1, "mmol": 1e-3, "µmol": 1e-6, "umol": 1e-6}
+
+def ToBaseUnit(values, unit, d_units):
+    '''Converts values to the base unit of a unit dictionary (L, g or mol).
+
+            Only single units are accepted: ratio units such as mL/L, mg/g or mmol/mol are not
+            supported, and each quantity takes its own unit argument instead.
+
+            Args:
+                values (array-like) :   values expressed in unit
+                unit (str) :            unit of the values (e.g. "mL")
+                d_units (dict) :        unit dictionary (d_volume_units, d_mass_units or d_amount_units)
+
+            Returns:
+                values (array) :  values in the base unit
+
+            Raises:
+                ValueError : unknown unit'''
+
+    if unit not in d_units:
+        raise ValueError(f"Invalid unit '{unit}'. Choose between {', '.join(d_units)}.")
+    return np.asarray(values, dtype=float)*d_units[unit]
+
+def ConcentrationsA(n, V, n_unit="mol", V_unit="L"):
+    '''Evaluates the molar concentrations of solutions from arrays of moles and volumes.
+
+            Vectorized version of ConcentrationA; the arrays are broadcast against each other.
+            * Requires: ToBaseUnit, numpy
+
+            Args:
+                n (array-like) :    numbers of moles of solute
+                V (array-like) :    volumes of the solutions
+                n_unit (str) :      unit of n (mol, mmol, µmol)
+                V_unit (str) :      unit of V (L, mL, µL, ...)
+
+            Returns:
+                C (array) :  solutions' molar concentrations [molL⁻¹]'''
+
+    return ToBaseUnit(n, n_unit, d_amount_units)/ToBaseUnit(V, V_unit, d_volume_units)
+
+def ConcentrationsB(compounds, m, V, m_unit="g", V_unit="L"):
+    '''Evaluates the molar concentrations of solutions from arrays of masses and volumes.
+
+            Vectorized version of ConcentrationB. The molar mass of each distinct compound is
+            evaluated once (-> MolarMasses function).
+            * Requires: MolarMasses, ToBaseUnit, numpy
+
+            Args:
+                compounds (str or list) :   chemical formula of the solute of each solution (or a single one)
+                m (array-like) :            masses of solute
+                V (array-like) :            volumes of the solutions
+                m_unit (str) :              unit of m (kg, g, mg, µg)
+                V_unit (str) :              unit of V (L, mL, µL, ...)
+
+            Returns:
+                C (array) :  solutions' molar concentrations [molL⁻¹]'''
+
+    M = MolarMasses(np.atleast_1d(compounds))
+    return ToBaseUnit(m, m_unit, d_mass_units)/(M*ToBaseUnit(V, V_unit, d_volume_units))
+
+def ConcentrationsC(Ci, Vi, Vf, V_unit="L"):
+    '''Evaluates the molar concentrations of diluted solutions.
+
+            Vectorized version of ConcentrationC; both volumes share the same unit.
+            * Requires: ToBaseUnit, numpy
+
+            Args:
+                Ci (array-like) :   initial concentrations
+                Vi (array-like) :   initial volumes
+                Vf (array-like) :   final volumes
+                V_unit (str) :      unit of Vi and Vf
+
+            Returns:
+                C (array) :  solutions' molar concentrations, in the unit of Ci'''
+
+    return ToBaseUnit(Vi, V_unit, d_volume_units)/ToBaseUnit(Vf, V_unit, d_volume_units)*np.asarray(Ci, dtype=float)
+
+def SolutionProperties(compounds, m_solute, m_solvent, V, m_solute_unit="g", m_solvent_unit="g", V_unit="L"):
+    '''Evaluates the composition of solutions prepared by dissolving a solute in a solvent.
+
+            The molar mass of each distinct compound is evaluated once (-> MolarMasses function);
+            all the quantities are then computed in one vectorized pass over the solutions.
+            * Requires: MolarMasses, ToBaseUnit, numpy
+
+            Args:
+                compounds (str or list) :   chemical formula of the solute of each solution (or a single one)
+                m_solute (array-like) :     masses of solute
+                m_solvent (array-like) :    masses of solvent
+                V (array-like) :            volumes of the solutions
+                m_solute_unit (str) :       unit of m_solute (kg, g, mg, µg)
+                m_solvent_unit (str) :      unit of m_solvent (kg, g, mg, µg)
+                V_unit (str) :              unit of V (L, mL, µL, ...)
+
+            Returns:
+                d_properties (dict) :   arrays of the solutions' properties:
+                                        "molarity" [molL⁻¹], "molality" [molkg⁻¹],
+                                        "mass_fraction" [-] and "ppm" (parts per million by mass)'''
+
+    M = MolarMasses(np.atleast_1d(compounds))
+    m_solute = ToBaseUnit(m_solute, m_solute_unit, d_mass_units)
+    m_solvent = ToBaseUnit(m_solvent, m_solvent_unit, d_mass_units)
+    n = m_solute/M
+    mass_fraction = m_solute/(m_solute + m_solvent)
+
+    return {"molarity": n/ToBaseUnit(V, V_unit, d_volume_units),
+            "molality": n/(m_solvent*1e-3),
+            "mass_fraction": mass_fraction,
+            "ppm": mass_fraction*1e6}
+
+def StockRecipes(compounds, C, V, V_unit="L"):
+    '''Evaluates the masses of solute to weigh to prepare stock solutions.
+
+            The molar mass of each distinct compound is evaluated once (-> MolarMasses function).
+            * Requires: MolarMasses, ToBaseUnit, numpy
+
+            Args:
+                compounds (str or list) :   chemical formula of the solute of each stock (or a single one)
+                C (array-like) :            concentrations of the stocks [molL⁻¹]
+                V (array-like) :            volumes of the stocks
+                V_unit (str) :              unit of V (L, mL, µL, ...)
+
+            Returns:
+                m (array) :  masses of solute to dissolve [g]'''
+
+    return MolarMasses(np.atleast_1d(compounds))*np.asarray(C, dtype=float)*ToBaseUnit(V, V_unit, d_volume_units)
+
+def PlanDilutions(C_targets, V_targets, C_stocks, V_min=1e-6, factor=10, dead_volume=0):
+    '''Plans the preparation of target solutions by dilution of stock solutions.
+
+            Each target is pipetted from the source, stock or intermediate solution, requiring the
+            largest transfer volume between V_min and the target volume, then completed with diluent.
+            Targets too dilute for every stock are served by a ladder of intermediate solutions,
+            each one factor times more dilute than the previous, started from the least concentrated
+            stock and shared by all the targets. An intermediate is prepared in the volume drawn from
+            it (by the targets and the next intermediate) plus the dead volume, and in at least
+            factor⋅V_min so that its own transfer can be pipetted. The factor should not exceed the
+            ratio of the target volumes to V_min, else some targets fall between two intermediates.
+            The targets may have any shape, e.g. (n_plates, 384); all the volumes share one unit and
+            all the concentrations another.
+            * Requires: numpy
+
+            Args:
+                C_targets (array-like) :    concentrations of the targets (0 for blanks)
+                V_targets (array-like) :    volumes of the targets, broadcast against C_targets
+                C_stocks (array-like) :     concentrations of the available stocks
+                V_min (float) :             smallest volume that can be pipetted (default 1e-6)
+                factor (float) :            dilution factor between successive intermediates (default 10)
+                dead_volume (float) :       extra volume prepared for each intermediate (default 0)
+
+            Returns:
+                d_plan (dict) : - "source" (array) : index, in "source_concentrations", of the source of
+                                  each target (-1 for blanks and targets that cannot be prepared)
+                                - "source_volume", "diluent_volume" (arrays) : volumes to pipet into each
+                                  target (NaN for targets more concentrated than every stock)
+                                - "source_concentrations" (array) : stocks, then intermediates
+                                - "intermediates" (dict) : "concentration", "parent" (index of the source
+                                  it is diluted from), "volume", "parent_volume" and "diluent_volume"
+                                  of each intermediate, in order of preparation'''
+
+    C_targets, V_targets = np.broadcast_arrays(np.asarray(C_targets, dtype=float), np.asarray(V_targets, dtype=float))
+    C_stocks = np.atleast_1d(np.asarray(C_stocks, dtype=float))
+    concentrations = C_targets.ravel()
+    volumes = V_targets.ravel()
+    n_stocks = len(C_stocks)
+
+    '''Builds the ladder of intermediates reaching the most dilute target'''
+    amounts = concentrations*volumes
+    n_rungs = 0
+    if np.any(amounts > 0):
+        ratio = C_stocks.min()*V_min/amounts[amounts > 0].min()
+        n_rungs = max(int(np.ceil(np.log(ratio)/np.log(factor) - 1e-9)), 0)
+    sources = np.concatenate([C_stocks, C_stocks.min()/float(factor)**np.arange(1, n_rungs + 1)])
+
+    '''Chooses the source of each target'''
+    transfers = amounts[:, None]/sources[None, :]
+    valid = (transfers >= V_min) & (transfers <= volumes[:, None]) & (concentrations[:, None] > 0)
+    source = np.argmax(np.where(valid, transfers, -np.inf), axis=1)
+    feasible = valid[np.arange(len(source)), source]
+    blank = concentrations == 0
+    source_volume = np.where(feasible, transfers[np.arange(len(source)), source], np.where(blank, 0.0, np.nan))
+    source = np.where(feasible, source, -1)
+
+    '''Sizes the intermediates from the most dilute one upwards'''
+    draws = np.bincount(source[feasible], weights=source_volume[feasible], minlength=len(sources))
+    rung_volumes = np.zeros(n_rungs)
+    next_transfer = 0.0
+    for k in range(n_rungs - 1, -1, -1):
+        need = draws[n_stocks + k] + next_transfer
+        if need > 0:
+            rung_volumes[k] = max(need + dead_volume, factor*V_min)
+            next_transfer = rung_volumes[k]/factor
+    n_used = int(np.count_nonzero(rung_volumes))
+    rung_volumes = rung_volumes[:n_used]
+    parent_volumes = rung_volumes/factor
+
+    return {"source": source.reshape(C_targets.shape),
+            "source_volume": source_volume.reshape(C_targets.shape),
+            "diluent_volume": (volumes - source_volume).reshape(C_targets.shape),
+            "source_concentrations": sources[:n_stocks + n_used],
+            "intermediates": {"concentration": sources[n_stocks:n_stocks + n_used],
+                              "parent": np.concatenate([[np.argmin(C_stocks)], n_stocks + np.arange(n_used - 1)])[:n_used],
+                              "volume": rung_volumes,
+                              "parent_volume": parent_volumes,
+                              "diluent_volume": rung_volumes - parent_volumes}}
+
 def ConcentrationUI():
     '''Integrates the three concentration calculation methods in a practical user interface.
 
@@ -99,8 +307,11 @@ def ConcentrationUI():
                 print(f"\033[1m" + "\nThe concentration of this solution equals" + "\033[0m"
                     f"\n➢ c = {C} molL⁻¹")
                 break
-        except:
-            print("\033[1m" + "Enter the pKa" + "\033[0m")
+        except FormulaError as error:
+            print("\033[1m" + f"Invalid chemical formula! {error}" + "\033[0m")
+            compound = input("Enter the chemical formula: ")
+        except (ValueError, ZeroDivisionError):
+            print("\033[1m" + "Enter valid data!" + "\033[0m")
 
     return C
 
@@ -1,92 +1,313 @@
-def Decompose(lis):
+import re
+import numpy as np
+from functools import lru_cache
+
+from PeriodicTable import d_atomic_numbers, d_isotopes, l_symbols
+
+def SplitCharge(molecule):
+    '''Separates the charge notation from a chemical formula.
+
+            Accepts a caret ('Fe^2+', 'SO4^{2-}'), a bracketed formula ('[SO4]2-') or trailing signs
+            ('MnO4-', 'H3O+', 'Cu++', 'Fe3+'). Digits directly before a trailing sign are read as the
+            charge after a closing bracket or a single element symbol (Fe3+, O2-), and as the last
+            subscript of a polyatomic formula (MnO4-). The caret or brackets lift the ambiguity
+            (O2^-, [Cr2O7]2-). Square brackets enclosing the whole formula are removed, unless they
+            start with a mass number ('[13C]').
+
+            Args:
+                molecule (str) : chemical formula, possibly with a charge
+
+            Returns:
+                formula (str) : chemical formula without the charge notation
+                charge (int) :  charge of the molecule (0 for neutral molecules)'''
+
+    match = re.fullmatch(r"(.*?)\^\{?(\d*)(\++|-+)\}?", molecule)
+    if match:
+        formula, digits, signs = match.groups()
+    else:
+        match = re.fullmatch(r"(.*?)(\d*)(\++|-+)", molecule)
+        if match:
+            formula, digits, signs = match.groups()
+            if digits and not (formula.endswith("]") or re.fullmatch(r"[A-Z][a-z]?", formula)):
+                formula, digits = formula + digits, ""
+        else:
+            formula, digits, signs = molecule, "", ""
+
+    charge = int(digits) if digits else len(signs)
+    if signs.startswith("-"):
+        charge = -charge
+
+    if formula.startswith("[") and formula.endswith("]") and "[" not in formula[1:-1] and not formula[1:2].isdigit():
+        formula = formula[1:-1]
+
+    return formula, charge
+
+def Decompose(lis, output="dict", errors="raise"):
     '''Decomposes a list of molecules into their composition.
 
             The decomposition yields a list containing a dictionary for each molecule,
             connecting each element to their occurrences in the compound
-            (element (str) : occurrences in molecule (int)).
+            (element (str) : occurrences in molecule (int)). The charge of an ion
+            (-> SplitCharge function) is stored under the key 'charge'; the electron is written 'e-'.
+            Hydrates, adducts and isotopes are supported (-> ParseFormulaSafe function).
+
+            With output="vector", the compositions are compiled (-> CompileFormula function) into
+            fixed-width integer vectors indexed by atomic number (column Z-1), stacked in a 2-D array.
+            With output="sparse", each composition is an (indices, counts) pair. Both compiled forms
+            hold the elements only; the charge is given by SplitCharge.
+
+            With errors="collect", invalid molecules do not interrupt the decomposition: their entry
+            is None (a null vector with output="vector") and their errors are returned alongside.
 
             Args:
-                lis (list) : contains the molecules as strings
+                lis (list) :    contains the molecules as strings
+                output (str) :  "dict" (default), "vector" or "sparse"
+                errors (str) :  "raise" (default) or "collect"
 
             Returns:
-                l_dics (list) :  contains a dictionnary for each molecule'''
+                l_dics (list) :  contains a dictionnary for each molecule
+                (or vectors (array) : int32 array of shape (len(lis), 118) with output="vector")
+                (or l_pairs (list) : contains an (indices, counts) pair for each molecule with output="sparse")
+                l_errors (list) :  with errors="collect" only, contains an (index, FormulaError) pair
+                                   for each invalid molecule
+
+            Raises:
+                FormulaError : invalid molecule, with errors="raise"'''
 
-    l_dics = []
+    if output not in ("dict", "vector", "sparse"):
+        raise ValueError(f"Invalid output '{output}'. Choose between dict, vector and sparse.")
+    if errors not in ("raise", "collect"):
+        raise ValueError(f"Invalid errors '{errors}'. Choose between raise and collect.")
+
+    l_errors = []
     for i in range(len(lis)):
-        l_temp = list(lis[i] + "*")
-
-        '''Concatenates lower- and uppercase letters'''
-        j = 0
-        while j < len(l_temp) - 1:
-            if str(l_temp[j]).isupper() and str(l_temp[j + 1]).islower():
-                l_temp[j] = l_temp[j] + l_temp[j + 1]
-                del l_temp[j + 1]
-            j = j + 1
-
-        '''Concatenates coefficients'''
-        j = 0
-        while j < len(l_temp) - 1:
-            if str(l_temp[j]).isdigit():
-                idx_start = j
-                idx_end = j
-                while str(l_temp[idx_end]).isdigit() and idx_end < len(l_temp)-1:
-                    idx_end = idx_end + 1
-                if idx_end - idx_start > 1:
-                    number = "".join(l_temp[idx_start:idx_end])
-                    l_temp.insert(idx_start, number)
-                j = idx_end + 1
+        error = ParseFormulaSafe(lis[i])[1]
+        if error is not None:
+            if errors == "raise":
+                raise error.with_traceback(None)
+            l_errors.append((i, error))
+    s_invalid = {i for i, _ in l_errors}
+
+    if output == "vector":
+        result = np.zeros((len(lis), len(l_symbols)), dtype=np.int32)
+        for i in range(len(lis)):
+            if i not in s_invalid:
+                indices, counts = CompileFormula(lis[i])
+                result[i, indices] = counts
+    elif output == "sparse":
+        result = [None if i in s_invalid else CompileFormula(lis[i]) for i in range(len(lis))]
+    else:
+        result = [None if i in s_invalid else dict(ParseFormulaSafe(lis[i])[0]) for i in range(len(lis))]
+
+    if errors == "collect":
+        return result, l_errors
+    return result
+
+SEPARATORS = "·•∙*."
+OPENING = {"(": ")", "[": "]"}
+ISOTOPE_LETTERS = {"D": "2H", "T": "3H"}
+
+def ReadSymbol(formula, i):
+    '''Reads the element symbol starting at position i of a formula.
+
+            Two-letter symbols are preferred when they exist (Co, not C + o). D and T stand for
+            deuterium and tritium and are returned as the isotopes '2H' and '3H'.
+
+            Args:
+                formula (str) : chemical formula
+                i (int) :       position of the uppercase letter
+
+            Returns:
+                symbol (str) :  element symbol, isotope or None if no symbol starts at i
+                end (int) :     position following the symbol'''
+
+    if i >= len(formula) or not formula[i].isupper():
+        return None, i
+    if i + 1 < len(formula) and formula[i + 1].islower() and formula[i:i + 2] in d_atomic_numbers:
+        return formula[i:i + 2], i + 2
+    if formula[i] in d_atomic_numbers:
+        return formula[i], i + 1
+    if formula[i] in ISOTOPE_LETTERS:
+        return ISOTOPE_LETTERS[formula[i]], i + 1
+    return None, i
+
+def ReadNumber(formula, i, default=1):
+    '''Reads the integer starting at position i of a formula (default if there is none).'''
+
+    j = i
+    while j < len(formula) and formula[j].isdigit():
+        j = j + 1
+    return (int(formula[i:j]) if j > i else default), j
+
+class FormulaError(ValueError):
+    '''Raised (or returned, -> ParseFormulaSafe function) when a chemical formula cannot be parsed.
+
+        Attributes:
+            molecule (str) :    formula as given
+            position (int) :    position of the offending token in the formula
+            token (str) :       offending token
+            reason (str) :      description of the problem'''
+
+    def __init__(self, molecule, position, token, reason):
+        self.molecule = molecule
+        self.position = position
+        self.token = token
+        self.reason = reason
+        super().__init__(f"{reason} '{token}' at position {position} of '{molecule}'.")
+
+    def __reduce__(self):
+        return FormulaError, (self.molecule, self.position, self.token, self.reason)
+
+@lru_cache(maxsize=65536)
+def ParseFormulaSafe(molecule):
+    '''Parses a molecule into its composition in a single pass over the formula, without raising.
+
+            The formula is read from left to right with a stack holding one composition per
+            open bracket; closing a bracket multiplies its content by the following subscript.
+            Supported notations:
+            - nested round and square brackets: 'Ca3(PO4)2', '[Cu(NH3)4]SO4'
+            - bond dashes: 'HOOC-(CHOH)2-COOH'
+            - hydrates and adducts separated by '·', '•', '*' or '.', each part with an
+              optional leading multiplier: 'CuSO4·5H2O', 'CaCl2*2H2O'
+            - isotopes, written with their mass number and symbol alone between square brackets
+              ('[13C]O2', 'C[13C]H6', '[2H]2O', 'CD3-[13C]H3'), and deuterium and tritium (D, T).
+              Isotopes are keyed by mass number and symbol ('13C', '2H') and must be tabulated
+              (-> PeriodicTable). A leading number is always a multiplier ('2H2O' is two H2O).
+            The charge (-> SplitCharge function) is stored under the key 'charge'. An invalid
+            formula yields a FormulaError locating the offending token; it is returned rather than
+            raised, so that batches of formulas are checked without exception handling. The result
+            is cached; the items are sorted by key.
+            * Requires: SplitCharge, ReadSymbol, ReadNumber, FormulaError, PeriodicTable
+
+            Args:
+                molecule (str) : molecule to parse
+
+            Returns:
+                l_items (tuple) :       (element, occurrences) pairs of the molecule, or None if it is invalid
+                error (FormulaError) :  description of the problem, or None if the molecule is valid'''
+
+    formula, charge = SplitCharge(molecule)
+    if formula == "e":
+        formula = ""
+    elif not formula.strip():
+        return None, FormulaError(molecule, 0, molecule, "Empty formula")
+
+    '''Positions are reported in the given molecule, from which SplitCharge may strip a bracket'''
+    offset = 1 if molecule.startswith("[") and not formula.startswith("[") else 0
+
+    d_total = {}
+    l_stack = [{}]
+    l_open = []
+    multiplier = 1
+    component_start = True
+    i = 0
+    while i < len(formula):
+        char = formula[i]
+        if char.isdigit():
+            number, j = ReadNumber(formula, i)
+            symbol, k = ReadSymbol(formula, j)
+            if i > 0 and formula[i - 1] == "[" and symbol is not None and formula[k:k + 1] == "]":
+                '''An isotope stands alone between square brackets, its count follows the bracket'''
+                if symbol not in d_isotopes or number not in d_isotopes[symbol]:
+                    return None, FormulaError(molecule, i + offset, formula[i:k], "Unknown isotope")
+                key = f"{number}{symbol}"
+                l_stack[-1][key] = l_stack[-1].get(key, 0) + 1
+                i = k
+            elif component_start:
+                multiplier = number
+                i = j
             else:
-                j = j + 1
-
-        '''Adds the implicit coefficient 1'''
-        j = 0
-        while j < len(l_temp) - 1:
-            if str(l_temp[j]).isalpha() and str(l_temp[j+1]).isdigit() == False:
-                l_temp.insert(j+1, 1)
-            j = j + 1
-
-        '''Distributes coefficients in brackets'''
-        l_idx = []
-        for j in range(len(l_temp)):
-            if l_temp[j] == "(":
-                l_idx.append(j)
-
-        cnt = -1
-        for j, z in enumerate(l_temp):
-            if str(l_temp[j]).isdigit() and l_temp[j - 1] == ")":
-                cnt = cnt + 1
-                for k in range(l_idx[cnt], j, 2):
-                    if str(l_temp[k]).isnumeric():
-                        l_temp[k] = int(l_temp[k]) * int(l_temp[j])
-
-        j = 0
-        while j < len(l_temp) - 1:
-            if str(l_temp[j]).isdigit() and l_temp[j - 1] == ")":
-                del l_temp[j]
-            j = j + 1
-
-        if str(l_temp[-1]).isdigit() and str(l_temp[-2]) == ")":
-            del l_temp[-1]
-
-        '''Deletes brackets'''
-        while "(" in l_temp:
-            l_temp.remove("(")
-
-        while ")" in l_temp:
-            l_temp.remove(")")
-
-        '''Creates a dictionary element:total_coefficient'''
-        d_temp = {}
-        for j in range(len(l_temp)-1):
-            if str(l_temp[j]).isalpha():
-                if l_temp[j] in d_temp:
-                    d_temp[l_temp[j]] = int(d_temp[l_temp[j]]) + int(l_temp[j + 1])
-                else:
-                    d_temp[l_temp[j]] = int(l_temp[j + 1])
-
-        d_temp = {key:value for key, value in sorted(d_temp.items())}
-
-        l_dics.append(d_temp)
-
-    return l_dics
+                return None, FormulaError(molecule, i + offset, formula[i:j], "Unexpected number")
+        elif char.isupper():
+            symbol, j = ReadSymbol(formula, i)
+            if symbol is None:
+                name = formula[i:i + 2] if formula[i + 1:i + 2].islower() else char
+                return None, FormulaError(molecule, i + offset, name, "Unknown element")
+            occurrence, i = ReadNumber(formula, j)
+            l_stack[-1][symbol] = l_stack[-1].get(symbol, 0) + occurrence
+        elif char in OPENING:
+            l_stack.append({})
+            l_open.append((char, i))
+            i = i + 1
+        elif char in ")]":
+            if not l_open or OPENING[l_open.pop()[0]] != char:
+                return None, FormulaError(molecule, i + offset, char, "Unbalanced bracket")
+            d_group = l_stack.pop()
+            occurrence, i = ReadNumber(formula, i + 1)
+            for element, count in d_group.items():
+                l_stack[-1][element] = l_stack[-1].get(element, 0) + count * occurrence
+        elif char in SEPARATORS:
+            if l_open:
+                return None, FormulaError(molecule, i + offset, char, "Separator inside brackets")
+            '''Adds the finished part, times its leading multiplier, to the total'''
+            for element, count in l_stack[0].items():
+                d_total[element] = d_total.get(element, 0) + count * multiplier
+            l_stack[0] = {}
+            multiplier = 1
+            component_start = True
+            i = i + 1
+            continue
+        elif char == "-" or char.isspace():
+            i = i + 1
+            continue
+        else:
+            return None, FormulaError(molecule, i + offset, char, "Unexpected character")
+        component_start = False
+
+    if l_open:
+        char, position = l_open[-1]
+        return None, FormulaError(molecule, position + offset, char, "Unclosed bracket")
+    for element, count in l_stack[0].items():
+        d_total[element] = d_total.get(element, 0) + count * multiplier
+
+    if charge != 0:
+        d_total["charge"] = charge
+
+    return tuple(sorted(d_total.items())), None
+
+def ParseFormula(molecule):
+    '''Parses a molecule into its composition (-> ParseFormulaSafe function).
+
+            Args:
+                molecule (str) : molecule to parse
+
+            Returns:
+                l_items (tuple) : (element, occurrences) pairs of the molecule
+
+            Raises:
+                FormulaError : unknown element or isotope, misplaced number, unbalanced bracket or unexpected character'''
+
+    l_items, error = ParseFormulaSafe(molecule)
+    if error is not None:
+        raise error.with_traceback(None)
+    return l_items
+
+@lru_cache(maxsize=65536)
+def CompileFormula(molecule):
+    '''Compiles a molecule into a compact integer composition indexed by atomic number.
+
+            The composition (-> ParseFormula function) is stored as the sorted indices (Z-1) of its
+            elements and their occurrences; isotopes are counted as their element. The result is
+            cached, so repeated formulas are parsed once and take a few bytes each. The arrays are
+            read-only.
+            * Requires: ParseFormula, PeriodicTable, numpy
+
+            Args:
+                molecule (str) : molecule to compile
+
+            Returns:
+                indices (array) :   uint8 indices (atomic number - 1) of the elements
+                counts (array) :    int32 occurrences of the elements'''
 
+    d_counts = {}
+    for element, occurrence in ParseFormula(molecule):
+        if element != "charge":
+            '''Isotopes count as their element'''
+            index = d_atomic_numbers[element.lstrip("0123456789")] - 1
+            d_counts[index] = d_counts.get(index, 0) + occurrence
+    l_pairs = sorted(d_counts.items())
+    indices = np.array([index for index, _ in l_pairs], dtype=np.uint8)
+    counts = np.array([occurrence for _, occurrence in l_pairs], dtype=np.int32)
+    indices.flags.writeable = False
+    counts.flags.writeable = False
+    return indices, counts
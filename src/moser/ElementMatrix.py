@@ -0,0 +1,78 @@
+from Decompose import *
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def ElementMatrix(l_molecules, l_elements=None):
+    '''Builds the species-by-element stoichiometry matrix of a list of molecules.
+
+        Each molecule is decomposed once and its occurrences are stored in a sparse integer
+        matrix (one row per molecule, one column per element), so that large reaction networks
+        do not need a zero for every element missing from a molecule. The columns follow the
+        alphabetical order of the elements, unless an element index is given.
+        * Requires: Decompose, numpy, scipy
+
+        Args:
+            l_molecules (list) :    contains the molecules as strings
+            l_elements (list) :     (optional) element index fixing the order of the columns
+
+        Returns:
+            M (csr_matrix) :    occurrences of each element (column) in each molecule (row)
+            l_elements (list) : element index, i.e. the element of each column'''
+
+    l_dics = Decompose(l_molecules)
+
+    if l_elements is None:
+        l_elements = sorted(set(element for d_elements in l_dics for element in d_elements))
+    d_index = {element: j for j, element in enumerate(l_elements)}
+
+    l_rows = []
+    l_cols = []
+    l_data = []
+    for i, d_elements in enumerate(l_dics):
+        for element, occurrence in d_elements.items():
+            if element not in d_index:
+                raise KeyError(f"{element} is missing from the element index.")
+            l_rows.append(i)
+            l_cols.append(d_index[element])
+            l_data.append(occurrence)
+
+    M = csr_matrix((np.array(l_data, dtype=np.int64), (np.array(l_rows, dtype=np.int64), np.array(l_cols, dtype=np.int64))),
+                   shape=(len(l_molecules), len(l_elements)))
+    return M, l_elements
+
+def AtomBalance(l_reactants, l_products, l_coefs_reactants, l_coefs_products):
+    '''Evaluates the net number of atoms of each element created by a reaction.
+
+        The balance equals Mᵀ⋅ν, with M the stoichiometry matrix (-> ElementMatrix function) and
+        ν the stoichiometric coefficients, negative for the reactants.
+        * Requires: ElementMatrix
+
+        Args:
+            l_reactants (list) :        contains the reactants
+            l_products (list) :         contains the products
+            l_coefs_reactants (list) :  contains the stoichiometric coefficients of the reactants
+            l_coefs_products (list) :   contains the stoichiometric coefficients of the products
+
+        Returns:
+            d_balance (dict) :  net number of atoms created for each element (0 everywhere for a balanced reaction)'''
+
+    M, l_elements = ElementMatrix(list(l_reactants) + list(l_products))
+    nu = np.array([-coef for coef in l_coefs_reactants] + list(l_coefs_products))
+    balance = M.T @ nu
+    return {element: balance[j].item() for j, element in enumerate(l_elements)}
+
+def IsBalanced(l_reactants, l_products, l_coefs_reactants, l_coefs_products):
+    '''Checks whether a reaction conserves the atoms of every element.
+
+        * Requires: AtomBalance
+
+        Args:
+            l_reactants (list) :        contains the reactants
+            l_products (list) :         contains the products
+            l_coefs_reactants (list) :  contains the stoichiometric coefficients of the reactants
+            l_coefs_products (list) :   contains the stoichiometric coefficients of the products
+
+        Returns:
+            balanced (bool) :   True if every element is conserved'''
+
+    return all(value == 0 for value in AtomBalance(l_reactants, l_products, l_coefs_reactants, l_coefs_products).values())
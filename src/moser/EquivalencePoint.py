@@ -0,0 +1,299 @@
+import numpy as np
+from scipy.signal import savgol_filter
+
+from kinetics_fit import levenberg_marquardt, linear_fit
+from Titration import pH1, pH3, pH4
+
+def SmoothDerivatives(volumes, pH, window=11, order=3):
+    '''Smooths measured titration curves and evaluates their first and second derivatives.
+
+        Fits a polynomial of the given order on a sliding window of points (Savitzky–Golay filter),
+        for all the curves at once. The volumes are differentiated the same way, so that unevenly
+        spaced additions of titrant are handled by the chain rule:
+        dpH/dV = pH'/V' and d²pH/dV² = (pH''⋅V' - pH'⋅V'')/V'³, ' being derivatives by point index.
+        * Requires: numpy, scipy
+
+        Args:
+            volumes (array) :   volumes of titrant added, of shape (N,) or (B, N)
+            pH (array) :        measured pH, of shape (N,) or (B, N)
+            window (int) :      odd number of points of the sliding window (default 11, at most N)
+            order (int) :       order of the smoothing polynomial (default 3)
+
+        Returns:
+            volumes (array) :   volumes of titrant added, of shape (B, N)
+            pH_smooth (array) : smoothed pH, of shape (B, N)
+            d_pH (array) :      first derivative dpH/dV, of shape (B, N)
+            d2_pH (array) :     second derivative d²pH/dV², of shape (B, N)'''
+
+    pH = np.atleast_2d(np.asarray(pH, dtype=float))
+    volumes = np.broadcast_to(np.asarray(volumes, dtype=float), pH.shape)
+    window = min(window, pH.shape[1] - 1 + pH.shape[1] % 2)
+    order = min(order, window - 1)
+
+    pH_smooth = savgol_filter(pH, window, order, axis=-1)
+    d_pH_index = savgol_filter(pH, window, order, deriv=1, axis=-1)
+    d2_pH_index = savgol_filter(pH, window, order, deriv=2, axis=-1)
+    d_V_index = savgol_filter(volumes, window, order, deriv=1, axis=-1)
+    d2_V_index = savgol_filter(volumes, window, order, deriv=2, axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d_pH = d_pH_index / d_V_index
+        d2_pH = (d2_pH_index * d_V_index - d_pH_index * d2_V_index) / d_V_index**3
+    return volumes, pH_smooth, d_pH, d2_pH
+
+def InterpolateIndex(values, positions):
+    '''Interpolates linearly the rows of an array at fractional point indices.
+
+        Args:
+            values (array) :    values, of shape (B, N)
+            positions (array) : fractional indices in [0, N - 1], of shape (B, K) (NaN for none)
+
+        Returns:
+            values (array) :    interpolated values, of shape (B, K) (NaN where the index is NaN)'''
+
+    missing = np.isnan(positions)
+    positions = np.where(missing, 0, positions)
+    i0 = np.clip(np.floor(positions).astype(int), 0, values.shape[1] - 2)
+    fraction = positions - i0
+    interpolated = np.take_along_axis(values, i0, 1) * (1 - fraction) + np.take_along_axis(values, i0 + 1, 1) * fraction
+    return np.where(missing, np.nan, interpolated)
+
+def EquivalencePoints(volumes, pH, n_points=1, window=11, order=3):
+    '''Locates the equivalence points of measured titration curves as their steepest inflections.
+
+        The n_points highest local maxima of |dpH/dV| are kept for each curve (-> SmoothDerivatives).
+        Each is refined below the spacing of the measurements to the zero of d²pH/dV², interpolated
+        linearly between the two points framing its change of sign next to the maximum, or to the
+        vertex of the parabola through |dpH/dV| around the maximum if there is no change of sign.
+        * Requires: SmoothDerivatives, InterpolateIndex, numpy
+
+        Args:
+            volumes (array) :   volumes of titrant added, of shape (N,) or (B, N)
+            pH (array) :        measured pH, of shape (N,) or (B, N)
+            n_points (int) :    number of equivalence points to locate, e.g. 2 for a diprotic acid (default 1)
+            window (int) :      odd number of points of the smoothing window (default 11)
+            order (int) :       order of the smoothing polynomial (default 3)
+
+        Returns:
+            Veq (array) :       volumes at the equivalence points, in increasing order, of shape (B, n_points)
+                                (NaN when a curve has fewer inflections)
+            pH_eq (array) :     smoothed pH at the equivalence points, of shape (B, n_points)'''
+
+    volumes, pH_smooth, d_pH, d2_pH = SmoothDerivatives(volumes, pH, window, order)
+    slope = np.abs(np.nan_to_num(d_pH))
+
+    '''Highest local maxima of the slope, away from the ends of the curves'''
+    score = np.full(slope.shape, -np.inf)
+    maxima = (slope[:, 1:-1] >= slope[:, :-2]) & (slope[:, 1:-1] > slope[:, 2:])
+    score[:, 1:-1] = np.where(maxima, slope[:, 1:-1], -np.inf)
+    peaks = np.argsort(-score, axis=1, kind='stable')[:, :n_points]
+    found = np.isfinite(np.take_along_axis(score, peaks, 1))
+    peaks = np.where(found, peaks, slope.shape[1])
+    order_peaks = np.argsort(peaks, axis=1)
+    peaks = np.take_along_axis(peaks, order_peaks, 1)
+    found = np.take_along_axis(found, order_peaks, 1)
+    peaks = np.clip(peaks, 1, slope.shape[1] - 2)
+
+    '''Sub-sample position of each inflection'''
+    d2_before, d2_peak, d2_after = (np.take_along_axis(d2_pH, peaks + shift, 1) for shift in (-1, 0, 1))
+    slope_before, slope_peak, slope_after = (np.take_along_axis(slope, peaks + shift, 1) for shift in (-1, 0, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        left = (d2_before * d2_peak <= 0) & (d2_before != d2_peak)
+        right = (d2_peak * d2_after <= 0) & (d2_peak != d2_after)
+        position_left = peaks - 1 + d2_before / (d2_before - d2_peak)
+        position_right = peaks + d2_peak / (d2_peak - d2_after)
+        curvature = slope_before - 2 * slope_peak + slope_after
+        vertex = peaks + np.where(curvature < 0, 0.5 * (slope_before - slope_after) / curvature, 0)
+    use_left = left & (~right | (slope_before >= slope_after))
+    positions = np.where(use_left, position_left, np.where(right, position_right, vertex))
+    positions = np.where(found, positions, np.nan)
+
+    return InterpolateIndex(volumes, positions), InterpolateIndex(pH_smooth, positions)
+
+def GranEquivalence(volumes, pH, V0, Veq, titrant="base", weak=False, region=(0.2, 0.9)):
+    '''Evaluates the equivalence volumes of titration curves by Gran plots.
+
+        Before the equivalence point, the Gran function G is a straight line of the volume V of
+        titrant which vanishes at the equivalence volume:
+            strong acid titrated by a base:     (V0 + V)⋅10^(-pH) = Ctit⋅(Veq - V)
+            weak acid titrated by a base:       V⋅10^(-pH) = Ka⋅(Veq - V)
+            strong base titrated by an acid:    (V0 + V)⋅10^(pH-14) = Ctit⋅(Veq - V)
+            weak base titrated by an acid:      V⋅10^(pH-14) = Kb⋅(Veq - V)
+        The line is fitted by least squares on the points with V between region[0]⋅Veq and
+        region[1]⋅Veq of an estimated equivalence volume, for all the curves at once.
+        * Requires: linear_fit, numpy
+
+        Args:
+            volumes (array) :   volumes of titrant added, of shape (N,) or (B, N)
+            pH (array) :        measured pH, of shape (N,) or (B, N)
+            V0 (float) :        initial volume of the titrated solution (or one per curve)
+            Veq (array) :       estimated equivalence volumes, of shape (B,) (e.g. -> EquivalencePoints)
+            titrant (str) :     "base" (titrated acid) or "acid" (titrated base) (default "base")
+            weak (bool) :       whether the titrated acid / base is weak (default False, or one per curve)
+            region (tuple) :    bounds of the fitted points, as fractions of Veq (default (0.2, 0.9))
+
+        Returns:
+            Veq (array) :       equivalence volumes, of shape (B,)
+            K (array) :         opposite of the slopes: Ctit for a strong, Ka / Kb for a weak acid / base
+
+        Raises:
+            ValueError :    invalid titrant'''
+
+    if titrant not in ("base", "acid"):
+        raise ValueError(f"Invalid titrant '{titrant}'. Choose between base and acid.")
+    pH = np.atleast_2d(np.asarray(pH, dtype=float))
+    volumes = np.broadcast_to(np.asarray(volumes, dtype=float), pH.shape)
+    V0 = np.broadcast_to(np.asarray(V0, dtype=float), pH.shape[:1])[:, None]
+    Veq = np.broadcast_to(np.asarray(Veq, dtype=float), pH.shape[:1])[:, None]
+    weak = np.broadcast_to(np.asarray(weak, dtype=bool), pH.shape[:1])[:, None]
+
+    concentration = 10**(-pH) if titrant == "base" else 10**(pH - 14) # [H3O+] or [OH-]
+    gran = np.where(weak, volumes, V0 + volumes) * concentration
+    weights = ((volumes >= region[0] * Veq) & (volumes <= region[1] * Veq)).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes, intercepts = linear_fit(volumes, gran, weights)
+        return -intercepts / slopes, -slopes
+
+def FitpKa(volumes, pH, Va, Ctit, Veq, titrant="base", region=(0.1, 0.9), max_iter=100):
+    '''Fits the pKa and equivalence volume of titration curves by least squares against the buffer model.
+
+        Between region[0]⋅Veq and region[1]⋅Veq, the pH of a weak acid titrated by a base follows
+        pKa + log10(ξ / (1 - ξ)) and the one of a weak base titrated by an acid pKa - log10(ξ / (1 - ξ))
+        (-> pH3), ξ = V/Veq being the degree of advancement. The pKa and Veq of all the curves are
+        fitted as one batch of Levenberg–Marquardt problems. The same points are compared to the
+        model of a strong acid (-pH1) or base (14 + pH1) at the given Veq, and the pH at the
+        equivalence point is predicted from the fitted pKa (-> pH4), as the titration curves do.
+        * Requires: levenberg_marquardt, pH1, pH3, pH4, numpy
+
+        Args:
+            volumes (array) :   volumes of titrant added, of shape (N,) or (B, N)
+            pH (array) :        measured pH, of shape (N,) or (B, N)
+            Va (float) :        initial volume of the titrated solution (or one per curve)
+            Ctit (float) :      concentration of the titrant solution (or one per curve)
+            Veq (array) :       estimated equivalence volumes, of shape (B,) (e.g. -> EquivalencePoints)
+            titrant (str) :     "base" (titrated acid) or "acid" (titrated base) (default "base")
+            region (tuple) :    bounds of the fitted points, as fractions of Veq (default (0.1, 0.9))
+            max_iter (int) :    largest number of iterations (default 100)
+
+        Returns:
+            pKa (array) :           fitted pKa (of the conjugate acid for a titrated base), of shape (B,)
+            Veq (array) :           fitted equivalence volumes, of shape (B,)
+            pH_eq (array) :         pH at the equivalence point predicted from the pKa, of shape (B,)
+            ssr_weak (array) :      residual sums of squares of the weak model, of shape (B,)
+            ssr_strong (array) :    residual sums of squares of the strong model, of shape (B,)
+
+        Raises:
+            ValueError :    invalid titrant'''
+
+    if titrant not in ("base", "acid"):
+        raise ValueError(f"Invalid titrant '{titrant}'. Choose between base and acid.")
+    sign = 1 if titrant == "base" else -1
+    pH = np.atleast_2d(np.asarray(pH, dtype=float))
+    volumes = np.broadcast_to(np.asarray(volumes, dtype=float), pH.shape)
+    Va = np.broadcast_to(np.asarray(Va, dtype=float), pH.shape[:1])
+    Ctit = np.broadcast_to(np.asarray(Ctit, dtype=float), pH.shape[:1])
+    Veq = np.broadcast_to(np.asarray(Veq, dtype=float), pH.shape[:1])
+
+    '''The points out of the region are marked by a NaN volume and do not weigh in the fit'''
+    fitted = (volumes >= region[0] * Veq[:, None]) & (volumes <= region[1] * Veq[:, None])
+    x = np.where(fitted, volumes, np.nan)
+    y = np.where(fitted, pH, 0)
+
+    def model(x, p):
+        valid = ~np.isnan(x)
+        pKa, Veq = p[:, :1], p[:, 1:]
+        V = np.where(valid, x, 0.5 * Veq)
+        values = np.where(valid, pKa + sign * pH3(V / Veq), 0)
+        '''d/dVeq of log10(V / (Veq - V)) = -1 / ((Veq - V)⋅ln(10))'''
+        d_Veq = np.where(valid, -sign / ((Veq - V) * np.log(10)), 0)
+        return values, np.stack([valid.astype(float), d_Veq], axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pKa0 = np.nanmedian(np.where(fitted, pH - sign * pH3(volumes / Veq[:, None]), np.nan), axis=1)
+        p, ssr_weak = levenberg_marquardt(model, x, y, np.stack([pKa0, Veq], axis=1), max_iter=max_iter)[:2]
+        pKa, Veq_fit = p[:, 0], p[:, 1]
+
+        strong = -pH1(Va[:, None], Ctit[:, None], Veq[:, None], volumes / Veq[:, None])
+        strong = strong if titrant == "base" else 14 - strong
+        ssr_strong = np.where(fitted, (pH - strong)**2, 0).sum(axis=1)
+
+        if titrant == "base":
+            pH_eq = 7 + 1/2 * pKa + pH4(Va, Ctit, Veq_fit, 1)
+        else:
+            pH_eq = 1/2 * pKa - pH4(Va, Ctit, Veq_fit, 1)
+    return pKa, Veq_fit, pH_eq, ssr_weak, ssr_strong
+
+class TitrationAnalysis:
+    '''Equivalence points and pKa found in measured titration curves (-> AnalyseTitrations).
+
+        Attributes:
+            Veq (array) :           volumes at the equivalence points (steepest inflections), of shape (B, n_points)
+            pH_eq (array) :         smoothed pH at the equivalence points, of shape (B, n_points)
+            Veq_gran (array) :      1st equivalence volume given by the Gran plot, of shape (B,)
+            K_gran (array) :        opposite of the slope of the Gran plot, of shape (B,)
+            weak (array) :          whether the buffer model fits better than the strong model, of shape (B,)
+            pKa (array) :           fitted pKa, of shape (B,) (NaN where the strong model fits better)
+            Veq_fit (array) :       1st equivalence volume fitted with the pKa, of shape (B,) (NaN where the strong model fits better)
+            pH_eq_model (array) :   pH at the 1st equivalence point predicted by the model (7 for the strong model), of shape (B,)'''
+
+    def __init__(self, Veq, pH_eq, Veq_gran, K_gran, weak, pKa, Veq_fit, pH_eq_model):
+        self.Veq = Veq
+        self.pH_eq = pH_eq
+        self.Veq_gran = Veq_gran
+        self.K_gran = K_gran
+        self.weak = weak
+        self.pKa = pKa
+        self.Veq_fit = Veq_fit
+        self.pH_eq_model = pH_eq_model
+
+def AnalyseTitrations(l_volumes, l_pH, Va, Ctit, titrant="base", n_points=1, window=11, order=3):
+    '''Finds the equivalence points of many measured titration curves and fits their pKa.
+
+        The curves of the same length are analysed as one batch: their equivalence points are
+        located by their derivatives (-> EquivalencePoints), the pKa and first equivalence volume
+        are fitted against the buffer model, which is compared to the strong model (-> FitpKa),
+        and the first equivalence volume is checked by a Gran plot of the chosen model
+        (-> GranEquivalence). For a titrated base, the pKa is the one of its conjugate acid.
+        * Requires: EquivalencePoints, FitpKa, GranEquivalence, TitrationAnalysis, numpy
+
+        Args:
+            l_volumes (list) :  volumes of titrant added of each curve
+            l_pH (list) :       measured pH of each curve
+            Va (float) :        initial volume of the titrated solution (or one per curve)
+            Ctit (float) :      concentration of the titrant solution (or one per curve)
+            titrant (str) :     "base" (titrated acids) or "acid" (titrated bases) (default "base")
+            n_points (int) :    number of equivalence points to locate (default 1)
+            window (int) :      odd number of points of the smoothing window (default 11)
+            order (int) :       order of the smoothing polynomial (default 3)
+
+        Returns:
+            analysis (TitrationAnalysis) :  results of all the curves, in order
+
+        Raises:
+            ValueError :    invalid titrant'''
+
+    if titrant not in ("base", "acid"):
+        raise ValueError(f"Invalid titrant '{titrant}'. Choose between base and acid.")
+    l_volumes = [np.asarray(volumes, dtype=float) for volumes in l_volumes]
+    l_pH = [np.asarray(pH, dtype=float) for pH in l_pH]
+    Va = np.broadcast_to(np.asarray(Va, dtype=float), (len(l_pH),))
+    Ctit = np.broadcast_to(np.asarray(Ctit, dtype=float), (len(l_pH),))
+    d_groups = {}
+    for i, pH in enumerate(l_pH):
+        d_groups.setdefault(pH.size, []).append(i)
+
+    Veq = np.full((len(l_pH), n_points), np.nan)
+    pH_eq = np.full((len(l_pH), n_points), np.nan)
+    l_results = [np.full(len(l_pH), np.nan) for _ in range(6)]
+    for l_indices in d_groups.values():
+        volumes = np.stack([l_volumes[i] for i in l_indices])
+        pH = np.stack([l_pH[i] for i in l_indices])
+        Veq[l_indices], pH_eq[l_indices] = EquivalencePoints(volumes, pH, n_points, window, order)
+        pKa, Veq_fit, pH_eq_model, ssr_weak, ssr_strong = FitpKa(volumes, pH, Va[l_indices], Ctit[l_indices], Veq[l_indices, 0], titrant)
+        weak = ~(ssr_strong <= ssr_weak)
+        Veq_gran, K_gran = GranEquivalence(volumes, pH, Va[l_indices], Veq[l_indices, 0], titrant, weak)
+        for l_values, values in zip(l_results, (Veq_gran, K_gran, weak, np.where(weak, pKa, np.nan), np.where(weak, Veq_fit, np.nan), np.where(weak, pH_eq_model, 7))):
+            l_values[l_indices] = values
+
+    Veq_gran, K_gran, weak, pKa, Veq_fit, pH_eq_model = l_results
+    return TitrationAnalysis(Veq, pH_eq, Veq_gran, K_gran, weak.astype(bool), pKa, Veq_fit, pH_eq_model)
@@ -55,7 +55,7 @@ def HConcentrationUI():
         try:
             pKa = float(input(f"\033[1m" + "\nEnter the first pKa [-] of the solute: " + "\033[0m"))
             break
-        except:
+        except ValueError:
             print(f"\033[1m" + "\nEnter the a valid pKa [-]! " + "\033[0m")
     H = HConcentration(C, pKa)
     pH = -math.log10(H)
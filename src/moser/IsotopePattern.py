@@ -0,0 +1,187 @@
+from Decompose import ParseFormula
+from PeriodicTable import d_isotopes, electron_mass
+from functools import lru_cache
+import numpy as np
+
+def ElementIsotopes(symbol):
+    '''Returns the tabulated isotopes of an element (-> PeriodicTable).
+
+            Only the elements of d_isotopes are covered: H to Zn except Sc, then As, Se,
+            Br, Ag, I, Cs, Au, Pb and U.
+
+            Args:
+                symbol (str) :  element symbol
+
+            Returns:
+                d_element (dict) :  mass number → (isotopic mass [gmol⁻¹], natural abundance)
+
+            Raises:
+                ValueError : the isotopes of the element are not tabulated'''
+
+    if symbol not in d_isotopes:
+        raise ValueError(f"The isotopes of '{symbol}' are not tabulated (-> PeriodicTable.d_isotopes, which covers {', '.join(d_isotopes)}).")
+    return d_isotopes[symbol]
+
+@lru_cache(maxsize=None)
+def IsotopeDistribution(element):
+    '''Returns the isotope distribution of an element on a grid of nominal masses.
+
+            The distribution starts at the lightest isotope's mass number and holds, for each
+            nominal mass, the abundance p and the abundance-weighted mass p⋅m of the isotope.
+            A labelled isotope ('13C', '2H') is a single peak of abundance 1.
+            * Requires: ElementIsotopes, numpy
+
+            Args:
+                element (str) : element symbol, possibly preceded by a mass number
+
+            Returns:
+                start (int) :           nominal mass of the first entry
+                abundances (array) :    abundance of each nominal mass
+                weighted (array) :      abundance times isotopic mass of each nominal mass
+
+            Raises:
+                ValueError : the isotopes of the element are not tabulated'''
+
+    symbol = element.lstrip("0123456789")
+    d_element = ElementIsotopes(symbol)
+    if symbol != element:
+        number = int(element[:-len(symbol)])
+        mass = d_element[number][0]
+        return number, np.array([1.0]), np.array([mass])
+
+    d_element = {number: values for number, values in d_element.items() if values[1] > 0}
+    start = min(d_element)
+    abundances = np.zeros(max(d_element) - start + 1)
+    weighted = np.zeros_like(abundances)
+    for number, (mass, abundance) in d_element.items():
+        abundances[number - start] = abundance
+        weighted[number - start] = abundance*mass
+    abundances.flags.writeable = False
+    weighted.flags.writeable = False
+    return start, abundances, weighted
+
+def ConvolvePatterns(pattern1, pattern2, cutoff):
+    '''Combines two isotope patterns into the pattern of their union.
+
+            The abundances are convolved, as well as the abundance-weighted masses
+            (p⋅m of the sum = p1⋅m1 * p2 + p1 * p2⋅m2), so that each nominal mass keeps its exact
+            average mass. Entries weaker than cutoff times the strongest one are trimmed
+            from both ends.
+            * Requires: numpy
+
+            Args:
+                pattern1 (tuple) :  start, abundances and weighted masses of the first pattern
+                pattern2 (tuple) :  start, abundances and weighted masses of the second pattern
+                cutoff (float) :    relative abundance below which the tails are pruned
+
+            Returns:
+                pattern (tuple) :   start, abundances and weighted masses of the combined pattern'''
+
+    start1, abundances1, weighted1 = pattern1
+    start2, abundances2, weighted2 = pattern2
+    abundances = np.convolve(abundances1, abundances2)
+    weighted = np.convolve(weighted1, abundances2) + np.convolve(abundances1, weighted2)
+
+    l_kept = np.flatnonzero(abundances >= cutoff*abundances.max())
+    first, last = l_kept[0], l_kept[-1] + 1
+    return start1 + start2 + first, abundances[first:last], weighted[first:last]
+
+def ElementPattern(element, occurrence, cutoff):
+    '''Evaluates the isotope pattern of several atoms of one element by binary powering.
+
+            The pattern of n atoms is built from the squares of the single-atom pattern, so that
+            only about 2⋅log2(n) pruned convolutions are needed. No atom ('C0H4') gives the unit
+            pattern, a single peak of abundance 1 and mass 0.
+            * Requires: IsotopeDistribution, ConvolvePatterns
+
+            Args:
+                element (str) :     element symbol, possibly preceded by a mass number
+                occurrence (int) :  number of atoms
+                cutoff (float) :    relative abundance below which the tails are pruned
+
+            Returns:
+                pattern (tuple) :   start, abundances and weighted masses of the atoms'''
+
+    power = IsotopeDistribution(element)
+    pattern = None
+    while occurrence > 0:
+        if occurrence & 1:
+            pattern = power if pattern is None else ConvolvePatterns(pattern, power, cutoff)
+        occurrence = occurrence >> 1
+        if occurrence:
+            power = ConvolvePatterns(power, power, cutoff)
+    if pattern is None:
+        return 0, np.array([1.0]), np.array([0.0])
+    return pattern
+
+def IsotopePattern(molecule, cutoff=1e-6):
+    '''Calculates the isotope pattern of a molecule, one peak per nominal mass.
+
+            The isotope distributions of the elements (-> PeriodicTable) are raised to their
+            occurrences and multiplied together as polynomials in the nominal mass, pruning the
+            peaks weaker than cutoff times the strongest one after each product. The mass of a
+            peak is the abundance-weighted mean of the isotopic compositions it gathers; the mass
+            of the electrons lost or gained by an ion is taken into account. The isotopes of
+            38 elements only are tabulated (-> ElementIsotopes function): Sn, Pt, Pd, Hg, Mo,
+            Ga, Ge, Xe and the other elements missing from d_isotopes raise a ValueError.
+            * Requires: ParseFormula, ElementPattern, ConvolvePatterns, numpy
+
+            Args:
+                molecule (str) :    molecule, as accepted by Decompose
+                cutoff (float) :    relative abundance below which peaks are dropped (default 1e-6)
+
+            Returns:
+                masses (array) :        mass of each peak [gmol⁻¹]
+                abundances (array) :    abundance of each peak (fraction of all the molecules)
+
+            Raises:
+                FormulaError : invalid molecule
+                ValueError :   the isotopes of one of the elements are not tabulated'''
+
+    pattern = (0, np.array([1.0]), np.array([0.0]))
+    charge = 0
+    for element, occurrence in ParseFormula(molecule):
+        if element == "charge":
+            charge = occurrence
+        else:
+            pattern = ConvolvePatterns(pattern, ElementPattern(element, occurrence, cutoff), cutoff)
+
+    start, abundances, weighted = pattern
+    l_peaks = abundances >= cutoff*abundances.max()
+    masses = weighted[l_peaks]/abundances[l_peaks] - charge*electron_mass
+    return masses, abundances[l_peaks]
+
+def MonoisotopicMass(molecule):
+    '''Calculates the monoisotopic mass of a molecule.
+
+            Each atom weighs the mass of its element's most abundant isotope (12C, 1H, 35Cl, ...);
+            labelled isotopes ('[13C]', 'D') weigh their own mass. The mass of the electrons lost or
+            gained by an ion is taken into account. The isotopes of 38 elements only are tabulated
+            (-> ElementIsotopes function): Sn, Pt, Pd, Hg, Mo, Ga, Ge, Xe and the other elements
+            missing from d_isotopes raise a ValueError.
+            * Requires: ParseFormula, ElementIsotopes
+
+            Args:
+                molecule (str) : molecule, as accepted by Decompose
+
+            Returns:
+                M (float) :  molecule's monoisotopic mass [gmol⁻¹]
+
+            Raises:
+                FormulaError : invalid molecule
+                ValueError :   the isotopes of one of the elements are not tabulated'''
+
+    monoisotopic_mass = 0
+    for element, occurrence in ParseFormula(molecule):
+        if element == "charge":
+            monoisotopic_mass = monoisotopic_mass - occurrence*electron_mass
+            continue
+        symbol = element.lstrip("0123456789")
+        d_element = ElementIsotopes(symbol)
+        if symbol != element:
+            mass = d_element[int(element[:-len(symbol)])][0]
+        else:
+            mass = max(d_element.values(), key=lambda isotope: isotope[1])[0]
+        monoisotopic_mass = monoisotopic_mass + occurrence*mass
+
+    return monoisotopic_mass
@@ -0,0 +1,171 @@
+"""Atomic masses [gmol⁻¹] of the elements, ordered by atomic number, and molar mass of the electron."""
+
+import numpy as np
+
+electron_mass = 0.000548579909
+
+d_atomic_masses = {'H' : 1.0080,
+                   'He' : 4.00260,
+                   'Li': 7.0,
+                   'Be': 9.012183,
+                   'B': 10.81,
+                   'C': 12.011,
+                   'N': 14.007,
+                   'O': 15.999,
+                   'F': 18.99840316,
+                   'Ne': 20.180,
+                   'Na': 22.9897693,
+                   'Mg': 24.305,
+                   'Al': 26.981538,
+                   'Si': 28.085,
+                   'P': 30.97376200,
+                   'S': 32.07,
+                   'Cl': 35.45,
+                   'Ar': 39.9,
+                   'K': 39.0983,
+                   'Ca': 40.08,
+                   'Sc': 44.95591,
+                   'Ti': 47.867,
+                   'V': 50.9415,
+                   'Cr': 51.996,
+                   'Mn': 54.93804,
+                   'Fe': 55.84,
+                   'Co': 58.93319,
+                   'Ni': 58.693,
+                   'Cu': 63.55,
+                   'Zn': 65.4,
+                   'Ga': 69.723,
+                   'Ge': 72.63,
+                   'As': 74.92159,
+                   'Se': 78.97,
+                   'Br': 79.90,
+                   'Kr': 83.80,
+                   'Rb': 85.468,
+                   'Sr': 87.62,
+                   'Y': 88.90584,
+                   'Zr': 91.22,
+                   'Nb': 92.90637,
+                   'Mo': 95.95,
+                   'Tc': 96.90636,
+                   'Ru': 101.1,
+                   'Rh': 102.9055,
+                   'Pd': 106.42,
+                   'Ag': 107.868,
+                   'Cd': 112.41,
+                   'In': 114.818,
+                   'Sn': 118.71,
+                   'Sb': 121.760,
+                   'Te': 127.6,
+                   'I': 126.9045,
+                   'Xe': 131.29,
+                   'Cs': 132.9054520,
+                   'Ba': 137.33,
+                   'La': 138.9055,
+                   'Ce': 140.116,
+                   'Pr': 140.90766,
+                   'Nd': 144.24,
+                   'Pm': 144.91276,
+                   'Sm': 150.4,
+                   'Eu': 151.964,
+                   'Gd': 157.2,
+                   'Tb': 158.92535,
+                   'Dy': 162.500,
+                   'Ho': 164.93033,
+                   'Er': 167.26,
+                   'Tm': 168.93422,
+                   'Yb': 173.05,
+                   'Lu': 174.9668,
+                   'Hf': 178.49,
+                   'Ta': 180.9479,
+                   'W': 183.84,
+                   'Re': 186.207,
+                   'Os': 190.2,
+                   'Ir': 192.22,
+                   'Pt': 195.08,
+                   'Au': 196.96657,
+                   'Hg': 200.59,
+                   'Tl': 204.383,
+                   'Pb': 207,
+                   'Bi': 208.98040,
+                   'Po': 208.98243,
+                   'At': 209.98715,
+                   'Rn': 222.01758,
+                   'Fr': 223.01973,
+                   'Ra': 226.02541,
+                   'Ac': 227.02775,
+                   'Th': 232.038,
+                   'Pa': 231.03588,
+                   'U': 238.0289,
+                   'Np': 237.048172,
+                   'Pu': 244.06420,
+                   'Am': 243.061380,
+                   'Cm': 247.07035,
+                   'Bk': 247.07031,
+                   'Cf': 251.07959,
+                   'Es': 252.0830,
+                   'Fm': 257.09511,
+                   'Md': 258.09843,
+                   'No': 259.10100,
+                   'Lr': 266.120,
+                   'Rf': 267.122,
+                   'Db': 268.126,
+                   'Sg': 269.128,
+                   'Bh': 270.133,
+                   'Hs': 269.1336,
+                   'Mt': 277.154,
+                   'Ds': 282.166,
+                   'Rg': 282.169,
+                   'Cn': 286.179,
+                   'Nh': 286.182,
+                   'Fl': 290.192,
+                   'Mc': 290.196,
+                   'Lv': 293.205,
+                   'Ts': 294.211,
+                   'Og': 295.216}
+
+l_symbols = list(d_atomic_masses)
+d_atomic_numbers = {symbol: Z for Z, symbol in enumerate(l_symbols, start=1)}
+atomic_masses = np.array(list(d_atomic_masses.values()))
+
+"""Isotopes of the elements: mass number → (isotopic mass [gmol⁻¹], natural abundance).
+Isotopes used as labels only (e.g. ³H, ¹⁴C) have a natural abundance of 0.
+Only 38 elements are tabulated: H to Zn except Sc, then As, Se, Br, Ag, I, Cs, Au, Pb and U."""
+
+d_isotopes = {'H': {1: (1.00782503223, 0.999885), 2: (2.01410177812, 0.000115), 3: (3.0160492779, 0.0)},
+              'He': {3: (3.0160293201, 0.00000134), 4: (4.00260325413, 0.99999866)},
+              'Li': {6: (6.0151228874, 0.0759), 7: (7.0160034366, 0.9241)},
+              'Be': {9: (9.012183065, 1.0)},
+              'B': {10: (10.01293695, 0.199), 11: (11.00930536, 0.801)},
+              'C': {12: (12.0, 0.9893), 13: (13.00335483507, 0.0107), 14: (14.0032419884, 0.0)},
+              'N': {14: (14.00307400443, 0.99636), 15: (15.00010889888, 0.00364)},
+              'O': {16: (15.99491461957, 0.99757), 17: (16.9991317565, 0.00038), 18: (17.99915961286, 0.00205)},
+              'F': {19: (18.99840316273, 1.0)},
+              'Ne': {20: (19.9924401762, 0.9048), 21: (20.993846685, 0.0027), 22: (21.991385114, 0.0925)},
+              'Na': {23: (22.989769282, 1.0)},
+              'Mg': {24: (23.985041697, 0.7899), 25: (24.985836976, 0.1), 26: (25.982592968, 0.1101)},
+              'Al': {27: (26.98153853, 1.0)},
+              'Si': {28: (27.97692653465, 0.92223), 29: (28.9764946649, 0.04685), 30: (29.973770136, 0.03092)},
+              'P': {31: (30.97376199842, 1.0)},
+              'S': {32: (31.9720711744, 0.9499), 33: (32.9714589098, 0.0075), 34: (33.967867004, 0.0425), 36: (35.96708071, 0.0001)},
+              'Cl': {35: (34.968852682, 0.7576), 37: (36.965902602, 0.2424)},
+              'Ar': {36: (35.967545105, 0.003336), 38: (37.96273211, 0.000629), 40: (39.9623831237, 0.996035)},
+              'K': {39: (38.9637064864, 0.932581), 40: (39.963998166, 0.000117), 41: (40.9618252579, 0.067302)},
+              'Ca': {40: (39.962590863, 0.96941), 42: (41.95861783, 0.00647), 43: (42.95876644, 0.00135), 44: (43.95548156, 0.02086), 46: (45.953689, 0.00004), 48: (47.95252276, 0.00187)},
+              'Ti': {46: (45.95262772, 0.0825), 47: (46.95175879, 0.0744), 48: (47.94794198, 0.7372), 49: (48.94786568, 0.0541), 50: (49.94478689, 0.0518)},
+              'V': {50: (49.94715601, 0.0025), 51: (50.94395704, 0.9975)},
+              'Cr': {50: (49.94604183, 0.04345), 52: (51.94050623, 0.83789), 53: (52.94064815, 0.09501), 54: (53.93887916, 0.02365)},
+              'Mn': {55: (54.93804391, 1.0)},
+              'Fe': {54: (53.93960899, 0.05845), 56: (55.93493633, 0.91754), 57: (56.93539284, 0.02119), 58: (57.93327443, 0.00282)},
+              'Co': {59: (58.93319429, 1.0)},
+              'Ni': {58: (57.93534241, 0.68077), 60: (59.93078588, 0.26223), 61: (60.93105557, 0.011399), 62: (61.92834537, 0.036346), 64: (63.92796682, 0.009255)},
+              'Cu': {63: (62.92959772, 0.6915), 65: (64.9277897, 0.3085)},
+              'Zn': {64: (63.92914201, 0.4917), 66: (65.92603381, 0.2773), 67: (66.92712775, 0.0404), 68: (67.92484455, 0.1845), 70: (69.9253192, 0.0061)},
+              'As': {75: (74.92159457, 1.0)},
+              'Se': {74: (73.922475934, 0.0089), 76: (75.919213704, 0.0937), 77: (76.919914154, 0.0763), 78: (77.91730928, 0.2377), 80: (79.9165218, 0.4961), 82: (81.9166995, 0.0873)},
+              'Br': {79: (78.9183376, 0.5069), 81: (80.9162897, 0.4931)},
+              'Ag': {107: (106.9050916, 0.51839), 109: (108.9047553, 0.48161)},
+              'I': {127: (126.9044719, 1.0)},
+              'Cs': {133: (132.905451961, 1.0)},
+              'Au': {197: (196.96656879, 1.0)},
+              'Pb': {204: (203.973044, 0.014), 206: (205.9744657, 0.241), 207: (206.9758973, 0.221), 208: (207.9766525, 0.524)},
+              'U': {234: (234.0409523, 0.000054), 235: (235.0439301, 0.007204), 238: (238.0507884, 0.992742)}}
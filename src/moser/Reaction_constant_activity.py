@@ -1,3 +1,8 @@
+import numpy as np
+
+UNIT_ACTIVITY_TYPES = ('solid', 'liquid', 'solvent')
+ACTIVITY_TYPES = UNIT_ACTIVITY_TYPES + ('solute', 'gas', 'other')
+
 def lign():
     """
     Print a separating line for better readability in the console output.
@@ -105,6 +110,38 @@ def calculate_reaction_quotient(reactant_activities, reactant_coefficients, prod
     quotient = product_term / reactant_term
     return quotient
 
+def calculate_activity(compound_types, values, activity_coefficients=1):
+    """
+    Calculate the activities of compounds from their nature and concentration or pressure.
+
+    The conventions of the interactive routines are used:
+    - Solids, liquids, and solvents have an activity of 1.
+    - Solutes' activity is based on their concentration (in mol/L).
+    - Gases' activity is based on their pressure (in bar).
+    - Other compounds' activity is their concentration times their activity coefficient (γ).
+
+    Args:
+        compound_types (str or list of str): Nature of each compound (solid/liquid/solvent/solute/gas/other).
+        values (float or array-like): Concentration or pressure of each compound. The last axis
+            runs over the compounds, so many compositions can be evaluated at once.
+        activity_coefficients (float or array-like, optional): Activity coefficients (γ), broadcast
+            against `values`. Defaults to 1.
+
+    Returns:
+        numpy.ndarray: The activities, with the shape of `values`.
+
+    Raises:
+        ValueError: If a compound type is not one of the offered natures.
+    """
+    compound_types = np.atleast_1d(np.asarray(compound_types, dtype=str))
+    for compound_type in compound_types:
+        if compound_type not in ACTIVITY_TYPES:
+            raise ValueError(f"Invalid compound type '{compound_type}'. Choose between {', '.join(ACTIVITY_TYPES)}.")
+
+    values = np.asarray(values, dtype=float)
+    unit_activity = np.isin(compound_types, UNIT_ACTIVITY_TYPES)
+    return np.where(unit_activity, 1.0, np.asarray(activity_coefficients, dtype=float) * values)
+
 def main_activity():
     """
     Main function to interact with the user for calculating the reaction quotient using activities.
@@ -0,0 +1,305 @@
+import numpy as np
+
+from Reaction_constant_activity import calculate_activity
+from Reaction_constant_activity import UNIT_ACTIVITY_TYPES
+
+def prepare_equilibrium(K, stoichiometry, initial, compound_types, activity_coefficients):
+    """
+    Broadcast the data of an equilibrium problem to a common batch size.
+
+    Args:
+        K (float or array-like): Equilibrium constant(s), one per reaction and initial condition.
+        stoichiometry (array-like): Stoichiometric numbers of shape (species,) or (species, reactions),
+            negative for reactants and positive for products.
+        initial (array-like): Initial concentrations (mol/L) or pressures (bar) of shape (species,)
+            or (conditions, species).
+        compound_types (list of str or None): Nature of each compound (see `calculate_activity`).
+            Defaults to 'solute' for every compound.
+        activity_coefficients (float or array-like): Activity coefficients (γ).
+
+    Returns:
+        tuple: The stoichiometric matrix (species, reactions), the initial values (conditions, species),
+               ln K (conditions, reactions), the compound types, the mask of compounds whose activity
+               is not 1 and the activity coefficients (conditions, species).
+    """
+    N = np.asarray(stoichiometry, dtype=float)
+    if N.ndim == 1:
+        N = N[:, None]
+    num_species, num_reactions = N.shape
+
+    c0 = np.atleast_2d(np.asarray(initial, dtype=float))
+    if c0.shape[1] != num_species:
+        raise ValueError("The initial values and the stoichiometry must describe the same number of compounds.")
+
+    with np.errstate(divide='ignore'):
+        lnK = np.log(np.asarray(K, dtype=float))
+    lnK = lnK.reshape(-1, num_reactions) if lnK.ndim else np.full((1, num_reactions), lnK)
+
+    num_conditions = max(c0.shape[0], lnK.shape[0])
+    c0 = np.broadcast_to(c0, (num_conditions, num_species))
+    lnK = np.broadcast_to(lnK, (num_conditions, num_reactions))
+
+    if compound_types is None:
+        compound_types = ['solute'] * num_species
+    active = ~np.isin(np.asarray(compound_types, dtype=str), UNIT_ACTIVITY_TYPES)
+    gamma = np.broadcast_to(np.asarray(activity_coefficients, dtype=float), (num_conditions, num_species))
+
+    return N, c0, lnK, compound_types, active, gamma
+
+def log_quotient(concentrations, stoichiometry, compound_types, activity_coefficients):
+    """
+    Calculate ln Q for many compositions at once.
+
+    Only the compounds taking part in a reaction contribute, so spectators may have a zero concentration.
+
+    Args:
+        concentrations (numpy.ndarray): Concentrations or pressures of shape (conditions, species).
+        stoichiometry (numpy.ndarray): Stoichiometric matrix of shape (species, reactions).
+        compound_types (list of str): Nature of each compound.
+        activity_coefficients (numpy.ndarray): Activity coefficients (γ) of shape (conditions, species).
+
+    Returns:
+        numpy.ndarray: ln Q of shape (conditions, reactions).
+    """
+    participates = np.any(stoichiometry != 0, axis=1)
+    activities = calculate_activity(compound_types, np.where(participates, concentrations, 1.0), activity_coefficients)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ln_activities = np.where(participates, np.log(activities), 0.0)
+    return ln_activities @ stoichiometry
+
+def equilibrium_extent(K, coefficients, initial, compound_types=None, activity_coefficients=1, tol=1e-12, max_iter=100):
+    """
+    Find the extent of reaction ξ at which the reaction quotient equals the equilibrium constant.
+
+    The equation ln Q(ξ) = ln K is solved by a safeguarded Newton method. The unknown is the logarithm
+    of the distance between ξ and the bound at which the limiting compound is exhausted, so that ln Q
+    is almost linear in the unknown even for very large or very small K. A bracket of the root is kept
+    and a bisection step is taken whenever the Newton step leaves it. Solids, liquids and solvents
+    have an activity of 1 and are assumed to be in excess.
+
+    Args:
+        K (float or array-like): Equilibrium constant, or one constant per initial condition.
+        coefficients (list of float): Stoichiometric numbers, negative for reactants and positive for products.
+        initial (array-like): Initial concentrations (mol/L) or pressures (bar) of shape (species,)
+            or (conditions, species).
+        compound_types (list of str, optional): Nature of each compound (solid/liquid/solvent/solute/gas/other).
+            Defaults to 'solute' for every compound.
+        activity_coefficients (float or array-like, optional): Activity coefficients (γ). Defaults to 1.
+        tol (float, optional): Tolerance on |ln Q - ln K|. Defaults to 1e-12.
+        max_iter (int, optional): Maximum number of iterations. Defaults to 100.
+
+    Returns:
+        float or numpy.ndarray: The extent of reaction (per unit volume), one per initial condition.
+                                NaN where no equilibrium can be reached.
+    """
+    extent, _ = solve_extent(K, coefficients, initial, compound_types, activity_coefficients, tol, max_iter)
+    return extent
+
+def solve_extent(K, coefficients, initial, compound_types=None, activity_coefficients=1, tol=1e-12, max_iter=100):
+    """
+    Solve ln Q(ξ) = ln K for a single reaction and return the extent and the equilibrium composition.
+
+    See `equilibrium_extent` for the arguments.
+
+    Returns:
+        tuple: The extent of reaction and the equilibrium concentrations, both squeezed to the
+               shape of the input when a single initial condition is given.
+    """
+    N, c0, lnK, compound_types, active, gamma = prepare_equilibrium(K, coefficients, initial, compound_types, activity_coefficients)
+    if N.shape[1] != 1:
+        raise ValueError("equilibrium_extent handles a single reaction. Use equilibrium_extents for a reaction network.")
+    nu = N[:, 0]
+    nu_active = np.where(active, nu, 0.0)
+    lnK = lnK[:, 0]
+    rows = np.arange(c0.shape[0])
+
+    # Bounds of ξ keeping every active concentration positive
+    with np.errstate(divide='ignore', invalid='ignore'):
+        limits = -c0 / nu_active
+    lower_limits = np.where(nu_active > 0, limits, -np.inf)
+    upper_limits = np.where(nu_active < 0, limits, np.inf)
+    lo = lower_limits.max(axis=1)
+    hi = upper_limits.min(axis=1)
+    solvable = (np.isfinite(lo) | np.isfinite(hi)) & (lo < hi) & np.isfinite(lnK)
+    bracketed = np.isfinite(lo) & np.isfinite(hi) & solvable
+
+    def residual(concentrations):
+        return log_quotient(concentrations, nu_active[:, None], compound_types, gamma)[:, 0] - lnK
+
+    # Choose the bound the root is closest to: ln Q increases with ξ
+    mid = np.where(bracketed, 0.5 * (lo + hi), 0.0)
+    f_mid = residual(np.where(bracketed[:, None], c0 + np.outer(mid, nu), 1.0))
+    from_upper = np.where(bracketed, f_mid < 0, np.isfinite(hi) & ~np.isfinite(lo))
+    sign = np.where(from_upper, -1.0, 1.0)
+    bound = np.where(from_upper, hi, lo)
+    bound = np.where(solvable, bound, 0.0)
+
+    # ξ = bound + sign⋅exp(y); the limiting compound is exactly exhausted at the bound
+    base = c0 + np.outer(bound, nu)
+    limiting = np.where(from_upper, upper_limits.argmin(axis=1), lower_limits.argmax(axis=1))
+    base[rows, limiting] = np.where(solvable, 0.0, base[rows, limiting])
+    base = np.where(active, np.maximum(base, 0.0), base)
+
+    with np.errstate(divide='ignore'):
+        y = np.where(bracketed, np.log(np.abs(mid - bound)), 0.0)
+    y_low = np.full_like(y, -np.inf)
+    y_high = np.where(bracketed, y, np.inf)
+    done = ~solvable
+    max_step = 20.0
+
+    for _ in range(max_iter):
+        e = np.exp(y)
+        c = base + sign[:, None] * np.outer(e, nu)
+        c_safe = np.where(done[:, None], 1.0, c)
+        f = np.where(done, 0.0, residual(c_safe))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curvature = np.sum(np.where(nu_active != 0, nu_active**2 / c_safe, 0.0), axis=1)
+        dfdy = sign * e * curvature
+
+        done = done | (np.abs(f) < tol) | (y_high - y_low < tol)
+        if done.all():
+            break
+
+        root_above = (f < 0) == (sign > 0)
+        y_low = np.where(root_above & ~done, y, y_low)
+        y_high = np.where(~root_above & ~done, y, y_high)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.clip(f / dfdy, -max_step, max_step)
+        y_new = y - np.nan_to_num(step)
+        outside = ~((y_new > y_low) & (y_new < y_high))
+        y_new = np.where(outside, 0.5 * (y_low + y_high), y_new)
+        y = np.where(done, y, y_new)
+
+    e = np.exp(y)
+    extent = np.where(solvable, bound + sign * e, np.nan)
+    concentrations = np.where(solvable[:, None], base + sign[:, None] * np.outer(e, nu), np.nan)
+
+    if np.ndim(initial) == 1 and np.ndim(K) == 0:
+        return extent[0], concentrations[0]
+    return extent, concentrations
+
+def equilibrium_extents(K, stoichiometry, initial, compound_types=None, activity_coefficients=1, tol=1e-10, max_iter=100):
+    """
+    Find the extent vector ξ of a reaction network at which every reaction quotient equals its constant.
+
+    The equations are solved in log space: the unknowns are the logarithms of the concentrations of the
+    compounds taking part in the reactions, constrained by Nᵀ ln a = ln K and by the conservation of
+    every combination of compounds left unchanged by the reactions (the left null space of N). The
+    Newton steps are limited in size and backtracked until the residual decreases. All initial conditions
+    are solved together with batched linear algebra.
+
+    Args:
+        K (array-like): Equilibrium constants of shape (reactions,) or (conditions, reactions).
+        stoichiometry (array-like): Stoichiometric matrix of shape (species, reactions),
+            negative for reactants and positive for products.
+        initial (array-like): Initial concentrations (mol/L) or pressures (bar) of shape (species,)
+            or (conditions, species).
+        compound_types (list of str, optional): Nature of each compound. Defaults to 'solute' for every compound.
+        activity_coefficients (float or array-like, optional): Activity coefficients (γ). Defaults to 1.
+        tol (float, optional): Tolerance on max |ln Q - ln K| and on the relative mass balance. Defaults to 1e-10.
+        max_iter (int, optional): Maximum number of Newton iterations. Defaults to 100.
+
+    Returns:
+        numpy.ndarray: The extents of shape (reactions,) or (conditions, reactions).
+                       NaN where no equilibrium can be reached.
+    """
+    extents, _ = solve_extents(K, stoichiometry, initial, compound_types, activity_coefficients, tol, max_iter)
+    return extents
+
+def solve_extents(K, stoichiometry, initial, compound_types=None, activity_coefficients=1, tol=1e-10, max_iter=100):
+    """
+    Solve Nᵀ ln a(c0 + N ξ) = ln K for a reaction network and return the extents and the composition.
+
+    See `equilibrium_extents` for the arguments.
+
+    Returns:
+        tuple: The extents and the equilibrium concentrations, squeezed to the shape of the input
+               when a single initial condition is given.
+    """
+    N, c0, lnK, compound_types, active, gamma = prepare_equilibrium(K, stoichiometry, initial, compound_types, activity_coefficients)
+    N_active = np.where(active[:, None], N, 0.0)
+    participates = np.any(N_active != 0, axis=1)
+    N_p = N_active[participates]
+    c0_p = c0[:, participates]
+    ln_gamma = np.log(gamma[:, participates])
+    num_conditions = c0.shape[0]
+    max_log_step = 10.0
+
+    # Combinations of compounds conserved by every reaction span the left null space of N
+    U, singular_values, _ = np.linalg.svd(N_p)
+    rank = int(np.sum(singular_values > 1e-10 * singular_values.max()))
+    B = U[:, rank:]
+    totals = c0_p @ B
+    scale = np.abs(c0_p) @ np.abs(B) + 1e-300
+
+    def residuals(x):
+        return np.hstack([(x + ln_gamma) @ N_p - lnK, (np.exp(x) @ B - totals) / scale])
+
+    # Absent compounds start from a small fraction of the others: the mass balance is restored by Newton
+    floor = 1e-3 * np.max(np.abs(c0_p), axis=1, keepdims=True)
+    failed = ~np.all(np.isfinite(lnK), axis=1) | (floor[:, 0] <= 0)
+    x = np.log(np.where(failed[:, None], 1.0, np.maximum(c0_p, floor)))
+    F = residuals(x)
+    done = failed | (np.max(np.abs(F), axis=1) < tol)
+
+    for _ in range(max_iter):
+        if done.all():
+            break
+        J = np.concatenate([np.broadcast_to(N_p.T, (num_conditions,) + N_p.T.shape),
+                            B.T[None] * np.exp(x)[:, None, :] / scale[:, :, None]], axis=1)
+        try:
+            step = -np.linalg.solve(J, F[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            step = -(np.linalg.pinv(J) @ F[:, :, None])[:, :, 0]
+        step = np.where(done[:, None], 0.0, np.nan_to_num(step))
+        step *= np.minimum(1.0, max_log_step / np.maximum(np.max(np.abs(step), axis=1), 1e-300))[:, None]
+
+        # Backtracking on the sum of squared residuals
+        squares = np.sum(F**2, axis=1)
+        alpha = np.ones(num_conditions)
+        accepted = done.copy()
+        for _ in range(30):
+            trial = x + alpha[:, None] * step
+            with np.errstate(over='ignore', invalid='ignore'):
+                F_trial = residuals(trial)
+            ok = ~accepted & (np.sum(F_trial**2, axis=1) <= (1 - 1e-4 * alpha) * squares)
+            x = np.where(ok[:, None], trial, x)
+            F = np.where(ok[:, None], F_trial, F)
+            accepted = accepted | ok
+            if accepted.all():
+                break
+            alpha = np.where(accepted, alpha, 0.5 * alpha)
+        done = done | ~accepted | (np.max(np.abs(F), axis=1) < tol)
+
+    # Conditions left with a residual have no equilibrium with positive concentrations
+    failed = failed | ~(np.max(np.abs(F), axis=1) < np.sqrt(tol))
+    c_p = np.where(failed[:, None], np.nan, np.exp(x))
+    xi = (c_p - c0_p) @ np.linalg.pinv(N_p).T
+    concentrations = c0 + xi @ N.T
+    concentrations[:, participates] = c_p
+    if np.ndim(initial) == 1 and np.ndim(K) <= 1:
+        return xi[0], concentrations[0]
+    return xi, concentrations
+
+def equilibrium_composition(K, stoichiometry, initial, compound_types=None, activity_coefficients=1):
+    """
+    Calculate the equilibrium concentrations (or pressures) of a reaction or of a reaction network.
+
+    Args:
+        K (float or array-like): Equilibrium constant(s).
+        stoichiometry (array-like): Stoichiometric numbers of shape (species,) for a single reaction
+            or (species, reactions) for a network.
+        initial (array-like): Initial concentrations (mol/L) or pressures (bar) of shape (species,)
+            or (conditions, species).
+        compound_types (list of str, optional): Nature of each compound. Defaults to 'solute' for every compound.
+        activity_coefficients (float or array-like, optional): Activity coefficients (γ). Defaults to 1.
+
+    Returns:
+        numpy.ndarray: The equilibrium concentrations, with the shape of `initial`.
+    """
+    if np.ndim(stoichiometry) == 1:
+        _, concentrations = solve_extent(K, stoichiometry, initial, compound_types, activity_coefficients)
+    else:
+        _, concentrations = solve_extents(K, stoichiometry, initial, compound_types, activity_coefficients)
+    return concentrations
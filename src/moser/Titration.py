@@ -1,8 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.legend import Legend
+from matplotlib.lines import Line2D
 from matplotlib.ticker import AutoMinorLocator
 from scipy.optimize import curve_fit
+import csv
+import os
+import re
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from decimation import downsample
 
 def pH_log_interpolation1(data_points):
     '''Interpolation of the titration curve for a diprotic acid for ξ ∈ [0, 0.5].
@@ -140,149 +152,212 @@ def pH4(Va, Ctit, Veq, x):
 
     return 1/2 * np.log10(Ca * Da)
 
-def Titration_sAsB(acid, Va, base, Ctit, Veq):
-    '''Traces the curve corresponding to a titration of a strong acid by a strong base.
+def MeanCharge(pH, l_pKa, charge):
+    '''Evaluates the mean charge of the species of an acid-base system and its derivative with respect to the pH.
+
+        The system loses its protons one after the other from its most protonated species, of charge
+        'charge', with the acidity constants pKa1, pKa2, ...: the fraction of species having lost j
+        protons is proportional to 10^(j⋅pH - pKa1 - ... - pKaj). Without pKa, the system is a
+        strong electrolyte ion of constant charge (e.g. Na⁺ or Cl⁻).
+        * Requires: numpy
+
+        Args:
+            pH (array) :        pH of the solution
+            l_pKa (list) :      pKa of the successive acidities (empty for a strong electrolyte ion)
+            charge (int) :      charge of the most protonated species
+
+        Returns:
+            z (array) :         mean charge of the species
+            d_z (array) :       derivative of z with respect to the pH (-ln(10) times the variance of the number of protons lost)'''
+
+    pH = np.asarray(pH, dtype=float)
+    if len(l_pKa) == 0:
+        return np.full(pH.shape, float(charge)), np.zeros(pH.shape)
+    lost = np.arange(len(l_pKa) + 1)
+    log_fractions = lost * pH[..., None] - np.concatenate([[0], np.cumsum(l_pKa)])
+    fractions = 10**(log_fractions - log_fractions.max(axis=-1, keepdims=True))
+    fractions /= fractions.sum(axis=-1, keepdims=True)
+    mean = (fractions * lost).sum(axis=-1)
+    variance = (fractions * lost**2).sum(axis=-1) - mean**2
+    return charge - mean, -np.log(10) * variance
+
+def SolveChargeBalance(l_components, shape, tol=1e-10, max_iter=100):
+    '''Solves the charge balance of aqueous solutions for their pH.
+
+        The charge balance [H3O⁺] - [OH⁻] + Σ c⋅z = 0, c being the total concentration and z the
+        mean charge of each component (-> MeanCharge), strictly decreases with the pH. It is solved
+        for all the solutions at once by Newton's method on the pH, safeguarded by bisection: a
+        step leaving the bracket [-2, 16] narrowed at each iteration is replaced by its midpoint.
+        Only the solutions not converged yet are iterated on.
+        * Requires: MeanCharge, numpy
+
+        Args:
+            l_components (list) :   (concentrations, pKa, charge of the most protonated species) of each component,
+                                    the concentrations being broadcastable to shape
+            shape (tuple) :         shape of the solutions
+            tol (float) :           tolerance on the pH (default 1e-10)
+            max_iter (int) :        largest number of iterations (default 100)
+
+        Returns:
+            pH (array) :    pH of the solutions'''
+
+    l_components = [(np.broadcast_to(concentrations, shape).ravel(), l_pKa, charge) for concentrations, l_pKa, charge in l_components]
+    pH = np.full(int(np.prod(shape)), 7.0)
+    low = np.full(pH.shape, -2.0)
+    high = np.full(pH.shape, 16.0)
+    active = np.arange(pH.size)
+    for _ in range(max_iter):
+        pH_active = pH[active]
+        balance = 10**(-pH_active) - 10**(pH_active - 14)
+        d_balance = -np.log(10) * (10**(-pH_active) + 10**(pH_active - 14))
+        for concentrations, l_pKa, charge in l_components:
+            z, d_z = MeanCharge(pH_active, l_pKa, charge)
+            balance = balance + concentrations[active] * z
+            d_balance = d_balance + concentrations[active] * d_z
+
+        '''A positive balance means a pH too low, a negative one a pH too high'''
+        low[active] = np.where(balance > 0, pH_active, low[active])
+        high[active] = np.where(balance < 0, pH_active, high[active])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = pH_active - balance / d_balance
+        converged = np.abs(newton - pH_active) < tol
+        inside = converged | ((newton > low[active]) & (newton < high[active]))
+        pH[active] = np.where(inside, newton, (low[active] + high[active]) / 2)
+        active = active[~(converged | (high[active] - low[active] < tol))]
+        if active.size == 0:
+            break
+    return pH.reshape(shape)
+
+def TitrationCurve(volumes, Va, Ca, l_pKa, Ctit, l_pKa_titrant=(), analyte="acid", tol=1e-10, max_iter=100):
+    '''Evaluates the exact pH of a titration of any acid or base by any base or acid.
+
+        The titrated solution and the titrant are acid-base systems with any number of acidities
+        (-> MeanCharge): a neutral acid H_nA, a neutral base B whose conjugate acids have the
+        given pKa, or a strong acid or base (no pKa: only its Cl⁻ or Na⁺-like ion counts). The
+        titrant is of the opposite kind to the titrated solution. The charge balance is solved at
+        all the volumes in one call (-> SolveChargeBalance), dilution included.
+        * Requires: SolveChargeBalance, numpy
+
+        Args:
+            volumes (array) :       volumes of titrant added
+            Va (float) :            initial volume of the titrated solution
+            Ca (float) :            concentration of the titrated acid / base
+            l_pKa (list) :          pKa of the titrated acid, or of the conjugate acids of the titrated base (empty if strong)
+            Ctit (float) :          concentration of the titrant
+            l_pKa_titrant (list) :  pKa of the titrant, as l_pKa (default empty: strong)
+            analyte (str) :         "acid" or "base", kind of the titrated solution (default "acid")
+            tol (float) :           tolerance on the pH (default 1e-10)
+            max_iter (int) :        largest number of iterations (default 100)
+
+        Returns:
+            pH (array) :    pH at each volume
+
+        Raises:
+            ValueError :    invalid analyte'''
+
+    if analyte not in ("acid", "base"):
+        raise ValueError(f"Invalid analyte '{analyte}'. Choose between acid and base.")
+    volumes = np.asarray(volumes, dtype=float)
+
+    def Charge(kind, l_pKa):
+        if kind == "acid":
+            return 0 if len(l_pKa) else -1
+        return len(l_pKa) if len(l_pKa) else 1
+
+    titrant = "base" if analyte == "acid" else "acid"
+    l_components = [(Ca * Va / (Va + volumes), list(l_pKa), Charge(analyte, l_pKa)),
+                    (Ctit * volumes / (Va + volumes), list(l_pKa_titrant), Charge(titrant, l_pKa_titrant))]
+    shape = np.broadcast_shapes(volumes.shape, np.shape(Va), np.shape(Ca), np.shape(Ctit))
+    return SolveChargeBalance(l_components, shape, tol, max_iter)
 
-        Calls the functions pH1 and pH2, composes them with the right constants to evaluate
-        the pH as a function of the titration's degree of advancement to finally trace and
-        show the titration curve.
-        * Requires: pH1, pH2, numpy, matplotlib
+def TitrationData_sAsB(acid, Va, base, Ctit, Veq):
+    '''Evaluates the curve of a titration of a strong acid by a strong base, without plotting it.
+
+        Calls the functions pH1 and pH2 and composes them with the right constants to evaluate
+        the pH as a function of the titration's degree of advancement.
+        * Requires: pH1, pH2, numpy
 
         Args:
             acid (str) :    formula / name ot the titrated acid
             Va (float) :    initial volume of titrated acid
             base (str) :    formula / name ot the titrant base
-            Veq (float) :   volume of titrant base added at equivalence point'''
+            Ctit (float):   concentration of the the titrant base
+            Veq (float) :   volume of titrant base added at equivalence point
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)'''
 
     StrongAcidRed = (211/255, 4/255, 4/255)
     StrongBaseBlue = (4/255, 68/255, 140/255)
-    Invisible = (0,0,0,0)
 
     '''Initialises important parameters'''
     Ctit = round(Ctit, 3)
     Ca = round((Ctit * Veq) / Va, 3)
     pH_eq = 7 #pH at equivalence point
 
-    '''Tracing the graph'''
+    '''Evaluating the curve'''
     x1 = np.linspace(0, 0.9999, 10000)
     x2 = np.linspace(1.0001, 1.9999, 10000)
 
     y1 = -1 * pH1(Va, Ctit, Veq, x1)
     y2 = 14 + pH2(Va, Ctit, Veq, x2)
 
-    '''Formating the graph'''
-    plt.figure(figsize=(8, 6))
-    curve1, = plt.plot(x1, y1, color=StrongAcidRed, label="pH of strong acid")
-    curve2, = plt.plot(x2, y2, color=StrongBaseBlue, label="pH of strong base")
-
-    variable, = plt.plot(0, 0, color=Invisible, label=r"$\xi = \frac{V_{TIT}}{V_{EQ}}$")
-    volume1, = plt.plot(0, 0, color=Invisible, label=f"$V_{{a}}({acid})={Va} mL$")
-    concentration1, = plt.plot(0, 0, color=Invisible, label=f"$c_{{a}}({acid})={Ca} M$")
-    volume2, = plt.plot(0, 0, color=Invisible, label=f"$V_{{EQ}}({base})={Veq} mL$")
-    concentration2, = plt.plot(0, 0, color=Invisible, label=f"$c_{{b}}({base})={Ctit} M$")
-
-    plt.hlines(pH_eq, 0, 1, color="gray", linestyles="dashed")
-    plt.vlines(1, 0, 14, color="gray", linestyles="solid")
-
-    title = f"Titration of {Ca} M {acid} with {Ctit} M {base}"
-    plt.title(title)
-    plt.xlim(0, 2)
-    plt.xticks([0,0.5,1,1.5,2], ["0","0.5","1","1.5","2"])
-    plt.xlabel('ξ ⟶')
-    plt.gca().xaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='x', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='x', which='major', length=8, color='black')
-    plt.ylim(0, 14)
-    plt.yticks([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
-    plt.ylabel('pH')
-    plt.gca().yaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='y', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='y', which='major', length=8)
-
-    legend1 = plt.legend(handles=[curve1, curve2, variable], labels=["pH of strong acid", "pH of strong base", r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc="upper left")
-    legend2 = plt.legend(handles=[volume1, concentration1, volume2, concentration2], labels=[f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"], loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
-    plt.gca().add_artist(legend1)
-    plt.gca().add_artist(legend2)
-    plt.subplots_adjust(bottom=0.25)
-
-    plt.savefig(title + ".png", dpi=300)
-    plt.show()
+    return {"title": f"Titration of {Ca} M {acid} with {Ctit} M {base}",
+            "segments": [(x1, y1), (x2, y2)],
+            "colors": [StrongAcidRed, StrongBaseBlue],
+            "legend": ([0, 1], ["pH of strong acid", "pH of strong base"], "upper left"),
+            "parameters": [f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"],
+            "equivalences": [(1, pH_eq)],
+            "xticks": [0, 0.5, 1, 1.5, 2],
+            "xmax": 2}
 
-def Titration_sBsA(base, Vb, acid, Ctit, Veq):
-    '''Traces the curve corresponding to a titration of a strong base by a strong acid.
+def TitrationData_sBsA(base, Vb, acid, Ctit, Veq):
+    '''Evaluates the curve of a titration of a strong base by a strong acid, without plotting it.
 
-        Calls the functions pH1 and pH2, composes them with the right constants to evaluate
-        the pH as a function of the titration's degree of advancement to finally trace and
-        show the titration curve.
-        * Requires: pH1, pH2, numpy, matplotlib
+        Calls the functions pH1 and pH2 and composes them with the right constants to evaluate
+        the pH as a function of the titration's degree of advancement.
+        * Requires: pH1, pH2, numpy
 
         Args:
-            base (str) :    formula / name ot the titrant base
+            base (str) :    formula / name ot the titrated base
             Vb (float) :    initial volume of titrated base
             acid (str) :    formula / name ot the titrant acid
-            Veq (float) :   volume of titrant base added at equivalence point'''
+            Ctit (float):   concentration of the the titrant acid
+            Veq (float) :   volume of titrant acid added at equivalence point
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)'''
+
     StrongAcidRed = (211/255, 4/255, 4/255)
     StrongBaseBlue = (4/255, 68/255, 140/255)
-    Invisible = (0,0,0,0)
 
     '''Initialises important parameters'''
     Ctit = round(Ctit, 3)
     Cb = round((Ctit * Veq) / Vb, 3)
     pH_eq = 7 #pH at equivalence point
 
-    '''Tracing the graph'''
+    '''Evaluating the curve'''
     x1 = np.linspace(0, 0.9999, 10000)
     x2 = np.linspace(1.0001, 1.9999, 10000)
 
     y1 = 14 + pH1(Vb, Ctit, Veq, x1)
     y2 = -1*pH2(Vb, Ctit, Veq, x2)
 
-    '''Formating the graph'''
-    plt.figure(figsize=(8, 6))
-    curve1, = plt.plot(x1, y1, color=StrongBaseBlue, label="pH of strong base")
-    curve2, = plt.plot(x2, y2, color=StrongAcidRed, label="pH of strong acid")
-
-    variable, = plt.plot(0, 0, color=Invisible, label=r"$\xi = \frac{V_{TIT}}{V_{EQ}}$")
-    volume1, = plt.plot(0, 0, color=Invisible, label=f"$V_{{B}}({base})={Vb} mL$")
-    concentration1, = plt.plot(0, 0, color=Invisible, label=f"$c_{{B}}({base})={Cb} M$")
-    volume2, = plt.plot(0, 0, color=Invisible, label=f"$V_{{EQ}}({acid})={Veq} mL$")
-    concentration2, = plt.plot(0, 0, color=Invisible, label=f"$c_{{A}}({acid})={Ctit} M$")
-
-    plt.hlines(pH_eq, 0, 1, color="gray", linestyles="dashed")
-    plt.vlines(1, 0, 14, color="gray", linestyles="solid")
-
-    title = f"Titration of {Cb} M {base} with {Ctit} M {acid}"
-    plt.title(title)
-    plt.xlim(0, 2)
-    plt.xticks([0,0.5,1,1.5,2], ["0","0.5","1","1.5","2"])
-    plt.xlabel('ξ ⟶')
-    plt.gca().xaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='x', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='x', which='major', length=8, color='black')
-    plt.ylim(0, 14)
-    plt.yticks([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
-    plt.ylabel('pH')
-    plt.gca().yaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='y', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='y', which='major', length=8)
-
-    legend1 = plt.legend(handles=[curve1, curve2, variable], labels=["pH of strong base", "pH of strong acid", r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc="upper right")
-    legend2 = plt.legend(handles=[volume1, concentration1, volume2, concentration2], labels=[f"$V_{{B}}({base})={Vb*1000} mL$", f"$c_{{B}}({base})={Cb} M$", f"$V_{{EQ}}({acid})={Veq*1000} mL$", f"$c_{{A}}({acid})={Ctit} M$"], loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
-    plt.gca().add_artist(legend1)
-    plt.gca().add_artist(legend2)
-    plt.subplots_adjust(bottom=0.25)
-
-    plt.savefig(title + ".png", dpi=300)
-    plt.show()
+    return {"title": f"Titration of {Cb} M {base} with {Ctit} M {acid}",
+            "segments": [(x1, y1), (x2, y2)],
+            "colors": [StrongBaseBlue, StrongAcidRed],
+            "legend": ([0, 1], ["pH of strong base", "pH of strong acid"], "upper right"),
+            "parameters": [f"$V_{{B}}({base})={Vb*1000} mL$", f"$c_{{B}}({base})={Cb} M$", f"$V_{{EQ}}({acid})={Veq*1000} mL$", f"$c_{{A}}({acid})={Ctit} M$"],
+            "equivalences": [(1, pH_eq)],
+            "xticks": [0, 0.5, 1, 1.5, 2],
+            "xmax": 2}
 
+def TitrationData_wAsB(acid, pKa, Va, base, Ctit, Veq):
+    '''Evaluates the curve of a titration of a weak acid by a strong base, without plotting it.
 
-def Titration_wAsB(acid, pKa, Va, base, Ctit, Veq):
-    '''Traces the curve corresponding to a titration of a weak acid by a strong base.
-
-        Calls the functions pH2 and pH3, composes them with the right constants to evaluate
-        the pH as a function of the titration's degree of advancement to finally trace and
-        show the titration curve.
-        * Requires: pH2, pH3, numpy, matplotlib
+        Calls the functions pH2 and pH3 and composes them with the right constants to evaluate
+        the pH as a function of the titration's degree of advancement.
+        * Requires: pH2, pH3, pH4, numpy
 
         Args:
             acid (str) :    formula / name ot the titrated acid
@@ -290,18 +365,20 @@ def Titration_wAsB(acid, pKa, Va, base, Ctit, Veq):
             Va (float) :    initial volume of the titrated acid
             base (str) :    formula / name ot the titrant base
             Ctit (float):   concentration of the the titrant base
-            Veq (float) :   volume of titrant base added at equivalence point'''
+            Veq (float) :   volume of titrant base added at equivalence point
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)'''
 
     WeakAcidRed = (255/255, 138/255, 138/255)
     StrongBaseBlue = (4/255, 68/255, 140/255)
-    Invisible = (0,0,0,0)
 
     '''Initialises important parameters'''
     Ctit = round(Ctit, 3)
     Ca = round((Ctit * Veq) / Va, 3)
     pH_eq = 7 + 1/2 * pKa + pH4(Va, Ctit, Veq, 1) #pH at equivalence point
 
-    '''Tracing the graph'''
+    '''Evaluating the curve'''
     x1 = np.linspace(0.01, 0.9999, 10000)
     x1_stretched = np.linspace(0, 0.9999, 10000)
     x2 = np.linspace(1.0001, 1.9999, 10000)
@@ -309,52 +386,21 @@ def Titration_wAsB(acid, pKa, Va, base, Ctit, Veq):
     y1 = pKa + pH3(x1)
     y2 = 14 + pH2(Va, Ctit, Veq, x2)
 
-    '''Formating the graph'''
-    plt.figure(figsize=(8, 6))
-    curve1, = plt.plot(x1_stretched, y1, color=WeakAcidRed, label="pH of strong base")
-    curve2, = plt.plot(x2, y2, color=StrongBaseBlue, label="pH of strong base")
-
-    variable, = plt.plot(0, 0, color=Invisible, label=r"$\xi = \frac{V_{TIT}}{V_{EQ}}$")
-    volume1, = plt.plot(0, 0, color=Invisible, label=f"$V_{{a}}({acid})={Va} mL$")
-    concentration1, = plt.plot(0, 0, color=Invisible, label=f"$c_{{a}}({acid})={Ca} M$")
-    volume2, = plt.plot(0, 0, color=Invisible, label=f"$V_{{EQ}}({base})={Veq} mL$")
-    concentration2, = plt.plot(0, 0, color=Invisible, label=f"$c_{{b}}({base})={Ctit} M$")
-
-    plt.hlines(pH_eq, 0, 1, color="gray", linestyles="dashed")
-    plt.vlines(1, 0, 14, color="gray", linestyles="solid")
-
-    title = f"Titration of {Ca} M {acid} with {Ctit} M {base}"
-    plt.title(title)
-    plt.xlim(0, 2)
-    plt.xticks([0,0.5,1,1.5,2], ["0","0.5","1","1.5","2"])
-    plt.xlabel('ξ ⟶')
-    plt.gca().xaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='x', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='x', which='major', length=8, color='black')
-    plt.ylim(0, 14)
-    plt.yticks([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
-    plt.ylabel('pH')
-    plt.gca().yaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='y', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='y', which='major', length=8)
-
-    legend1 = plt.legend(handles=[curve1, curve2, variable], labels=["pH of weak acid", "pH of strong base", r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc="upper left")
-    legend2 = plt.legend(handles=[volume1, concentration1, volume2, concentration2], labels=[f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"], loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
-    plt.gca().add_artist(legend1)
-    plt.gca().add_artist(legend2)
-    plt.subplots_adjust(bottom=0.25)
-
-    plt.savefig(title + ".png", dpi=300)
-    plt.show()
-
+    return {"title": f"Titration of {Ca} M {acid} with {Ctit} M {base}",
+            "segments": [(x1_stretched, y1), (x2, y2)],
+            "colors": [WeakAcidRed, StrongBaseBlue],
+            "legend": ([0, 1], ["pH of weak acid", "pH of strong base"], "upper left"),
+            "parameters": [f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"],
+            "equivalences": [(1, pH_eq)],
+            "xticks": [0, 0.5, 1, 1.5, 2],
+            "xmax": 2}
 
-def Titration_wBsA(base, pKa, Vb, acid, Ctit, Veq):
-    '''Traces the curve corresponding to a titration of a weak base by a strong acid.
+def TitrationData_wBsA(base, pKa, Vb, acid, Ctit, Veq):
+    '''Evaluates the curve of a titration of a weak base by a strong acid, without plotting it.
 
-        Calls the functions pH2 and pH3, composes them with the right constants to evaluate
-        the pH as a function of the titration's degree of advancement to finally trace and
-        show the titration curve.
-        * Requires: pH2, pH3, numpy, matplotlib
+        Calls the functions pH2 and pH3 and composes them with the right constants to evaluate
+        the pH as a function of the titration's degree of advancement.
+        * Requires: pH2, pH3, pH4, numpy
 
         Args:
             base (str) :    formula / name ot the titrated base
@@ -362,17 +408,20 @@ def Titration_wBsA(base, pKa, Vb, acid, Ctit, Veq):
             Vb (float) :    initial volume of the titrated base
             acid (str) :    formula / name ot the titrant acid
             Ctit (float):   concentration of the the titrant acid
-            Veq (float) :   volume of titrant acid added at equivalence point'''
+            Veq (float) :   volume of titrant acid added at equivalence point
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)'''
+
     StrongAcidRed = (211/255, 4/255, 4/255)
     WeakBaseBlue = (4/255, 171/255, 211/255)
-    Invisible = (0,0,0,0)
 
     '''Initialises important parameters'''
     Ctit = round(Ctit, 3)
     Cb = round((Ctit * Veq) / Vb, 3)
     pH_eq = 1/2 * pKa - pH4(Vb, Ctit, Veq, 1) #pH at equivalence point
 
-    '''Tracing the graph'''
+    '''Evaluating the curve'''
     x1 = np.linspace(0.01, 0.9999, 10000)
     x1_stretched = np.linspace(0, 0.9999, 10000)
     x2 = np.linspace(1.0001, 1.9999, 10000)
@@ -380,52 +429,22 @@ def Titration_wBsA(base, pKa, Vb, acid, Ctit, Veq):
     y1 = pKa - pH3(x1)
     y2 = -1 * pH2(Vb, Ctit, Veq, x2)
 
-    '''Formating the graph'''
-    plt.figure(figsize=(8, 6))
-    curve1, = plt.plot(x1_stretched, y1, color=WeakBaseBlue, label="pH of weak base")
-    curve2, = plt.plot(x2, y2, color=StrongAcidRed, label="pH of strong acid")
-
-    variable, = plt.plot(0, 0, color=Invisible, label=r"$\xi = \frac{V_{TIT}}{V_{EQ}}$")
-    volume1, = plt.plot(0, 0, color=Invisible, label=f"$V_{{B}}({base})={Vb} mL$")
-    concentration1, = plt.plot(0, 0, color=Invisible, label=f"$c_{{B}}({base})={Cb} M$")
-    volume2, = plt.plot(0, 0, color=Invisible, label=f"$V_{{EQ}}({acid})={Veq} mL$")
-    concentration2, = plt.plot(0, 0, color=Invisible, label=f"$c_{{A}}({acid})={Ctit} M$")
-
-    plt.hlines(pH_eq, 0, 1, color="gray", linestyles="dashed")
-    plt.vlines(1, 0, 14, color="gray", linestyles="solid")
-
-    title = f"Titration of {Cb} M {base} with {Ctit} M {acid}"
-    plt.title(title)
-    plt.xlim(0, 2)
-    plt.xticks([0,0.5,1,1.5,2], ["0","0.5","1","1.5","2"])
-    plt.xlabel('ξ ⟶')
-    plt.gca().xaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='x', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='x', which='major', length=8, color='black')
-    plt.ylim(0, 14)
-    plt.yticks([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
-    plt.ylabel('pH')
-    plt.gca().yaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='y', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='y', which='major', length=8)
-
-    legend1 = plt.legend(handles=[curve1, curve2, variable], labels=["pH of weak base", "pH of strong acid", r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc="upper right")
-    legend2 = plt.legend(handles=[volume1, concentration1, volume2, concentration2], labels=[f"$V_{{B}}({base})={Vb*1000} mL$", f"$c_{{B}}({base})={Cb} M$", f"$V_{{EQ}}({acid})={Veq*1000} mL$", f"$c_{{A}}({acid})={Ctit} M$"], loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
-    plt.gca().add_artist(legend1)
-    plt.gca().add_artist(legend2)
-    plt.subplots_adjust(bottom=0.25)
-
-    plt.savefig(title + ".png", dpi=300)
-    plt.show()
-
+    return {"title": f"Titration of {Cb} M {base} with {Ctit} M {acid}",
+            "segments": [(x1_stretched, y1), (x2, y2)],
+            "colors": [WeakBaseBlue, StrongAcidRed],
+            "legend": ([0, 1], ["pH of weak base", "pH of strong acid"], "upper right"),
+            "parameters": [f"$V_{{B}}({base})={Vb*1000} mL$", f"$c_{{B}}({base})={Cb} M$", f"$V_{{EQ}}({acid})={Veq*1000} mL$", f"$c_{{A}}({acid})={Ctit} M$"],
+            "equivalences": [(1, pH_eq)],
+            "xticks": [0, 0.5, 1, 1.5, 2],
+            "xmax": 2}
 
-def Titration_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq):
-    '''Traces the curve corresponding to a titration of a diprotic (weak) acid by a strong base.
+def TitrationData_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq):
+    '''Evaluates the curve of a titration of a diprotic (weak) acid by a strong base, without plotting it.
 
-        Calls the functions pH2, pH_log_interpolation1 and pH_log_interpolation1 composes them
-        with the right constants to evaluate the pH as a function of the titration's degree of
-        advancement to finally trace and show the titration curve.
-        * Requires: pH2, pH_log_interpolation1 and pH_log_interpolation1
+        Calls the functions pH2, pH_log_interpolation1 and pH_log_interpolation2 and composes
+        them with the right constants to evaluate the pH as a function of the titration's
+        degree of advancement.
+        * Requires: pH2, pH_log_interpolation1, pH_log_interpolation2, numpy
 
         Args:
             acid (str) :    formula / name ot the titrated acid
@@ -434,10 +453,13 @@ def Titration_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq):
             Va (float) :    initial volume of the titrated acid
             base (str) :    formula / name ot the titrant base
             Ctit (float):   concentration of the the titrant base
-            Veq (float) :   volume of titrant base added at equivalence point'''
+            Veq (float) :   volume of titrant base added at equivalence point
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)'''
+
     WeakAcidRed = (255/255, 138/255, 138/255)
     StrongBaseBlue = (4/255, 68/255, 140/255)
-    Invisible = (0,0,0,0)
 
     '''Initialises important parameters'''
     Ctit = round(Ctit, 3)
@@ -457,69 +479,450 @@ def Titration_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq):
     pH_eq1 = pH_c # pH at 1st equivalence point
     pH_eq2 = pH_e # pH at 2nd equivalence point
 
-    '''Tracing the graph'''
-    x1 = pH_log_interpolation1(pH_data1)[0]
-    x2 = pH_log_interpolation2(pH_data2)[0] + 0.5
-    x3 = pH_log_interpolation1(pH_data3)[0] + 1
-    x4 = pH_log_interpolation2(pH_data4)[0] + 1.5
+    '''Evaluating the curve'''
+    x1, y1 = pH_log_interpolation1(pH_data1)
+    x2, y2 = pH_log_interpolation2(pH_data2)
+    x3, y3 = pH_log_interpolation1(pH_data3)
+    x4, y4 = pH_log_interpolation2(pH_data4)
     x5 = np.linspace(2.0001, 3, 10000)
-
-    y1 = pH_log_interpolation1(pH_data1)[1]
-    y2 = pH_log_interpolation2(pH_data2)[1]
-    y3 = pH_log_interpolation1(pH_data3)[1]
-    y4 = pH_log_interpolation2(pH_data4)[1]
     y5 = 14 + pH2(Va, Ctit, Veq, x5-1)
 
-    '''Formating the graph'''
-    plt.figure(figsize=(8, 6))
-    curve1A, = plt.plot(x1, y1, color=WeakAcidRed)
-    curve1B, = plt.plot(x2, y2, color=WeakAcidRed)
-    curve2A, = plt.plot(x3, y3, color="green")
-    curve2B, = plt.plot(x4, y4, color="green")
-    curve3, = plt.plot(x5, y5, color=StrongBaseBlue)
-
-    variable, = plt.plot(0, 0, color=Invisible, label=r"$\xi = \frac{V_{TIT}}{V_{EQ}}$")
-    volume1, = plt.plot(0, 0, color=Invisible, label=f"$V_{{A}}({acid})={Va} mL$")
-    concentration1, = plt.plot(0, 0, color=Invisible, label=f"$c_{{A}}({acid})={Ca} M$")
-    volume2, = plt.plot(0, 0, color=Invisible, label=f"$V_{{EQ1}}({base})={Veq} mL$")
-    concentration2, = plt.plot(0, 0, color=Invisible, label=f"$c_{{B}}({base})={Ctit} M$")
-
-    plt.hlines(pH_eq1, 0, 1, color="gray", linestyles="dashed")
-    plt.vlines(1, 0, 14, color="gray", linestyles="solid")
-    plt.hlines(pH_eq2, 0, 2, color="gray", linestyles="dashed")
-    plt.vlines(2, 0, 14, color="gray", linestyles="solid")
-
-    title = f"Titration of {Ca} M {acid} with {Ctit} M {base}"
-    plt.title(title)
-    plt.xlim(0, 2)
-    plt.xticks([0,0.5,1,1.5,2, 2.5, 3], ["0","0.5","1","1.5","2", "2.5", "3"])
-    plt.xlabel('ξ ⟶')
-    plt.gca().xaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='x', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='x', which='major', length=8, color='black')
-    plt.ylim(0, 14)
-    plt.yticks([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
-    plt.ylabel('pH')
-    plt.gca().yaxis.set_minor_locator(AutoMinorLocator(n=5))
-    plt.gca().tick_params(axis='y', which='minor', length=4, color='black')
-    plt.gca().tick_params(axis='y', which='major', length=8)
-
-    legend1 = plt.legend(handles=[curve1A, curve2A, curve3, variable], labels=["pH of weak acid", "intermediate pH", "pH of strong base", r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc="lower right")
-    legend2 = plt.legend(handles=[volume1, concentration1, volume2, concentration2], labels=[f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"], loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
-    plt.gca().add_artist(legend1)
-    plt.gca().add_artist(legend2)
-    plt.subplots_adjust(bottom=0.25)
-
-    plt.savefig(title + ".png", dpi=300)
+    return {"title": f"Titration of {Ca} M {acid} with {Ctit} M {base}",
+            "segments": [(x1, y1), (x2 + 0.5, y2), (x3 + 1, y3), (x4 + 1.5, y4), (x5, y5)],
+            "colors": [WeakAcidRed, WeakAcidRed, "green", "green", StrongBaseBlue],
+            "legend": ([0, 2, 4], ["pH of weak acid", "intermediate pH", "pH of strong base"], "lower right"),
+            "parameters": [f"$V_{{A}}({acid})={Va*1000} mL$", f"$c_{{A}}({acid})={Ca} M$", f"$V_{{EQ}}({base})={Veq*1000} mL$", f"$c_{{B}}({base})={Ctit} M$"],
+            "equivalences": [(1, pH_eq1), (2, pH_eq2)],
+            "xticks": [0, 0.5, 1, 1.5, 2, 2.5, 3],
+            "xmax": 2}
+
+def TitrationData_exact(analyte, l_pKa, Va, titrant, Ctit, Veq, kind="acid", l_pKa_titrant=()):
+    '''Evaluates the exact curve of a titration of any mono- or polyprotic acid or base, without plotting it.
+
+        Solves the charge balance over the whole range of titrant volumes at once (-> TitrationCurve),
+        up to one equivalent past the last equivalence point. The curve is split at each equivalence
+        point ξ = 1, 2, ... (one per pKa, one for a strong acid / base), whose pH is exact as well.
+        * Requires: TitrationCurve, numpy
+
+        Args:
+            analyte (str) :         formula / name ot the titrated acid / base
+            l_pKa (list) :          pKa of the titrated acid, or of the conjugate acids of the titrated base (empty if strong)
+            Va (float) :            initial volume of the titrated solution
+            titrant (str) :         formula / name ot the titrant base / acid
+            Ctit (float):           concentration of the the titrant
+            Veq (float) :           volume of titrant added at the first equivalence point
+            kind (str) :            "acid" or "base", kind of the titrated solution (default "acid")
+            l_pKa_titrant (list) :  pKa of the titrant, as l_pKa (default empty: strong)
+
+        Returns:
+            d_curve (dict) :    title, segments, colors, legends and equivalence points of the curve (-> TitrationRenderer)
+
+        Raises:
+            ValueError :    invalid kind'''
+
+    StrongAcidRed = (211/255, 4/255, 4/255)
+    StrongBaseBlue = (4/255, 68/255, 140/255)
+
+    '''Initialises important parameters'''
+    Ctit = round(Ctit, 3)
+    Ca = round((Ctit * Veq) / Va, 3)
+    n_eq = max(len(l_pKa), 1) # number of equivalence points
+
+    '''Evaluating the curve'''
+    x = np.linspace(0, n_eq + 1, 10000 * (n_eq + 1) + 1)
+    y = TitrationCurve(x * Veq, Va, (Ctit * Veq) / Va, l_pKa, Ctit, l_pKa_titrant, kind)
+    l_xi = np.arange(1, n_eq + 1)
+    l_pH_eq = TitrationCurve(l_xi * Veq, Va, (Ctit * Veq) / Va, l_pKa, Ctit, l_pKa_titrant, kind)
+
+    l_bounds = [0] + [10000 * xi for xi in l_xi] + [len(x) - 1]
+    segments = [(x[start:end + 1], y[start:end + 1]) for start, end in zip(l_bounds[:-1], l_bounds[1:])]
+    acid, base = ("acid", "base") if kind == "acid" else ("base", "acid")
+    colors = [StrongAcidRed if kind == "acid" else StrongBaseBlue] + ["green"] * (n_eq - 1) + [StrongBaseBlue if kind == "acid" else StrongAcidRed]
+    if n_eq > 1:
+        legend = ([0, 1, n_eq], [f"pH of {acid}", "intermediate pH", f"pH of excess {base}"], "lower right" if kind == "acid" else "upper right")
+    else:
+        legend = ([0, 1], [f"pH of {acid}", f"pH of excess {base}"], "upper left" if kind == "acid" else "upper right")
+    A, B = ("A", "B") if kind == "acid" else ("B", "A")
+
+    return {"title": f"Titration of {Ca} M {analyte} with {Ctit} M {titrant}",
+            "segments": segments,
+            "colors": colors,
+            "legend": legend,
+            "parameters": [f"$V_{{{A}}}({analyte})={Va*1000} mL$", f"$c_{{{A}}}({analyte})={Ca} M$", f"$V_{{EQ}}({titrant})={Veq*1000} mL$", f"$c_{{{B}}}({titrant})={Ctit} M$"],
+            "equivalences": [(int(xi), float(pH_eq)) for xi, pH_eq in zip(l_xi, l_pH_eq)],
+            "xticks": [tick / 2 for tick in range(2 * n_eq + 3)],
+            "xmax": n_eq + 1}
+
+d_titration_data = {"sAsB": TitrationData_sAsB, "sBsA": TitrationData_sBsA, "wAsB": TitrationData_wAsB,
+                    "wBsA": TitrationData_wBsA, "dAsB": TitrationData_dAsB, "exact": TitrationData_exact}
+
+class TitrationRenderer:
+    '''Draws titration curves on one figure whose axes, legends and styling are built once.
+
+        Rendering a curve (-> TitrationData_* functions) only swaps the data and colors of the
+        line artists, the texts of the legends, the title and the ticks, so that a batch of curves
+        costs little more than drawing them. Without pyplot, the figure is not registered with
+        pyplot and is drawn by the non-interactive Agg canvas.
+
+        Attributes:
+            figure (Figure) :       figure of the curves
+            axes (Axes) :           axes of the curves
+            decimate (bool) :       whether the segments are reduced to a screen resolution (-> downsample)
+            l_lines (list) :        line artists of the segments, hidden when unused
+            l_levels (list) :       dashed line artists of the pH at the equivalence points
+            l_equivalences (list) : solid line artists of the equivalence points
+            d_legends (dict) :      legend of the curves for each layout (segments listed, location)
+            parameters (Legend) :   legend of the volumes and concentrations of the titration'''
+
+    def __init__(self, figsize=(8, 6), decimate=True, pyplot=True):
+        if pyplot:
+            self.figure = plt.figure(figsize=figsize)
+        else:
+            self.figure = Figure(figsize=figsize)
+            FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.decimate = decimate
+        self.l_lines = []
+        self.l_levels = []
+        self.l_equivalences = []
+        self.d_legends = {}
+        self.xticks = None
+
+        '''Formating the graph'''
+        self.axes.set_xlim(0, 2)
+        self.axes.set_xlabel('ξ ⟶')
+        self.axes.xaxis.set_minor_locator(AutoMinorLocator(n=5))
+        self.axes.tick_params(axis='x', which='minor', length=4, color='black')
+        self.axes.tick_params(axis='x', which='major', length=8, color='black')
+        self.axes.set_ylim(0, 14)
+        self.axes.set_yticks(range(15))
+        self.axes.set_ylabel('pH')
+        self.axes.yaxis.set_minor_locator(AutoMinorLocator(n=5))
+        self.axes.tick_params(axis='y', which='minor', length=4, color='black')
+        self.axes.tick_params(axis='y', which='major', length=8)
+
+        '''The ξ entry and the parameters are the labels of invisible handles'''
+        Invisible = (0,0,0,0)
+        self.variable = Line2D([], [], color=Invisible)
+        self.parameters = Legend(self.axes, [Line2D([], [], color=Invisible) for _ in range(4)], [""] * 4,
+                                 loc='lower center', bbox_to_anchor=(0.5, -0.3), ncol=2)
+        self.axes.add_artist(self.parameters)
+        self.figure.subplots_adjust(bottom=0.25)
+
+    def render(self, d_curve):
+        '''Draws a titration curve in place of the previous one.
+
+            Args:
+                d_curve (dict) :    curve to draw (-> TitrationData_* functions)
+
+            Returns:
+                figure (Figure) :   the updated figure'''
+
+        '''Segments of the curve, reusing the line artists'''
+        l_segments = d_curve["segments"]
+        while len(self.l_lines) < len(l_segments):
+            self.l_lines.append(self.axes.plot([], [])[0])
+        for line, (x, y), color in zip(self.l_lines, l_segments, d_curve["colors"]):
+            if self.decimate:
+                x, y = downsample(x, y)
+            line.set_data(x, y)
+            line.set_color(color)
+            line.set_visible(True)
+        for line in self.l_lines[len(l_segments):]:
+            line.set_visible(False)
+
+        '''Equivalence points and their pH'''
+        l_equivalences = d_curve["equivalences"]
+        while len(self.l_levels) < len(l_equivalences):
+            self.l_levels.append(self.axes.plot([], [], color="gray", linestyle="dashed")[0])
+            self.l_equivalences.append(self.axes.plot([], [], color="gray", linestyle="solid")[0])
+        for level, equivalence, (xi, pH_eq) in zip(self.l_levels, self.l_equivalences, l_equivalences):
+            level.set_data([0, xi], [pH_eq, pH_eq])
+            equivalence.set_data([xi, xi], [0, 14])
+            level.set_visible(True)
+            equivalence.set_visible(True)
+        for level, equivalence in zip(self.l_levels[len(l_equivalences):], self.l_equivalences[len(l_equivalences):]):
+            level.set_visible(False)
+            equivalence.set_visible(False)
+
+        '''Legends, built once per layout'''
+        l_indices, l_labels, location = d_curve["legend"]
+        key = (tuple(l_indices), location)
+        if key not in self.d_legends:
+            self.d_legends[key] = Legend(self.axes, [self.l_lines[i] for i in l_indices] + [self.variable],
+                                         list(l_labels) + [r"$\xi = \frac{V_{TIT}}{V_{EQ}}$"], loc=location)
+            self.axes.add_artist(self.d_legends[key])
+        for other, legend in self.d_legends.items():
+            legend.set_visible(other == key)
+        legend = self.d_legends[key]
+        for text, label in zip(legend.get_texts(), l_labels):
+            text.set_text(label)
+        for handle, i in zip(legend.legend_handles, l_indices):
+            handle.set_color(d_curve["colors"][i])
+        for text, label in zip(self.parameters.get_texts(), d_curve["parameters"]):
+            text.set_text(label)
+
+        self.axes.set_title(d_curve["title"])
+        if d_curve["xticks"] != self.xticks:
+            self.xticks = d_curve["xticks"]
+            self.axes.set_xticks(self.xticks, [f"{tick:g}" for tick in self.xticks])
+        self.axes.set_xlim(0, d_curve["xmax"])
+        return self.figure
+
+def ExportTitrations(l_curves, path, format="pdf", decimate=True):
+    '''Exports many titration curves with one TitrationRenderer and the non-interactive Agg canvas.
+
+        The curves become the pages of one PDF file, or one SVG file each ('0000.svg', '0001.svg',
+        ...) in a directory.
+        * Requires: TitrationRenderer, matplotlib
+
+        Args:
+            l_curves (list) :   curves to export (-> TitrationData_* functions)
+            path (str) :        PDF file, or directory of the SVG files
+            format (str) :      "pdf" or "svg" (default "pdf")
+            decimate (bool) :   whether to reduce the curves to a screen resolution (default True)
+
+        Returns:
+            l_paths (list) :    files written
+
+        Raises:
+            ValueError :    unknown format'''
+
+    if format not in ("pdf", "svg"):
+        raise ValueError(f"Invalid format '{format}'. Choose between pdf and svg.")
+    renderer = TitrationRenderer(decimate=decimate, pyplot=False)
+    if format == "pdf":
+        with PdfPages(path) as pdf:
+            for d_curve in l_curves:
+                pdf.savefig(renderer.render(d_curve))
+        return [path]
+
+    os.makedirs(path, exist_ok=True)
+    l_paths = []
+    for i, d_curve in enumerate(l_curves):
+        l_paths.append(os.path.join(path, f"{i:04d}.svg"))
+        renderer.render(d_curve).savefig(l_paths[-1], format="svg")
+    return l_paths
+
+def RenderTitrationChunk(l_jobs, directory, format, dpi, decimate):
+    '''Evaluates and saves a chunk of titration curves with one TitrationRenderer (-> ExportTitrationTable).
+
+        A curve that cannot be evaluated or saved does not interrupt the others: its error is
+        written in its row of the manifest instead.
+        * Requires: d_titration_data, TitrationRenderer
+
+        Args:
+            l_jobs (list) :     (index, specification, file name) of each curve
+            directory (str) :   directory of the files
+            format (str) :      format of the files, as understood by savefig
+            dpi (int) :         resolution of the files
+            decimate (bool) :   whether to reduce the curves to a screen resolution
+
+        Returns:
+            l_rows (list) :     row of the manifest of each curve'''
+
+    renderer = TitrationRenderer(decimate=decimate, pyplot=False)
+    l_rows = []
+    for index, spec, name in l_jobs:
+        d_row = {"index": index, "mode": None, "title": None, "path": None, "error": None}
+        try:
+            if isinstance(spec, dict):
+                d_arguments = dict(spec)
+                d_row["mode"] = d_arguments.pop("mode")
+                l_arguments = []
+            else:
+                d_row["mode"], l_arguments, d_arguments = spec[0], spec[1:], {}
+            if d_row["mode"] not in d_titration_data:
+                raise ValueError(f"Invalid mode '{d_row['mode']}'. Choose between {', '.join(d_titration_data)}.")
+            d_curve = d_titration_data[d_row["mode"]](*l_arguments, **d_arguments)
+            d_row["title"] = d_curve["title"]
+            '''Characters not allowed in file names (e.g. the / of a formula) are replaced'''
+            path = os.path.join(directory, re.sub(r'[^\w .,()+-]', '_', name.format(mode=d_row["mode"], title=d_curve["title"])))
+            renderer.render(d_curve).savefig(path, format=format, dpi=dpi)
+            d_row["path"] = path
+        except Exception as error:
+            d_row["error"] = f"{type(error).__name__}: {error}"
+        l_rows.append(d_row)
+    return l_rows
+
+def ExportTitrationTable(l_specs, directory, format="png", dpi=300, processes=None, chunk_size=16, decimate=True, manifest="manifest.csv"):
+    '''Saves the titration curves of a table of specifications on a pool of processes.
+
+        Each specification is a row (mode, *arguments) or a dict {"mode": mode, **arguments}, the
+        mode being a key of d_titration_data ("sAsB", "sBsA", "wAsB", "wBsA", "dAsB" or "exact") and the
+        arguments those of the corresponding TitrationData_* function. The rows are split into
+        chunks of chunk_size, each chunk being rendered by one TitrationRenderer on the
+        non-interactive Agg canvas of a worker process, so that the throughput grows with the
+        number of cores. The file of row i is '<i>_<mode>_<title>.<format>', i being padded with
+        zeros, so that the names only depend on the table.
+        * Requires: RenderTitrationChunk, concurrent.futures, csv
+
+        Args:
+            l_specs (list) :        specifications of the curves
+            directory (str) :       output directory, created if needed
+            format (str) :          format of the files, as understood by savefig (default "png")
+            dpi (int) :             resolution of the files (default 300)
+            processes (int) :       number of worker processes (default: number of cores, 1 renders in this process)
+            chunk_size (int) :      number of curves per task (default 16)
+            decimate (bool) :       whether to reduce the curves to a screen resolution (default True)
+            manifest (str) :        name of the CSV copy of the manifest in the directory (default "manifest.csv", None for no copy)
+
+        Returns:
+            l_manifest (list) :     one dict per specification, in order, with its index, mode, title, path
+                                    (None if it failed) and error (None if it succeeded)'''
+
+    os.makedirs(directory, exist_ok=True)
+    width = max(4, len(str(len(l_specs) - 1)))
+    l_jobs = [(i, spec, f"{i:0{width}d}_{{mode}}_{{title}}.{format}") for i, spec in enumerate(l_specs)]
+    l_chunks = [l_jobs[start:start + chunk_size] for start in range(0, len(l_jobs), chunk_size)]
+    arguments = (l_chunks, repeat(directory), repeat(format), repeat(dpi), repeat(decimate))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(l_chunks) <= 1:
+        l_results = list(map(RenderTitrationChunk, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(l_chunks))) as executor:
+            l_results = list(executor.map(RenderTitrationChunk, *arguments))
+    l_manifest = [d_row for l_rows in l_results for d_row in l_rows]
+
+    if manifest is not None:
+        with open(os.path.join(directory, manifest), "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=["index", "mode", "title", "path", "error"])
+            writer.writeheader()
+            writer.writerows(l_manifest)
+    return l_manifest
+
+def Titration_sAsB(acid, Va, base, Ctit, Veq, decimate=True):
+    '''Traces the curve corresponding to a titration of a strong acid by a strong base.
+
+        Evaluates the curve (-> TitrationData_sAsB), then traces, saves and shows it.
+        * Requires: TitrationData_sAsB, TitrationRenderer, matplotlib
+
+        Args:
+            acid (str) :    formula / name ot the titrated acid
+            Va (float) :    initial volume of titrated acid
+            base (str) :    formula / name ot the titrant base
+            Veq (float) :   volume of titrant base added at equivalence point
+            decimate (bool) : whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_sAsB(acid, Va, base, Ctit, Veq)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
+    plt.show()
+
+def Titration_sBsA(base, Vb, acid, Ctit, Veq, decimate=True):
+    '''Traces the curve corresponding to a titration of a strong base by a strong acid.
+
+        Evaluates the curve (-> TitrationData_sBsA), then traces, saves and shows it.
+        * Requires: TitrationData_sBsA, TitrationRenderer, matplotlib
+
+        Args:
+            base (str) :    formula / name ot the titrant base
+            Vb (float) :    initial volume of titrated base
+            acid (str) :    formula / name ot the titrant acid
+            Veq (float) :   volume of titrant base added at equivalence point
+            decimate (bool) : whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_sBsA(base, Vb, acid, Ctit, Veq)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
+    plt.show()
+
+def Titration_wAsB(acid, pKa, Va, base, Ctit, Veq, decimate=True):
+    '''Traces the curve corresponding to a titration of a weak acid by a strong base.
+
+        Evaluates the curve (-> TitrationData_wAsB), then traces, saves and shows it.
+        * Requires: TitrationData_wAsB, TitrationRenderer, matplotlib
+
+        Args:
+            acid (str) :    formula / name ot the titrated acid
+            pKa (float) :   pKa of the titrated acid
+            Va (float) :    initial volume of the titrated acid
+            base (str) :    formula / name ot the titrant base
+            Ctit (float):   concentration of the the titrant base
+            Veq (float) :   volume of titrant base added at equivalence point
+            decimate (bool) : whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_wAsB(acid, pKa, Va, base, Ctit, Veq)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
+    plt.show()
+
+
+def Titration_wBsA(base, pKa, Vb, acid, Ctit, Veq, decimate=True):
+    '''Traces the curve corresponding to a titration of a weak base by a strong acid.
+
+        Evaluates the curve (-> TitrationData_wBsA), then traces, saves and shows it.
+        * Requires: TitrationData_wBsA, TitrationRenderer, matplotlib
+
+        Args:
+            base (str) :    formula / name ot the titrated base
+            pKa (float) :   pKa of the titrated base
+            Vb (float) :    initial volume of the titrated base
+            acid (str) :    formula / name ot the titrant acid
+            Ctit (float):   concentration of the the titrant acid
+            Veq (float) :   volume of titrant acid added at equivalence point
+            decimate (bool) : whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_wBsA(base, pKa, Vb, acid, Ctit, Veq)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
+    plt.show()
+
+
+def Titration_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq, decimate=True):
+    '''Traces the curve corresponding to a titration of a diprotic (weak) acid by a strong base.
+
+        Evaluates the curve (-> TitrationData_dAsB), then traces, saves and shows it.
+        * Requires: TitrationData_dAsB, TitrationRenderer, matplotlib
+
+        Args:
+            acid (str) :    formula / name ot the titrated acid
+            pKa1 (float) :  1st pKa of the titrated acid
+            pKa2 (float) :  2nd pKa of the titrated acid
+            Va (float) :    initial volume of the titrated acid
+            base (str) :    formula / name ot the titrant base
+            Ctit (float):   concentration of the the titrant base
+            Veq (float) :   volume of titrant base added at equivalence point
+            decimate (bool) : whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
+    plt.show()
+
+
+def Titration_exact(analyte, l_pKa, Va, titrant, Ctit, Veq, kind="acid", l_pKa_titrant=(), decimate=True):
+    '''Traces the exact curve corresponding to a titration of any mono- or polyprotic acid or base.
+
+        Evaluates the curve (-> TitrationData_exact), then traces, saves and shows it.
+        * Requires: TitrationData_exact, TitrationRenderer, matplotlib
+
+        Args:
+            analyte (str) :         formula / name ot the titrated acid / base
+            l_pKa (list) :          pKa of the titrated acid, or of the conjugate acids of the titrated base (empty if strong)
+            Va (float) :            initial volume of the titrated solution
+            titrant (str) :         formula / name ot the titrant base / acid
+            Ctit (float):           concentration of the the titrant
+            Veq (float) :           volume of titrant added at the first equivalence point
+            kind (str) :            "acid" or "base", kind of the titrated solution (default "acid")
+            l_pKa_titrant (list) :  pKa of the titrant, as l_pKa (default empty: strong)
+            decimate (bool) :       whether to reduce the curves to a screen resolution before plotting (default True)'''
+
+    d_curve = TitrationData_exact(analyte, l_pKa, Va, titrant, Ctit, Veq, kind, l_pKa_titrant)
+    TitrationRenderer(decimate=decimate).render(d_curve)
+    plt.savefig(d_curve["title"] + ".png", dpi=300)
     plt.show()
 
 
 def Titration():
     '''User interface to facilitate the usage of the different titration functions.
 
-        Integrates all the titration modes into one single callable function that decides which case is applicable,
-        then traces the corresponding titration curve. Invalid parameters will be rejected.
-        * Requires: Titration_sAsB(), Titration_sBsA(), Titration_wAsB(), Titration_wBsA(), Titration_dAsB()'''
+        Asks for the titrated acid (up to three pKa) or base (up to three pKb) and the titrant, then
+        traces the exact titration curve, whatever the strength of the acid or base. Invalid parameters
+        will be rejected.
+        * Requires: Titration_exact()'''
     while True:
         try:
             mode = int(input("\033[1m" + "\nSelect the type of titration you want to perform." + "\033[0m"
@@ -534,25 +937,33 @@ def Titration():
                     try:
                         pKa1 = float(input("∘ (acid) pKa1 [-] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid pKa1 [-]!" + "\033[0m")
 
                 while True:
                     try:
                         pKa2 = input("∘ (acid) pKa2 [-] (type '*' if there is none) =  ")
-                        if pKa2 == float(pKa2):
+                        if pKa2 != "*":
                             pKa2 = float(pKa2)
-                        if pKa2 == "*":
-                            pKa2 = "*"
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid pKa2 [-]!" + "\033[0m")
 
+                pKa3 = "*"
+                while pKa2 != "*":
+                    try:
+                        pKa3 = input("∘ (acid) pKa3 [-] (type '*' if there is none) =  ")
+                        if pKa3 != "*":
+                            pKa3 = float(pKa3)
+                        break
+                    except ValueError:
+                        print("\033[1m" + "Enter a valid pKa3 [-]!" + "\033[0m")
+
                 while True:
                     try:
                         Va = float(input("∘ initial volume of titrated acid: Va [L] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid volume [L]!" + "\033[0m")
 
                 base = input("∘ chemical formula of titrant base: ")
@@ -561,52 +972,20 @@ def Titration():
                     try:
                         Ctit = float(input("∘ concentration of titrant base: Ctit [molL⁻¹] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid concentration [molL⁻¹]!" + "\033[0m")
 
                 while True:
                     try:
                         Veq = float(input("∘ volume of titrant solution at (first) equivalence point: Veq [L] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid volume [L]!" + "\033[0m")
 
-                l_pKa = []
-                for pKa in pKa1, pKa2:
-                    if pKa != "*":
-                        l_pKa.append(pKa)
-
-                if len(l_pKa) == 1:
-                    pKa = l_pKa[0]
-
-                    if pKa < -1.74:  # Strong acid case
-                        print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
-                        Titration_sAsB(acid, Va, base, Ctit, Veq)
-                    else:  # Weak acid case
-                        print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
-                        Titration_wAsB(acid, pKa, Va, base, Ctit, Veq)
-
-                else:
-                    pKa1 = l_pKa[0]
-                    pKa2 = float(l_pKa[1])
-
-                    Delta_pKa = pKa2 - pKa1
-                    if Delta_pKa > 4.5:  # Second acid dissociation negligible
-                        print(
-                            "\033[1m" + "\nThe second acid dissociation will be neglected, as pKa1 << pKa2." + "\033[0m")
-                        pKa = pKa1
-
-                        if pKa < -1.74:  # Strong acid case
-                            print("\033[1m" + "Find hereafter the corresponding titration curve." + "\033[0m")
-                            Titration_sAsB(acid, Va, base, Ctit, Veq)
-                        else:  # Weak acid case
-                            print("\033[1m" + "Find hereafter the corresponding titration curve." + "\033[0m")
-                            Titration_wAsB(acid, pKa, Va, base, Ctit, Veq)
-
-
-                    else:  # Diprotic acid case
-                        print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
-                        Titration_dAsB(acid, pKa1, pKa2, Va, base, Ctit, Veq)
+                l_pKa = [pKa for pKa in (pKa1, pKa2, pKa3) if pKa != "*"]
+
+                print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
+                Titration_exact(acid, l_pKa, Va, base, Ctit, Veq)
                 break
 
             if mode == 2:
@@ -614,16 +993,35 @@ def Titration():
                 base = input("∘ chemical formula of titrated base: ")
                 while True:
                     try:
-                        pKb = float(input("∘ (base) pKb [-] = "))
+                        pKb1 = float(input("∘ (base) pKb1 [-] = "))
                         break
-                    except:
-                        print("\033[1m" + "Enter a valid pKb [-]!" + "\033[0m")
+                    except ValueError:
+                        print("\033[1m" + "Enter a valid pKb1 [-]!" + "\033[0m")
+
+                while True:
+                    try:
+                        pKb2 = input("∘ (base) pKb2 [-] (type '*' if there is none) =  ")
+                        if pKb2 != "*":
+                            pKb2 = float(pKb2)
+                        break
+                    except ValueError:
+                        print("\033[1m" + "Enter a valid pKb2 [-]!" + "\033[0m")
+
+                pKb3 = "*"
+                while pKb2 != "*":
+                    try:
+                        pKb3 = input("∘ (base) pKb3 [-] (type '*' if there is none) =  ")
+                        if pKb3 != "*":
+                            pKb3 = float(pKb3)
+                        break
+                    except ValueError:
+                        print("\033[1m" + "Enter a valid pKb3 [-]!" + "\033[0m")
 
                 while True:
                     try:
                         Vb = float(input("∘ initial volume of titrated base: Vb [L] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid volume [L]!" + "\033[0m")
 
                 acid = input("∘ chemical formula of titrant acid: ")
@@ -632,25 +1030,21 @@ def Titration():
                     try:
                         Ctit = float(input("∘ concentration of titrant acid: Ctit [molL⁻¹] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid concentration [molL⁻¹]!" + "\033[0m")
 
                 while True:
                     try:
                         Veq = float(input("∘ volume of titrant solution at (first) equivalence point: Veq [L] = "))
                         break
-                    except:
+                    except ValueError:
                         print("\033[1m" + "Enter a valid volume [L]!" + "\033[0m")
 
-                pKa = 14 - pKb
-
-                if pKa > 10.2:  # Strong base case
-                    print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
-                    Titration_sBsA(base, Vb, acid, Ctit, Veq)
+                l_pKb = [pKb for pKb in (pKb1, pKb2, pKb3) if pKb != "*"]
+                l_pKa = [14 - pKb for pKb in reversed(l_pKb)] # pKa of the conjugate acids, most protonated first
 
-                else:  # Weak base case
-                    print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
-                    Titration_wBsA(base, pKa, Vb, acid, Ctit, Veq)
+                print("\033[1m" + "\nFind hereafter the corresponding titration curve." + "\033[0m")
+                Titration_exact(base, l_pKa, Vb, acid, Ctit, Veq, kind="base")
                 break
-        except:
+        except ValueError:
             print("\033[1m" + "Make a valid choice (1/2)!" + "\033[0m")
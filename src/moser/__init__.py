@@ -3,15 +3,28 @@
 from BalanceEq import *
 from Concentration import *
 from Decompose import *
+from ElementMatrix import *
+from EquivalencePoint import *
 from HConcentration import *
+from IsotopePattern import *
 from MolarMass import *
+from PeriodicTable import *
 from Reaction_constant_activity import *
 from Reaction_constant_concentration import *
+from Reaction_equilibrium import *
 from Titration import *
 from calculate_speed import *
+from decimation import *
 from instantaneous_speed import *
+from kinetics_bootstrap import *
+from kinetics_dataset import *
+from kinetics_fit import *
+from kinetics_stream import *
 from main_moser import *
+from mass_action import *
 from reaction_order import *
 from read_file_and_enter_data import *
+from robust_fit import *
+from temperature_series import *
 
 __version__ = "0.0.1"
@@ -3,7 +3,9 @@ from read_file_and_enter_data import spacing
 import matplotlib.pyplot as plt
 import numpy as np
 
-def display_graph(times, velocity, ylabel = None, title = None, color = None, label = None):
+from decimation import downsample
+
+def display_graph(times, velocity, ylabel = None, title = None, color = None, label = None, decimate = True):
     """
     Display a graph of velocity versus time.
 
@@ -14,11 +16,15 @@ def display_graph(times, velocity, ylabel = None, title = None, color = None, la
         title (str, optional): Title for the plot. If None, default title is 'Evolution of the velocity of the reaction'.
         color (str, optional): Color of the plot line.
         label (str, optional): Label for the plot legend.
+        decimate (bool, optional): Whether to reduce long series to a screen resolution before
+            plotting (-> downsample), keeping their peaks. Defaults to True.
 
     Returns:
         None
     """
     times_interp = np.linspace(times[0], times[-1], len(velocity))
+    if decimate:
+        times_interp, velocity = downsample(times_interp, velocity)
     plt.plot(times_interp, velocity)
     plt.xlabel('Time (s)')
 
@@ -33,26 +39,45 @@ def display_graph(times, velocity, ylabel = None, title = None, color = None, la
         plt.title('Evolution of the velocity of the reaction')
     plt.show()
 
+def velocity_values(times, concentrations):
+    """
+    Calculate velocities using the first method, without displaying them.
+
+    The first velocity is the forward difference between the first two points, the next ones the
+    central differences around each inner point.
+
+    Args:
+        times (list of float): A list of time values.
+        concentrations (list of float or 2-D array): A list of corresponding concentration values,
+            or an array with one column per species.
+
+    Returns:
+        numpy.ndarray: The velocities, one row per point but the last (one column per species
+        for 2-D concentrations).
+    """
+    times = np.asarray(times, dtype=float)
+    concentrations = np.asarray(concentrations, dtype=float)
+    shape = (-1,) + (1,) * (concentrations.ndim - 1)
+    first = (concentrations[1:2] - concentrations[:1]) / (times[1] - times[0])
+    central = (concentrations[2:] - concentrations[:-2]) / (times[2:] - times[:-2]).reshape(shape)
+    return np.abs(np.concatenate([first, central]))
+
 def velocity_first(times, concentrations):
     """
     Calculate and display velocity using the first method.
 
     Args:
         times (list of float): A list of time values.
-        concentrations (list of float): A list of corresponding concentration values.
+        concentrations (list of float or 2-D array): A list of corresponding concentration values,
+            or an array with one column per species.
 
     Returns:
-        list of float: A list of calculated velocities.
+        list of float: A list of calculated velocities (an array with one column per species
+        for 2-D concentrations).
     """
-    velocities = []
-    velocities.append(abs((concentrations[1]-concentrations[0]))/times[1])
-    for i in range(1, len(concentrations)-1):
-        dt = times[i+1] - times[i-1]
-        dc = concentrations[i+1] - concentrations[i-1]
-        velocity = abs(dc / dt)
-        velocities.append(velocity)
+    velocities = velocity_values(times, concentrations)
     display_graph(times, velocities)
-    return velocities
+    return velocities.tolist() if velocities.ndim == 1 else velocities
 
 def velocity_second(concentrations, times):
     """
@@ -66,7 +91,7 @@ def velocity_second(concentrations, times):
         None
     """
     # Compute the derivative of the function using the gradient method
-    dy_dx = np.gradient(concentrations, times)
+    dy_dx = np.gradient(np.asarray(concentrations, dtype=float), np.asarray(times, dtype=float), axis=0)
     dy_dx = np.abs(dy_dx)
     display_graph(times, dy_dx)
 
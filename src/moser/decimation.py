@@ -0,0 +1,91 @@
+import numpy as np
+
+def minmax_indices(y, n_out):
+    """
+    Select the indices of the lowest and highest point of each bucket of consecutive points.
+
+    The points are split into n_out/2 buckets of equal counts; keeping the extremes of each one
+    draws the same envelope as the full series at a resolution of n_out/2 columns, so that no peak
+    or jump is lost.
+
+    Args:
+        y (numpy.ndarray): Values, of shape (N,) or (N, k) (the extremes of every column are kept).
+        n_out (int): Target number of points per column.
+
+    Returns:
+        numpy.ndarray: The sorted indices of the points to keep, including the first and last one.
+    """
+    n_points = len(y)
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n_points // n_buckets)
+    values = y.reshape(n_points, -1)
+    # The last bucket is padded by repeating the last point, whose index is kept anyway
+    padded = np.concatenate([values, np.repeat(values[-1:], n_buckets * size - n_points, axis=0)])
+    buckets = padded.reshape(n_buckets, size, -1)
+    offsets = (np.arange(n_buckets) * size)[:, None]
+    indices = np.concatenate([(offsets + np.argmin(buckets, axis=1)).ravel(),
+                              (offsets + np.argmax(buckets, axis=1)).ravel(), [0, n_points - 1]])
+    return np.unique(np.minimum(indices, n_points - 1))
+
+def lttb_indices(x, y, n_out):
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are kept; the others are split into n_out - 2 buckets, and each
+    bucket keeps the point forming the largest triangle with the point kept in the previous
+    bucket and the average of the next bucket, which preserves the visual shape of the series.
+
+    Args:
+        x (numpy.ndarray): Increasing abscissas, of shape (N,).
+        y (numpy.ndarray): Values, of shape (N,) or (N, k) (each column is decimated and the
+            indices are merged).
+        n_out (int): Target number of points per column (at least 3).
+
+    Returns:
+        numpy.ndarray: The sorted indices of the points to keep.
+    """
+    n_points = len(x)
+    values = y.reshape(n_points, -1)
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(int)
+    l_indices = [0, n_points - 1]
+    for column in values.T:
+        previous = 0
+        for i in range(n_out - 2):
+            start, end = edges[i], edges[i + 1]
+            if i + 2 < len(edges):
+                next_x, next_y = x[end:edges[i + 2]].mean(), column[end:edges[i + 2]].mean()
+            else:
+                next_x, next_y = x[-1], column[-1]
+            areas = np.abs((x[previous] - next_x) * (column[start:end] - column[previous])
+                           - (x[previous] - x[start:end]) * (next_y - column[previous]))
+            previous = start + int(np.argmax(areas))
+            l_indices.append(previous)
+    return np.unique(l_indices)
+
+def downsample(x, y, n_out=2000, method='minmax'):
+    """
+    Reduce a series to about a screen resolution of points before plotting it.
+
+    Series of n_out points or fewer are returned unchanged.
+
+    Args:
+        x (array-like): Increasing abscissas, of shape (N,).
+        y (array-like): Values, of shape (N,) or (N, k).
+        n_out (int): Target number of points per column. Defaults to 2000.
+        method (str): 'minmax' to keep the extremes of each bucket (exact envelope, fastest) or
+            'lttb' for Largest-Triangle-Three-Buckets (closest shape). Defaults to 'minmax'.
+
+    Returns:
+        tuple: The kept abscissas and values, as numpy arrays.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if method not in ('minmax', 'lttb'):
+        raise ValueError(f"Invalid method '{method}'. Choose between minmax and lttb.")
+    if len(x) <= max(n_out, 3):
+        return x, y
+    indices = minmax_indices(y, n_out) if method == 'minmax' else lttb_indices(x, y, max(n_out, 3))
+    return x[indices], y[indices]
@@ -0,0 +1,258 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from scipy import stats
+
+from kinetics_fit import linear_fit
+
+def linearize(concentrations, order):
+    """
+    Transform concentrations into the quantity linear in time for an order: c, ln(c) or 1/c.
+
+    Args:
+        concentrations (numpy.ndarray): Concentrations.
+        order (int): Order of the reaction (0, 1 or 2).
+
+    Returns:
+        numpy.ndarray: The transformed concentrations.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return [concentrations, np.log(concentrations), 1 / concentrations][order]
+
+def delinearize(values, order):
+    """
+    Transform back the output of `linearize` into concentrations.
+
+    Args:
+        values (numpy.ndarray): Values of c, ln(c) or 1/c.
+        order (int): Order of the reaction (0, 1 or 2).
+
+    Returns:
+        numpy.ndarray: The concentrations.
+    """
+    with np.errstate(divide='ignore', over='ignore'):
+        return [values, np.exp(values), 1 / values][order]
+
+def batch_rates(times, concentrations, order):
+    """
+    Fit the rate constant and half-life of many datasets of one order at once.
+
+    The least-squares lines of c, ln(c) or 1/c against time (one per row) give k = -slope, -slope
+    or slope, and the half-lives [A]0/(2k), ln(2)/k and 1/(k[A]0), [A]0 following from the intercept.
+
+    Args:
+        times (numpy.ndarray): Times, of shape (B, N).
+        concentrations (numpy.ndarray): Concentrations, of shape (B, N).
+        order (int): Order of the reaction (0, 1 or 2).
+
+    Returns:
+        tuple: The rate constants and half-lives, of shape (B,).
+    """
+    slopes, intercepts = linear_fit(times, linearize(concentrations, order))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if order == 0:
+            return -slopes, intercepts / (-2 * slopes)
+        if order == 1:
+            return -slopes, np.log(2) / -slopes
+        return slopes, intercepts / slopes
+
+def batch_orders(times, concentrations):
+    """
+    Determine the order of many datasets at once, as `TableAnalyzer` does.
+
+    The derivatives of c, ln(c) and 1/c between consecutive points are compared, the one with the
+    lowest coefficient of variation giving the order. Repeated times (drawn twice by a resampling)
+    are skipped.
+
+    Args:
+        times (numpy.ndarray): Increasing times, of shape (B, N).
+        concentrations (numpy.ndarray): Concentrations, of shape (B, N).
+
+    Returns:
+        numpy.ndarray: The order (0, 1 or 2) of each dataset, of shape (B,).
+    """
+    columns = np.stack([linearize(concentrations, order) for order in range(3)])
+    steps = np.diff(times, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derivatives = np.where(steps > 0, np.diff(columns, axis=-1) / steps, np.nan)
+        variations = np.abs(np.nanstd(derivatives, axis=-1) / np.nanmean(derivatives, axis=-1) * 100)
+    return np.argmin(np.nan_to_num(variations, nan=np.inf), axis=0)
+
+def bootstrap_chunk(times, concentrations, order, method, n_resamples, seed):
+    """
+    Draw and analyse one chunk of bootstrap resamples (-> bootstrap_rate).
+
+    Args:
+        times (numpy.ndarray): Times, of shape (N,).
+        concentrations (numpy.ndarray): Concentrations, of shape (N,).
+        order (int): Order of the reaction used for the rate constants.
+        method (str): 'residuals' or 'points'.
+        n_resamples (int): Number of resamples.
+        seed (numpy.random.SeedSequence): Seed of the chunk.
+
+    Returns:
+        tuple: The rate constants, half-lives and orders of the resamples.
+    """
+    rng = np.random.default_rng(seed)
+    n_points = times.size
+    indices = rng.integers(0, n_points, (n_resamples, n_points))
+    if method == 'residuals':
+        # The residuals of the linearised fit are added back to the fitted line in random order
+        slope, intercept = linear_fit(times[None], linearize(concentrations, order)[None])
+        fitted = intercept[0] + slope[0] * times
+        residuals = linearize(concentrations, order) - fitted
+        sample_times = np.broadcast_to(times, (n_resamples, n_points))
+        sample_concentrations = delinearize(fitted + residuals[indices], order)
+    else:
+        indices.sort(axis=1)
+        sample_times = times[indices]
+        sample_concentrations = concentrations[indices]
+    rate_constants, half_lives = batch_rates(sample_times, sample_concentrations, order)
+    return rate_constants, half_lives, batch_orders(sample_times, sample_concentrations)
+
+class RateUncertainty:
+    """
+    Uncertainty of the order, rate constant and half-life of a reaction (-> bootstrap_rate, jackknife_rate).
+
+    Attributes:
+        order (int): Order of the reaction, determined on the data or given.
+        rate_constant (float): Rate constant fitted on the data.
+        half_life (float): Half-life fitted on the data.
+        rate_constants (numpy.ndarray): Rate constant of each resample.
+        half_lives (numpy.ndarray): Half-life of each resample.
+        orders (numpy.ndarray): Order determined on each resample.
+        order_frequencies (numpy.ndarray): Fraction of the resamples deciding for order 0, 1 and 2.
+        rate_constant_error (float): Standard error of the rate constant.
+        half_life_error (float): Standard error of the half-life.
+        rate_constant_interval (tuple): Lower and upper confidence bounds of the rate constant.
+        half_life_interval (tuple): Lower and upper confidence bounds of the half-life.
+        confidence (float): Confidence level of the intervals.
+    """
+
+    def __init__(self, order, rate_constant, half_life, rate_constants, half_lives, orders,
+                 rate_constant_error, half_life_error, rate_constant_interval, half_life_interval, confidence):
+        """
+        Initializes a RateUncertainty instance.
+        """
+        self.order = order
+        self.rate_constant = rate_constant
+        self.half_life = half_life
+        self.rate_constants = rate_constants
+        self.half_lives = half_lives
+        self.orders = orders
+        self.order_frequencies = np.bincount(orders, minlength=3) / len(orders)
+        self.rate_constant_error = rate_constant_error
+        self.half_life_error = half_life_error
+        self.rate_constant_interval = rate_constant_interval
+        self.half_life_interval = half_life_interval
+        self.confidence = confidence
+
+def prepare(times, concentrations, order):
+    """
+    Convert the data to arrays and determine the order if it is not given.
+
+    Args:
+        times (array-like): Time values.
+        concentrations (array-like): Corresponding concentration values.
+        order (int or None): Order of the reaction.
+
+    Returns:
+        tuple: The times, concentrations, order, rate constant and half-life of the data.
+
+    Raises:
+        ValueError: If the order is not 0, 1 or 2, or there are fewer than three points.
+    """
+    times = np.asarray(times, dtype=float)
+    concentrations = np.asarray(concentrations, dtype=float)
+    if times.size < 3 or times.shape != concentrations.shape:
+        raise ValueError("Expected at least three times and as many concentrations.")
+    if order is None:
+        order = int(batch_orders(times[None], concentrations[None])[0])
+    if order not in (0, 1, 2):
+        raise ValueError(f"Invalid order {order}. Choose between 0, 1 and 2.")
+    rate_constant, half_life = batch_rates(times[None], concentrations[None], order)
+    return times, concentrations, order, float(rate_constant[0]), float(half_life[0])
+
+def bootstrap_rate(times, concentrations, order=None, n_resamples=2000, method='residuals', confidence=0.95,
+                   seed=None, processes=1, chunk_size=500):
+    """
+    Estimate the uncertainty of the rate constant, half-life and order decision by bootstrapping.
+
+    With method='residuals', the residuals of the linearised fit of the chosen order are resampled
+    and added back to the fitted line; with method='points', the (time, concentration) pairs are
+    resampled. The fits of all the resamples of a chunk are solved as one batch of least squares.
+    Chunks of `chunk_size` resamples get independent seeds spawned from `seed`, so the results
+    only depend on `seed` and `chunk_size`, however many processes share the chunks.
+
+    Args:
+        times (array-like): Time values.
+        concentrations (array-like): Corresponding concentration values.
+        order (int, optional): Order of the reaction. Defaults to the one of `determine_order`.
+        n_resamples (int): Number of resamples. Defaults to 2000.
+        method (str): 'residuals' or 'points'. Defaults to 'residuals'.
+        confidence (float): Confidence level of the percentile intervals. Defaults to 0.95.
+        seed (int or numpy.random.SeedSequence, optional): Seed of the resampling.
+        processes (int): Number of worker processes. Defaults to 1 (resample in this process).
+        chunk_size (int): Number of resamples per chunk. Defaults to 500.
+
+    Returns:
+        RateUncertainty: The estimates, resampled values and confidence intervals.
+
+    Raises:
+        ValueError: If the method or order is invalid.
+    """
+    if method not in ('residuals', 'points'):
+        raise ValueError(f"Invalid method '{method}'. Choose between residuals and points.")
+    times, concentrations, order, rate_constant, half_life = prepare(times, concentrations, order)
+
+    sizes = [chunk_size] * (n_resamples // chunk_size) + ([n_resamples % chunk_size] if n_resamples % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = (repeat(times), repeat(concentrations), repeat(order), repeat(method), sizes, seeds)
+    if processes == 1 or len(sizes) == 1:
+        l_chunks = list(map(bootstrap_chunk, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            l_chunks = list(executor.map(bootstrap_chunk, *arguments))
+    rate_constants, half_lives, orders = (np.concatenate(values) for values in zip(*l_chunks))
+
+    quantiles = [(1 - confidence) / 2, (1 + confidence) / 2]
+    return RateUncertainty(order, rate_constant, half_life, rate_constants, half_lives, orders,
+                           float(np.std(rate_constants, ddof=1)), float(np.std(half_lives, ddof=1)),
+                           tuple(np.quantile(rate_constants, quantiles).tolist()), tuple(np.quantile(half_lives, quantiles).tolist()),
+                           confidence)
+
+def jackknife_rate(times, concentrations, order=None, confidence=0.95):
+    """
+    Estimate the uncertainty of the rate constant, half-life and order decision by the jackknife.
+
+    The data are refitted once without each point (all the fits as one batch). The standard error
+    is sqrt((n - 1)/n Σ(θᵢ - θ̄)²) and the intervals are the estimates ± Student's t quantile with
+    n - 1 degrees of freedom times the standard error.
+
+    Args:
+        times (array-like): Time values.
+        concentrations (array-like): Corresponding concentration values.
+        order (int, optional): Order of the reaction. Defaults to the one of `determine_order`.
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+
+    Returns:
+        RateUncertainty: The estimates, leave-one-out values and confidence intervals.
+
+    Raises:
+        ValueError: If the order is invalid.
+    """
+    times, concentrations, order, rate_constant, half_life = prepare(times, concentrations, order)
+    n_points = times.size
+    kept = ~np.eye(n_points, dtype=bool)
+    sample_times = np.broadcast_to(times, (n_points, n_points))[kept].reshape(n_points, -1)
+    sample_concentrations = np.broadcast_to(concentrations, (n_points, n_points))[kept].reshape(n_points, -1)
+    rate_constants, half_lives = batch_rates(sample_times, sample_concentrations, order)
+
+    quantile = float(stats.t.ppf((1 + confidence) / 2, n_points - 1))
+    errors = [float(np.sqrt((n_points - 1) / n_points * np.sum((values - values.mean()) ** 2)))
+              for values in (rate_constants, half_lives)]
+    return RateUncertainty(order, rate_constant, half_life, rate_constants, half_lives,
+                           batch_orders(sample_times, sample_concentrations), errors[0], errors[1],
+                           (rate_constant - quantile * errors[0], rate_constant + quantile * errors[0]),
+                           (half_life - quantile * errors[1], half_life + quantile * errors[1]),
+                           confidence)
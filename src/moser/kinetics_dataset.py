@@ -0,0 +1,210 @@
+import numpy as np
+
+from read_file_and_enter_data import read_text, to_seconds
+from reaction_order import calculate_derivative, derivative_ln, calculate_derivative_of_inverse_concentration
+from calculate_speed import velocity_values
+from robust_fit import robust_rate_constants
+
+class KineticsDataset:
+    """
+    Concentrations of several species followed over a shared time axis.
+
+    The concentrations are stored in one contiguous float64 array with one row per time and one
+    column per species, so that every kinetics routine processes all the species at once.
+
+    Attributes:
+        times (numpy.ndarray): Times, in seconds.
+        data (numpy.ndarray): Concentrations, of shape (len(times), len(species)).
+        species (list of str): Names of the species (columns).
+    """
+
+    def __init__(self, times, data, species=None):
+        """
+        Initializes a KineticsDataset instance.
+
+        Args:
+            times (array-like): Times, in seconds.
+            data (array-like): Concentrations, one row per time and one column per species
+                (a 1-D array holds a single species).
+            species (list of str, optional): Names of the species. Defaults to "c1", "c2", ...
+
+        Raises:
+            ValueError: If the shapes of the times, concentrations and names do not match.
+        """
+        self.times = np.ascontiguousarray(times, dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 1:
+            data = data[:, None]
+        self.data = np.ascontiguousarray(data)
+        if species is None:
+            species = [f"c{i + 1}" for i in range(self.data.shape[1])]
+        self.species = list(species)
+
+        if self.times.ndim != 1 or self.data.ndim != 2 or self.data.shape[0] != self.times.size:
+            raise ValueError(f"Expected one row of concentrations per time, got {self.data.shape} for {self.times.size} times.")
+        if len(self.species) != self.data.shape[1]:
+            raise ValueError(f"Expected {self.data.shape[1]} species names, got {len(self.species)}.")
+
+    @classmethod
+    def from_source(cls, source, time_unit='s', skip_header=True):
+        """
+        Load a dataset from a multi-column file.
+
+        The first line holds the headers: the time column, then the name of each species. Each
+        following line holds a time and the concentration of each species, separated by whitespace.
+
+        Args:
+            source (str, os.PathLike, bytes or file-like): A path to the file, its content as bytes
+                or an open text or binary file.
+            time_unit (str): Unit of the time values, one of TIME_UNITS (s/min/h/days). Defaults to 's'.
+            skip_header (bool): Whether the first line holds headers. Defaults to True; without
+                headers, the species are named "c1", "c2", ...
+
+        Returns:
+            KineticsDataset: The dataset.
+
+        Raises:
+            ValueError: If the lines do not all have the same number of columns.
+        """
+        text = read_text(source)
+        if text is None:
+            raise ValueError("The source must be a path, bytes or a file; build arrays with KineticsDataset(times, data).")
+        lines = [line for line in text.splitlines() if line.strip()]
+        species = None
+        if skip_header:
+            species = lines[0].split()[1:]
+            lines = lines[1:]
+
+        n_columns = len(lines[0].split()) if lines else len(species or []) + 1
+        values = np.array(' '.join(lines).split(), dtype=np.float64)
+        if n_columns < 2 or values.size != n_columns * len(lines):
+            raise ValueError(f"Every line must hold a time and {n_columns - 1} concentrations.")
+        values = values.reshape(len(lines), n_columns)
+        if species is not None and len(species) != n_columns - 1:
+            species = None
+        return cls(to_seconds(values[:, 0], time_unit), values[:, 1:], species)
+
+    def __len__(self):
+        """
+        Returns the number of times.
+        """
+        return self.times.size
+
+    def __getitem__(self, name):
+        """
+        Returns the concentrations of one species (a view on the data).
+
+        Args:
+            name (str): Name of the species.
+
+        Returns:
+            numpy.ndarray: The concentrations of the species over time.
+        """
+        return self.data[:, self.species.index(name)]
+
+    def select(self, names):
+        """
+        Returns a dataset restricted to some species.
+
+        Args:
+            names (list of str): Names of the species to keep.
+
+        Returns:
+            KineticsDataset: The dataset of the selected species.
+        """
+        return KineticsDataset(self.times, self.data[:, [self.species.index(name) for name in names]], names)
+
+    def derivatives(self):
+        """
+        Returns the derivatives of the concentrations with respect to time (-> calculate_derivative).
+
+        Returns:
+            numpy.ndarray: Array of shape (len(times) - 1, len(species)).
+        """
+        return calculate_derivative(self.times, self.data)
+
+    def derivatives_ln(self):
+        """
+        Returns the derivatives of ln(concentrations) with respect to time (-> derivative_ln).
+
+        Returns:
+            numpy.ndarray: Array of shape (len(times) - 1, len(species)).
+        """
+        return derivative_ln(self.data, self.times)
+
+    def inverse_derivatives(self):
+        """
+        Returns the derivatives of 1/concentrations with respect to time
+        (-> calculate_derivative_of_inverse_concentration).
+
+        Returns:
+            numpy.ndarray: Array of shape (len(times) - 1, len(species)).
+        """
+        return calculate_derivative_of_inverse_concentration(self.data, self.times)
+
+    def velocities(self, method='first'):
+        """
+        Returns the velocities of the reaction for each species.
+
+        Args:
+            method (str): 'first' for the differences of `velocity_first` (one row per time but the
+                last), 'gradient' for `numpy.gradient` as in `velocity_second` (one row per time).
+
+        Returns:
+            numpy.ndarray: The absolute velocities, one column per species.
+
+        Raises:
+            ValueError: If the method is unknown.
+        """
+        if method == 'first':
+            return velocity_values(self.times, self.data)
+        if method == 'gradient':
+            return np.abs(np.gradient(self.data, self.times, axis=0))
+        raise ValueError(f"Invalid method '{method}'. Choose between first and gradient.")
+
+    def coefficients_of_variation(self):
+        """
+        Returns the coefficients of variation of the derivatives of c, ln(c) and 1/c of each species.
+
+        Returns:
+            numpy.ndarray: Array of shape (3, len(species)), in percent.
+        """
+        columns = np.stack([self.derivatives(), self.derivatives_ln(), self.inverse_derivatives()])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.abs(columns.std(axis=1) / columns.mean(axis=1) * 100)
+
+    def orders(self):
+        """
+        Returns the order of the reaction for each species.
+
+        As in `TableAnalyzer`, the order is given by the most constant derivative: of c (zero
+        order), ln(c) (first order) or 1/c (second order).
+
+        Returns:
+            numpy.ndarray: The order (0, 1 or 2) of each species.
+        """
+        return np.argmin(np.nan_to_num(self.coefficients_of_variation(), nan=np.inf), axis=0)
+
+    def rate_constants(self, orders=None, method='ols'):
+        """
+        Returns the rate constant of each species from the line of c, ln(c) or 1/c against time.
+
+        Args:
+            orders (array-like, optional): Order of each species. Defaults to `orders()`.
+            method (str): 'ols' for least squares, 'huber' or 'ransac' for a fit robust to
+                outliers (-> robust_rate_constants). Defaults to 'ols'.
+
+        Returns:
+            numpy.ndarray: The rate constant of each species (M.s⁻¹, s⁻¹ or M⁻¹.s⁻¹).
+        """
+        orders = self.orders() if orders is None else np.broadcast_to(orders, (self.data.shape[1],))
+        if method != 'ols':
+            return robust_rate_constants(self.times, self.data.T, orders, method)[1]
+        transforms = [self.data, np.log(self.data), 1 / self.data]
+        signs = [-1, -1, 1]
+        constants = np.empty(self.data.shape[1])
+        for order in np.unique(orders):
+            columns = orders == order
+            slopes = np.polyfit(self.times, transforms[order][:, columns], 1)[0]
+            constants[columns] = signs[order] * slopes
+        return constants
@@ -0,0 +1,373 @@
+import numpy as np
+from scipy import stats
+
+def zero_order(t, p):
+    """
+    Integrated zero-order rate law [A] = [A]0 - k t, with its Jacobian.
+
+    Args:
+        t (numpy.ndarray): Times, of shape (B, N).
+        p (numpy.ndarray): Parameters ([A]0, k), of shape (B, 2).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 2).
+    """
+    c0, k = p[:, :1], p[:, 1:]
+    return c0 - k * t, np.stack([np.ones_like(t), -t], axis=-1)
+
+def first_order(t, p):
+    """
+    Integrated first-order rate law [A] = [A]0 exp(-k t), with its Jacobian.
+
+    Args:
+        t (numpy.ndarray): Times, of shape (B, N).
+        p (numpy.ndarray): Parameters ([A]0, k), of shape (B, 2).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 2).
+    """
+    c0, k = p[:, :1], p[:, 1:]
+    e = np.exp(-k * t)
+    return c0 * e, np.stack([e, -c0 * t * e], axis=-1)
+
+def second_order(t, p):
+    """
+    Integrated second-order rate law [A] = [A]0 / (1 + [A]0 k t), with its Jacobian.
+
+    Args:
+        t (numpy.ndarray): Times, of shape (B, N).
+        p (numpy.ndarray): Parameters ([A]0, k), of shape (B, 2).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 2).
+    """
+    c0, k = p[:, :1], p[:, 1:]
+    d = 1 + c0 * k * t
+    return c0 / d, np.stack([1 / d ** 2, -c0 ** 2 * t / d ** 2], axis=-1)
+
+def consecutive(t, p):
+    """
+    Intermediate B of consecutive first-order reactions A → B → C, starting from A only:
+    [B] = [A]0 k1 / (k2 - k1) (exp(-k1 t) - exp(-k2 t)), with its Jacobian.
+
+    Args:
+        t (numpy.ndarray): Times, of shape (B, N).
+        p (numpy.ndarray): Parameters ([A]0, k1, k2), of shape (B, 3).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 3).
+    """
+    a0, k1, k2 = p[:, :1], p[:, 1:2], p[:, 2:]
+    # Equal rate constants make the expression 0/0; they are split by a relative 1e-7
+    k2 = np.where(np.abs(k2 - k1) < 1e-7 * np.abs(k1), k1 * (1 + 1e-7), k2)
+    e1 = np.exp(-k1 * t)
+    e2 = np.exp(-k2 * t)
+    r = k1 / (k2 - k1)
+    dr_dk1 = k2 / (k2 - k1) ** 2
+    dr_dk2 = -k1 / (k2 - k1) ** 2
+    return a0 * r * (e1 - e2), np.stack([r * (e1 - e2),
+                                          a0 * (dr_dk1 * (e1 - e2) - r * t * e1),
+                                          a0 * (dr_dk2 * (e1 - e2) + r * t * e2)], axis=-1)
+
+def reversible(t, p):
+    """
+    Reactant A of a reversible first-order reaction A ⇌ B, starting from A only:
+    [A] = [A]0 (kr + kf exp(-(kf + kr) t)) / (kf + kr), with its Jacobian.
+
+    Args:
+        t (numpy.ndarray): Times, of shape (B, N).
+        p (numpy.ndarray): Parameters ([A]0, kf, kr), of shape (B, 3).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 3).
+    """
+    a0, kf, kr = p[:, :1], p[:, 1:2], p[:, 2:]
+    s = kf + kr
+    e = np.exp(-s * t)
+    fraction = (kr + kf * e) / s
+    return a0 * fraction, np.stack([fraction,
+                                     a0 * ((e - kf * t * e) * s - (kr + kf * e)) / s ** 2,
+                                     a0 * ((1 - kf * t * e) * s - (kr + kf * e)) / s ** 2], axis=-1)
+
+def michaelis_menten(s, p):
+    """
+    Michaelis–Menten rate law v = Vmax [S] / (Km + [S]), with its Jacobian.
+
+    Args:
+        s (numpy.ndarray): Substrate concentrations, of shape (B, N).
+        p (numpy.ndarray): Parameters (Vmax, Km), of shape (B, 2).
+
+    Returns:
+        tuple: The model, of shape (B, N), and its Jacobian, of shape (B, N, 2).
+    """
+    vmax, km = p[:, :1], p[:, 1:]
+    d = km + s
+    return vmax * s / d, np.stack([s / d, -vmax * s / d ** 2], axis=-1)
+
+def linear_fit(x, y, weights=None):
+    """
+    Fit one weighted least-squares line per row.
+
+    Args:
+        x (numpy.ndarray): Abscissas, of shape (B, N).
+        y (numpy.ndarray): Ordinates, of shape (B, N).
+        weights (numpy.ndarray, optional): Weights of the points, of shape (B, N). Defaults to 1.
+
+    Returns:
+        tuple: The slopes and intercepts, of shape (B,).
+    """
+    if weights is None:
+        weights = np.ones_like(y)
+    total = weights.sum(axis=1, keepdims=True)
+    x_mean = (weights * x).sum(axis=1, keepdims=True) / total
+    y_mean = (weights * y).sum(axis=1, keepdims=True) / total
+    slope = (weights * (x - x_mean) * (y - y_mean)).sum(axis=1) / (weights * (x - x_mean) ** 2).sum(axis=1)
+    return slope, y_mean[:, 0] - slope * x_mean[:, 0]
+
+def initial_guess(model, x, y):
+    """
+    Estimate starting parameters from linearised forms of the models.
+
+    Args:
+        model (str): Name of the model (see MODELS).
+        x (numpy.ndarray): Times (substrate concentrations for Michaelis–Menten), of shape (B, N).
+        y (numpy.ndarray): Observations, of shape (B, N).
+
+    Returns:
+        numpy.ndarray: The starting parameters, of shape (B, P).
+    """
+    tiny = np.finfo(float).tiny
+    # The linearised points are weighted by the inverse of their propagated variance
+    # (y² for ln(y), y⁴ for 1/y); points at or below zero get no weight
+    positive = np.maximum(y, tiny)
+    weights = np.where(y > 0, positive, 0)
+    if model == 'zero':
+        slope, intercept = linear_fit(x, y)
+        return np.stack([intercept, -slope], axis=1)
+    if model == 'first':
+        slope, intercept = linear_fit(x, np.log(positive), weights ** 2)
+        return np.stack([np.exp(intercept), -slope], axis=1)
+    if model == 'second':
+        slope, intercept = linear_fit(x, 1 / positive, weights ** 4)
+        return np.stack([1 / intercept, slope], axis=1)
+    if model == 'consecutive':
+        # Around the maximum of B, t_max ≈ 1/k for k1 ≈ k2
+        rows = np.arange(len(y))
+        peak = np.argmax(y, axis=1)
+        t_peak = np.maximum(x[rows, peak], tiny)
+        k1, k2 = 1.25 / t_peak, 0.8 / t_peak
+        shape = k1 / (k2 - k1) * (np.exp(-k1 * t_peak) - np.exp(-k2 * t_peak))
+        return np.stack([y[rows, peak] / shape, k1, k2], axis=1)
+    if model == 'reversible':
+        # The approach to equilibrium is half done after ln(2)/(kf + kr)
+        a0, a_eq = y[:, 0], y[:, -1]
+        half = np.argmax(y <= ((a0 + a_eq) / 2)[:, None], axis=1)
+        t_half = np.maximum(x[np.arange(len(y)), np.maximum(half, 1)], tiny)
+        s = np.log(2) / t_half
+        ratio = np.clip(a_eq / a0, 1e-3, 1 - 1e-3)
+        return np.stack([a0, s * (1 - ratio), s * ratio], axis=1)
+    if model == 'michaelis_menten':
+        # Hanes–Woolf plot: [S]/v = Km/Vmax + [S]/Vmax
+        slope, intercept = linear_fit(x, x / y)
+        return np.stack([1 / slope, intercept / slope], axis=1)
+    raise ValueError(f"Invalid model '{model}'. Choose between {', '.join(MODELS)}.")
+
+MODELS = {'zero': (zero_order, ('c0', 'k')),
+          'first': (first_order, ('c0', 'k')),
+          'second': (second_order, ('c0', 'k')),
+          'consecutive': (consecutive, ('a0', 'k1', 'k2')),
+          'reversible': (reversible, ('a0', 'kf', 'kr')),
+          'michaelis_menten': (michaelis_menten, ('vmax', 'km'))}
+
+def levenberg_marquardt(function, x, y, p0, max_iter=200, tol=1e-10):
+    """
+    Fit many curves at once with the Levenberg–Marquardt algorithm.
+
+    Each curve keeps its own damping factor, divided by 10 after a step lowering its residual sum
+    of squares and multiplied by 10 otherwise (Marquardt's scaling by the diagonal of JᵀJ). Curves
+    stop iterating once their relative decrease of the sum of squares or their relative step falls
+    below `tol`, or once their damping exceeds 1e16 (no step lowers the sum of squares any more);
+    the normal equations of the remaining ones are solved as one batch.
+
+    Args:
+        function (callable): Model returning the predictions (B, N) and Jacobian (B, N, P) for
+            abscissas (B, N) and parameters (B, P).
+        x (numpy.ndarray): Abscissas, of shape (B, N).
+        y (numpy.ndarray): Observations, of shape (B, N).
+        p0 (numpy.ndarray): Starting parameters, of shape (B, P).
+        max_iter (int): Largest number of iterations. Defaults to 200.
+        tol (float): Relative tolerance on the sum of squares and on the steps. Defaults to 1e-10.
+
+    Returns:
+        tuple: The parameters (B, P), the residual sums of squares (B,), whether each fit
+        converged (B,) and the number of iterations performed.
+    """
+    p = np.array(p0, dtype=float)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        n_params = p.shape[1]
+        residuals = y - function(x, p)[0]
+        ssr = np.einsum('bn,bn->b', residuals, residuals)
+        damping = np.full(len(p), 1e-3)
+        converged = np.zeros(len(p), dtype=bool)
+        stalled = ~np.isfinite(ssr)
+
+        iteration = 0
+        for iteration in range(1, max_iter + 1):
+            active = np.flatnonzero(~(converged | stalled))
+            if active.size == 0:
+                break
+            xa, pa = x[active], p[active]
+            jacobian = function(xa, pa)[1]
+            jtj = np.einsum('bnp,bnq->bpq', jacobian, jacobian)
+            gradient = np.einsum('bnp,bn->bp', jacobian, residuals[active])
+            diagonal = np.diagonal(jtj, axis1=1, axis2=2)
+            scale = np.maximum(diagonal, 1e-12 * diagonal.max(axis=1, keepdims=True) + np.finfo(float).tiny)
+            system = jtj + (damping[active, None] * scale)[:, :, None] * np.eye(n_params)
+            try:
+                step = np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+            except np.linalg.LinAlgError:
+                step = np.stack([np.linalg.lstsq(a, b, rcond=None)[0] for a, b in zip(system, gradient)])
+
+            p_new = pa + step
+            residuals_new = y[active] - function(xa, p_new)[0]
+            ssr_new = np.einsum('bn,bn->b', residuals_new, residuals_new)
+            better = np.isfinite(ssr_new) & (ssr_new <= ssr[active])
+
+            accepted = active[better]
+            small_decrease = ssr[accepted] - ssr_new[better] <= tol * ssr[accepted]
+            small_step = np.all(np.abs(step[better]) <= tol * (np.abs(pa[better]) + tol), axis=1)
+            p[accepted] = p_new[better]
+            residuals[accepted] = residuals_new[better]
+            ssr[accepted] = ssr_new[better]
+            converged[accepted] = small_decrease | small_step
+
+            damping[active] = np.where(better, damping[active] / 10, damping[active] * 10)
+            stalled[active] = damping[active] > 1e16
+            # A fit whose damping explodes cannot lower its sum of squares even by vanishing
+            # gradient steps: it sits at a minimum, whatever the size of its residuals
+            converged[active] |= stalled[active] & np.isfinite(ssr[active])
+
+    return p, ssr, converged, iteration
+
+class KineticFit:
+    """
+    Result of the fit of a kinetic model to one or many datasets (-> fit_kinetic_model).
+
+    Attributes:
+        model (str): Name of the model.
+        names (tuple of str): Names of the parameters.
+        parameters (numpy.ndarray): Best-fit parameters, of shape (..., P).
+        standard_errors (numpy.ndarray): Standard errors of the parameters, of shape (..., P).
+        confidence_intervals (numpy.ndarray): Lower and upper bounds of the parameters, of shape (..., P, 2).
+        residual_sum_of_squares (numpy.ndarray): Residual sum of squares of each fit, of shape (...).
+        converged (numpy.ndarray): Whether each fit converged, of shape (...).
+        iterations (int): Number of Levenberg–Marquardt iterations performed.
+    """
+
+    def __init__(self, model, parameters, standard_errors, confidence_intervals, residual_sum_of_squares, converged, iterations):
+        """
+        Initializes a KineticFit instance.
+        """
+        self.model = model
+        self.names = MODELS[model][1]
+        self.parameters = parameters
+        self.standard_errors = standard_errors
+        self.confidence_intervals = confidence_intervals
+        self.residual_sum_of_squares = residual_sum_of_squares
+        self.converged = converged
+        self.iterations = iterations
+
+    def __getitem__(self, name):
+        """
+        Returns the best-fit values of one parameter.
+
+        Args:
+            name (str): Name of the parameter (e.g. 'k').
+
+        Returns:
+            numpy.ndarray: The values of the parameter, of shape (...).
+        """
+        return self.parameters[..., self.names.index(name)]
+
+    def predict(self, x):
+        """
+        Evaluates the fitted model.
+
+        Args:
+            x (array-like): Times (substrate concentrations for Michaelis–Menten), of shape (N,).
+
+        Returns:
+            numpy.ndarray: The predictions, of shape (..., N).
+        """
+        x = np.asarray(x, dtype=float)
+        parameters = self.parameters.reshape(-1, len(self.names))
+        predictions = MODELS[self.model][0](np.broadcast_to(x, (len(parameters), x.size)), parameters)[0]
+        return predictions.reshape(self.parameters.shape[:-1] + (x.size,))
+
+def fit_kinetic_model(x, y, model='first', p0=None, confidence=0.95, max_iter=200, tol=1e-10):
+    """
+    Fit a kinetic model to one or many datasets with analytic Jacobians and Levenberg–Marquardt.
+
+    Available models (see MODELS), with their parameters:
+    - 'zero', 'first', 'second': integrated rate laws of [A] (c0, k)
+    - 'consecutive': intermediate B of A → B → C (a0, k1, k2); swapping k1 and k2 while scaling
+      a0 by k1/k2 gives the same curve, so without `p0` the solution with k1 >= k2 is returned
+    - 'reversible': reactant A of A ⇌ B (a0, kf, kr)
+    - 'michaelis_menten': velocity against substrate concentration (vmax, km)
+    Starting parameters are taken from linearised forms of the models unless given. The confidence
+    intervals follow from the covariance s²(JᵀJ)⁻¹ and Student's t distribution with N - P degrees
+    of freedom.
+
+    Args:
+        x (array-like): Times (substrate concentrations for Michaelis–Menten), of shape (N,) or
+            the shape of `y`.
+        y (array-like): Observations, of shape (N,) for one dataset or (..., N) for many.
+        model (str): Name of the model. Defaults to 'first'.
+        p0 (array-like, optional): Starting parameters, of shape (P,) or (..., P).
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+        max_iter (int): Largest number of iterations. Defaults to 200.
+        tol (float): Relative tolerance on the sum of squares and on the steps. Defaults to 1e-10.
+
+    Returns:
+        KineticFit: The parameters, standard errors and confidence intervals of each dataset.
+
+    Raises:
+        ValueError: If the model is unknown.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Invalid model '{model}'. Choose between {', '.join(MODELS)}.")
+    function, names = MODELS[model]
+    y = np.asarray(y, dtype=float)
+    batch_shape = y.shape[:-1]
+    n_points = y.shape[-1]
+    y2 = y.reshape(-1, n_points)
+    x2 = np.broadcast_to(np.asarray(x, dtype=float), y.shape).reshape(-1, n_points)
+
+    guessed = p0 is None
+    if guessed:
+        p0 = initial_guess(model, x2, y2)
+    else:
+        p0 = np.broadcast_to(np.asarray(p0, dtype=float), batch_shape + (len(names),)).reshape(-1, len(names))
+
+    parameters, ssr, converged, iterations = levenberg_marquardt(function, x2, y2, p0, max_iter, tol)
+    if model == 'consecutive' and guessed:
+        swapped = parameters[:, 1] < parameters[:, 2]
+        parameters[swapped] = parameters[swapped][:, [0, 2, 1]]
+        parameters[swapped, 0] *= parameters[swapped, 2] / parameters[swapped, 1]
+
+    dof = n_points - len(names)
+    jacobian = function(x2, parameters)[1]
+    jtj = np.einsum('bnp,bnq->bpq', jacobian, jacobian)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = np.linalg.pinv(jtj) * (ssr / dof if dof > 0 else np.nan)[:, None, None]
+        standard_errors = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    half_width = stats.t.ppf((1 + confidence) / 2, dof) * standard_errors if dof > 0 else np.full_like(standard_errors, np.nan)
+    intervals = np.stack([parameters - half_width, parameters + half_width], axis=-1)
+
+    return KineticFit(model,
+                      parameters.reshape(batch_shape + (len(names),)),
+                      standard_errors.reshape(batch_shape + (len(names),)),
+                      intervals.reshape(batch_shape + (len(names), 2)),
+                      ssr.reshape(batch_shape),
+                      converged.reshape(batch_shape),
+                      iterations)
@@ -0,0 +1,280 @@
+import asyncio
+import math
+import numpy as np
+
+def parse_record(line):
+    """
+    Parse one newline-delimited (time, concentration) record.
+
+    The values may be separated by whitespace, a comma or a semicolon. Blank lines, comments
+    (starting with '#') and headers yield None.
+
+    Args:
+        line (bytes or str): The record.
+
+    Returns:
+        tuple or None: The time and concentration as floats, or None if the line holds no record.
+    """
+    if isinstance(line, bytes):
+        line = line.decode(errors='replace')
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    fields = line.replace(',', ' ').replace(';', ' ').split()
+    if len(fields) != 2:
+        return None
+    try:
+        return float(fields[0]), float(fields[1])
+    except ValueError:
+        return None
+
+async def read_records(reader, chunk_size=256, flush_interval=None):
+    """
+    Read (time, concentration) records from a stream and batch them into NumPy chunks.
+
+    Records are read line by line from any `asyncio.StreamReader` (a TCP connection, a pipe, ...).
+    A chunk is yielded once `chunk_size` records are buffered, when no record arrived for
+    `flush_interval` seconds, and at the end of the stream.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+        chunk_size (int): Number of records per chunk. Defaults to 256.
+        flush_interval (float, optional): Idle time in seconds after which a partial chunk is
+            yielded. Defaults to None (wait for a full chunk or the end of the stream).
+
+    Yields:
+        tuple: Two numpy arrays - the times and the concentrations of the chunk.
+    """
+    times = []
+    concentrations = []
+    while True:
+        try:
+            if flush_interval is None or not times:
+                line = await reader.readline()
+            else:
+                line = await asyncio.wait_for(reader.readline(), flush_interval)
+        except asyncio.TimeoutError:
+            yield np.array(times), np.array(concentrations)
+            times, concentrations = [], []
+            continue
+        if not line:
+            break
+        record = parse_record(line)
+        if record is None:
+            continue
+        times.append(record[0])
+        concentrations.append(record[1])
+        if len(times) >= chunk_size:
+            yield np.array(times), np.array(concentrations)
+            times, concentrations = [], []
+    if times:
+        yield np.array(times), np.array(concentrations)
+
+class StreamingKinetics:
+    """
+    Incremental rate and order analysis of concentration-time data received in chunks.
+
+    For each chunk, the derivatives of c, ln(c) and 1/c with respect to time are computed between
+    consecutive points, including across chunk boundaries. Their running statistics decide the
+    order of the reaction as `TableAnalyzer` does: the column with the lowest coefficient of
+    variation is constant, i.e. zero, first or second order. Running least-squares sums of c, ln(c)
+    and 1/c against time give the rate constant of each order.
+
+    Attributes:
+        count (int): Number of points received.
+        last_time (float): Time of the last point received.
+        last_concentration (float): Concentration of the last point received.
+        velocity (float): Latest reaction velocity -dc/dt.
+        n_derivatives (int): Number of derivatives computed.
+        means (numpy.ndarray): Running means of the derivatives of c, ln(c) and 1/c.
+        squares (numpy.ndarray): Running sums of squared deviations of the derivatives.
+        sums (numpy.ndarray): Running sums of t, t², y and t*y (columns) for y = c, ln(c), 1/c (rows).
+    """
+
+    def __init__(self):
+        """
+        Initializes a StreamingKinetics instance with no data.
+        """
+        self.count = 0
+        self.last_time = None
+        self.last_concentration = None
+        self.velocity = float('nan')
+        self.n_derivatives = 0
+        self.means = np.zeros(3)
+        self.squares = np.zeros(3)
+        self.sums = np.zeros((3, 4))
+
+    def update(self, times, concentrations):
+        """
+        Adds a chunk of points to the analysis.
+
+        Args:
+            times (array-like): Times of the new points, following the previous ones.
+            concentrations (array-like): Concentrations of the new points.
+
+        Returns:
+            numpy.ndarray: The derivatives of c, ln(c) and 1/c (one row each) between consecutive
+            points, ending at each new point (the very first point of the stream has none).
+        """
+        times = np.asarray(times, dtype=float)
+        concentrations = np.asarray(concentrations, dtype=float)
+        if times.size == 0:
+            return np.empty((3, 0))
+
+        columns = np.stack([concentrations, np.log(concentrations), 1 / concentrations])
+        self.sums[:, 0] += times.sum()
+        self.sums[:, 1] += (times * times).sum()
+        self.sums[:, 2] += columns.sum(axis=1)
+        self.sums[:, 3] += columns @ times
+
+        t = times
+        if self.last_time is not None:
+            t = np.concatenate([[self.last_time], times])
+            c = np.concatenate([[self.last_concentration], concentrations])
+            columns = np.stack([c, np.log(c), 1 / c])
+        derivatives = np.diff(columns, axis=1) / np.diff(t)
+
+        # Merges the statistics of the chunk with the running ones (parallel variance algorithm)
+        n = derivatives.shape[1]
+        if n:
+            mean = derivatives.mean(axis=1)
+            squares = ((derivatives - mean[:, None]) ** 2).sum(axis=1)
+            total = self.n_derivatives + n
+            delta = mean - self.means
+            self.means = self.means + delta * n / total
+            self.squares = self.squares + squares + delta ** 2 * self.n_derivatives * n / total
+            self.n_derivatives = total
+            self.velocity = -derivatives[0, -1]
+
+        self.count += times.size
+        self.last_time = times[-1]
+        self.last_concentration = concentrations[-1]
+        return derivatives
+
+    def coefficients_of_variation(self):
+        """
+        Returns the coefficients of variation of the derivatives of c, ln(c) and 1/c.
+
+        Returns:
+            numpy.ndarray: The coefficients of variation in percent (NaN before two points).
+        """
+        if self.n_derivatives == 0:
+            return np.full(3, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.abs(np.sqrt(self.squares / self.n_derivatives) / self.means * 100)
+
+    def order(self):
+        """
+        Returns the order of the reaction determined so far.
+
+        Returns:
+            int or None: 0, 1 or 2, or None before two points have been received.
+        """
+        variations = self.coefficients_of_variation()
+        if np.all(np.isnan(variations)):
+            return None
+        return int(np.nanargmin(variations))
+
+    def rate_constant(self, order=None):
+        """
+        Returns the rate constant of the reaction, from the least-squares line of c, ln(c) or 1/c
+        against time.
+
+        Args:
+            order (int, optional): Order of the reaction. Defaults to the order determined so far.
+
+        Returns:
+            float: The rate constant (M.s⁻¹, s⁻¹ or M⁻¹.s⁻¹), NaN before two points.
+        """
+        if order is None:
+            order = self.order()
+        if order is None:
+            return float('nan')
+        sum_t, sum_t2, sum_y, sum_ty = self.sums[order]
+        denominator = self.count * sum_t2 - sum_t ** 2
+        if denominator == 0:
+            return float('nan')
+        slope = (self.count * sum_ty - sum_t * sum_y) / denominator
+        return slope if order == 2 else -slope
+
+    def half_life(self):
+        """
+        Returns the half-life of a first-order reaction, ln(2)/k.
+
+        Returns:
+            float: The half-life in the time unit of the data.
+        """
+        return math.log(2) / self.rate_constant(order=1)
+
+async def ingest_stream(reader, analyzer=None, chunk_size=256, flush_interval=None, on_chunk=None):
+    """
+    Feed the records of a stream into an incremental kinetics analysis.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+        analyzer (StreamingKinetics, optional): The analysis to update. Defaults to a new one.
+        chunk_size (int): Number of records per chunk. Defaults to 256.
+        flush_interval (float, optional): Idle time in seconds after which a partial chunk is
+            analysed. Defaults to None.
+        on_chunk (callable, optional): Called as on_chunk(analyzer, times, concentrations,
+            derivatives) after each chunk; it may be a coroutine function.
+
+    Returns:
+        StreamingKinetics: The analysis, once the stream has ended.
+    """
+    if analyzer is None:
+        analyzer = StreamingKinetics()
+    async for times, concentrations in read_records(reader, chunk_size, flush_interval):
+        derivatives = analyzer.update(times, concentrations)
+        if on_chunk is not None:
+            result = on_chunk(analyzer, times, concentrations, derivatives)
+            if asyncio.iscoroutine(result):
+                await result
+    return analyzer
+
+async def ingest_streams(readers, chunk_size=256, flush_interval=None, on_chunk=None):
+    """
+    Analyse several streams (e.g. one per instrument) concurrently on one event loop.
+
+    Args:
+        readers (dict): The streams to read from, keyed by instrument name.
+        chunk_size (int): Number of records per chunk. Defaults to 256.
+        flush_interval (float, optional): Idle time in seconds after which a partial chunk is
+            analysed. Defaults to None.
+        on_chunk (callable, optional): Called as on_chunk(name, analyzer, times, concentrations,
+            derivatives) after each chunk; it may be a coroutine function.
+
+    Returns:
+        dict: The analysis of each stream, keyed by instrument name. A stream that failed holds
+        its exception instead.
+    """
+    names = list(readers)
+
+    def callback(name):
+        if on_chunk is None:
+            return None
+        return lambda *args: on_chunk(name, *args)
+
+    results = await asyncio.gather(*(ingest_stream(readers[name], chunk_size=chunk_size, flush_interval=flush_interval,
+                                                   on_chunk=callback(name)) for name in names),
+                                   return_exceptions=True)
+    return dict(zip(names, results))
+
+async def ingest_connection(host, port, **kwargs):
+    """
+    Connect to an instrument over TCP and analyse the records it sends until it closes the connection.
+
+    Args:
+        host (str): Host name or address of the instrument.
+        port (int): TCP port of the instrument.
+        **kwargs: Passed to `ingest_stream`.
+
+    Returns:
+        StreamingKinetics: The analysis of the records received.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await ingest_stream(reader, **kwargs)
+    finally:
+        writer.close()
+        await writer.wait_closed()
@@ -0,0 +1,201 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.sparse import csc_matrix
+
+from BalanceEq import BalanceEqBasis
+
+class ReactionNetwork:
+    """
+    Elementary reactions following the law of mass action.
+
+    The rate of reaction j is r_j = k_j ∏ c_i^a_ji, where a_ji is the stoichiometric coefficient of
+    species i among the reactants of j, and the species evolve as dc_i/dt = Σ_j ν_ji r_j, where ν_ji
+    is the net stoichiometric coefficient (products minus reactants).
+
+    Attributes:
+        species (list of str): Names of the species, in order of first appearance.
+        orders (numpy.ndarray): Reactant coefficients a, of shape (len(reactions), len(species)).
+        stoichiometry (numpy.ndarray): Net coefficients ν, of shape (len(reactions), len(species)).
+    """
+
+    def __init__(self, reactions):
+        """
+        Initializes a ReactionNetwork instance.
+
+        Args:
+            reactions (list of tuple): One balanced reaction each, as returned by `BalanceEq`:
+                (reactants, products, reactant coefficients, product coefficients, ...).
+        """
+        self.species = []
+        for reaction in reactions:
+            for name in list(reaction[0]) + list(reaction[1]):
+                if name not in self.species:
+                    self.species.append(name)
+
+        self.orders = np.zeros((len(reactions), len(self.species)))
+        self.stoichiometry = np.zeros((len(reactions), len(self.species)))
+        for j, (reactants, products, coefs_reactants, coefs_products) in enumerate(reaction[:4] for reaction in reactions):
+            for name, coef in zip(reactants, coefs_reactants):
+                self.orders[j, self.species.index(name)] += coef
+                self.stoichiometry[j, self.species.index(name)] -= coef
+            for name, coef in zip(products, coefs_products):
+                self.stoichiometry[j, self.species.index(name)] += coef
+
+    @classmethod
+    def from_equations(cls, equations, reversible=False):
+        """
+        Balance equations with `BalanceEqBasis` and build their network.
+
+        Args:
+            equations (list of tuple): One (reactants, products) pair of lists each.
+            reversible (bool): Whether to add the reverse of each reaction, right after it.
+                Defaults to False.
+
+        Returns:
+            ReactionNetwork: The network of the balanced reactions.
+
+        Raises:
+            ElementMismatchError: If an element shows up on one side of an equation only.
+            NoBalanceError: If only null or negative coefficients balance an equation.
+            UnderdeterminedReactionError: If an equation has several independent balancings.
+        """
+        reactions = []
+        for reactants, products in equations:
+            result = BalanceEqBasis(list(reactants), list(products)).to_tuple()
+            reactions.append(result)
+            if reversible:
+                reactions.append((result[1], result[0], result[3], result[2]))
+        return cls(reactions)
+
+    def rates(self, concentrations, rate_constants):
+        """
+        Returns the rate of each reaction.
+
+        Args:
+            concentrations (numpy.ndarray): Concentrations, of shape (..., len(species)).
+            rate_constants (numpy.ndarray): Rate constants, of shape (..., len(reactions)).
+
+        Returns:
+            numpy.ndarray: The rates, of shape (..., len(reactions)).
+        """
+        concentrations = np.asarray(concentrations, dtype=float)
+        return rate_constants * np.prod(concentrations[..., None, :] ** self.orders, axis=-1)
+
+    def derivatives(self, concentrations, rate_constants):
+        """
+        Returns the derivatives of the concentrations with respect to time.
+
+        Args:
+            concentrations (numpy.ndarray): Concentrations, of shape (..., len(species)).
+            rate_constants (numpy.ndarray): Rate constants, of shape (..., len(reactions)).
+
+        Returns:
+            numpy.ndarray: The derivatives, of shape (..., len(species)).
+        """
+        return self.rates(concentrations, rate_constants) @ self.stoichiometry
+
+    def jacobian(self, concentrations, rate_constants):
+        """
+        Returns the Jacobian of the derivatives with respect to the concentrations.
+
+        Args:
+            concentrations (numpy.ndarray): Concentrations, of shape (..., len(species)).
+            rate_constants (numpy.ndarray): Rate constants, of shape (..., len(reactions)).
+
+        Returns:
+            numpy.ndarray: Array of shape (..., len(species), len(species)) whose element [i, l]
+            is the derivative of dc_i/dt with respect to c_l.
+        """
+        concentrations = np.asarray(concentrations, dtype=float)
+        powers = concentrations[..., None, :] ** self.orders
+        rate_derivatives = np.empty(powers.shape)
+        for l in range(len(self.species)):
+            # d(c_l^a)/dc_l = a c_l^(a - 1), taken as 0 where a = 0 to stay finite at c_l = 0
+            factors = powers.copy()
+            factors[..., l] = np.where(self.orders[:, l] > 0,
+                                       self.orders[:, l] * concentrations[..., None, l] ** np.maximum(self.orders[:, l] - 1, 0), 0)
+            rate_derivatives[..., l] = np.prod(factors, axis=-1)
+        rate_derivatives = rate_derivatives * np.asarray(rate_constants, dtype=float)[..., None]
+        return np.einsum('ji,...jl->...il', self.stoichiometry, rate_derivatives)
+
+    def sparsity(self):
+        """
+        Returns which elements of the Jacobian can be nonzero.
+
+        Returns:
+            numpy.ndarray: Boolean array of shape (len(species), len(species)).
+        """
+        return (np.abs(self.stoichiometry.T) @ (self.orders > 0)) > 0
+
+    def simulate(self, times, initial_concentrations, rate_constants, method='BDF', rtol=1e-6, atol=1e-12):
+        """
+        Integrate the rate equations for one or many initial conditions and sets of rate constants.
+
+        All the simulations are stacked into one system of ODEs, integrated at once with the
+        implicit, stiff-capable `method` of `scipy.integrate.solve_ivp`. Its Jacobian is given
+        analytically as a sparse block-diagonal matrix, one block per simulation, so that each
+        Newton iteration solves a sparse system instead of a dense one of the whole batch.
+
+        Args:
+            times (array-like): Increasing times at which the concentrations are returned,
+                starting at the initial time.
+            initial_concentrations (array-like or dict): Initial concentrations, of shape
+                (len(species),) or (batch, len(species)), or a dict keyed by species (missing
+                species start at 0).
+            rate_constants (array-like): Rate constants, of shape (len(reactions),) or
+                (batch, len(reactions)).
+            method (str): Integration method of `solve_ivp` using a Jacobian ('BDF', 'Radau' or
+                'LSODA', the latter with a dense Jacobian). Defaults to 'BDF'.
+            rtol (float): Relative tolerance. Defaults to 1e-6.
+            atol (float): Absolute tolerance. Defaults to 1e-12.
+
+        Returns:
+            tuple: The times and the concentrations, with time along the first axis as
+            `calculate_derivative` and `velocity_first` expect: of shape (len(times), len(species))
+            for a single simulation, (len(times), batch, len(species)) for a batch.
+
+        Raises:
+            ValueError: If the shapes of the inputs do not match the network.
+            RuntimeError: If the integration fails.
+        """
+        times = np.asarray(times, dtype=float)
+        if isinstance(initial_concentrations, dict):
+            initial_concentrations = [initial_concentrations.get(name, 0.0) for name in self.species]
+        initial_concentrations = np.asarray(initial_concentrations, dtype=float)
+        rate_constants = np.asarray(rate_constants, dtype=float)
+        if initial_concentrations.shape[-1:] != (len(self.species),):
+            raise ValueError(f"Expected {len(self.species)} initial concentrations, got shape {initial_concentrations.shape}.")
+        if rate_constants.shape[-1:] != (len(self.orders),):
+            raise ValueError(f"Expected {len(self.orders)} rate constants, got shape {rate_constants.shape}.")
+
+        batched = initial_concentrations.ndim > 1 or rate_constants.ndim > 1
+        batch = np.broadcast_shapes(initial_concentrations.shape[:-1], rate_constants.shape[:-1])
+        n_batch = int(np.prod(batch))
+        n_species = len(self.species)
+        y0 = np.broadcast_to(initial_concentrations, batch + (n_species,)).reshape(-1)
+        constants = np.broadcast_to(rate_constants, batch + (len(self.orders),)).reshape(n_batch, -1)
+
+        # Indices of the nonzero elements of the block-diagonal Jacobian, block after block
+        rows, columns = np.nonzero(self.sparsity())
+        offsets = (np.arange(n_batch) * n_species)[:, None]
+        block_rows = (offsets + rows).ravel()
+        block_columns = (offsets + columns).ravel()
+        size = n_batch * n_species
+
+        def fun(t, y):
+            return self.derivatives(y.reshape(n_batch, n_species), constants).ravel()
+
+        def jac(t, y):
+            blocks = self.jacobian(y.reshape(n_batch, n_species), constants)
+            matrix = csc_matrix((blocks[:, rows, columns].ravel(), (block_rows, block_columns)), shape=(size, size))
+            # LSODA only accepts dense Jacobians
+            return matrix.toarray() if method == 'LSODA' else matrix
+
+        solution = solve_ivp(fun, (times[0], times[-1]), y0, method=method, t_eval=times, jac=jac, rtol=rtol, atol=atol)
+        if not solution.success:
+            raise RuntimeError(f"The integration failed: {solution.message}")
+
+        concentrations = solution.y.T.reshape((len(times),) + batch + (n_species,))
+        if not batched:
+            concentrations = concentrations.reshape(len(times), n_species)
+        return times, concentrations
@@ -6,24 +6,39 @@ from read_file_and_enter_data import manual_or_read
 from read_file_and_enter_data import spacing
 
 from calculate_speed import display_graph
+from kinetics_bootstrap import bootstrap_rate, linearize
+from robust_fit import robust_line
 from tabulate import tabulate
 
+def time_steps(times, concentrations):
+    """
+    Calculate the time steps, shaped to divide differences of concentrations along the time axis.
+
+    Args:
+        times (array-like): Time values.
+        concentrations (numpy.ndarray): Concentrations, time along the first axis (one column per species).
+
+    Returns:
+        numpy.ndarray: The time steps, of shape (len(times) - 1, 1, ...) matching `concentrations`.
+    """
+    return np.diff(np.asarray(times, dtype=float)).reshape((-1,) + (1,) * (concentrations.ndim - 1))
+
 def calculate_derivative(times, concentrations):
     """
     Calculate the derivative of concentration with respect to time.
 
     Args:
         times (list of float): A list containing time values.
-        concentrations (list of float): A list containing corresponding concentration values.
+        concentrations (list of float or 2-D array): A list containing corresponding concentration values,
+            or an array with one column per species.
 
     Returns:
-        list of float: A list containing the derivative of concentration with respect to time.
+        list of float: A list containing the derivative of concentration with respect to time
+        (an array with one column per species for 2-D concentrations).
     """
-    
-    # Calculate derivatives and other parameters based on concentration data
-    
-    derivatives = [(concentrations[i] - concentrations[i-1]) / (times[i] - times[i-1]) for i in range(1, len(times))]
-    return derivatives
+    concentrations = np.asarray(concentrations, dtype=float)
+    derivatives = np.diff(concentrations, axis=0) / time_steps(times, concentrations)
+    return derivatives.tolist() if concentrations.ndim == 1 else derivatives
 
 def calculate_differences(column):
     """
@@ -50,15 +65,19 @@ class TableAnalyzer:
 
     Attributes:
         column_indices (list): Indices of columns to analyze for statistical properties.
+        robust (bool): Whether the coefficient of variation uses the median and the median
+            absolute deviation instead of the mean and the standard deviation.
     """
     column_indices = [2, 4, 6]
 
-    def __init__(self, table):
+    def __init__(self, table, robust=False):
         """
         Initializes a TableAnalyzer instance.
 
         Args:
             table (list of lists): The table to be analyzed, where each inner list represents a row.
+            robust (bool): Whether to use the robust coefficient of variation 1.4826 MAD / |median|,
+                which isolated glitches do not move. Defaults to False.
 
         Returns:
             None
@@ -67,6 +86,7 @@ class TableAnalyzer:
             None
         """
         self.table = table
+        self.robust = robust
 
     def remove_leading_zeros(self, value):
         """
@@ -103,6 +123,9 @@ class TableAnalyzer:
         column = [val for val in column if val is not None]
         if column:
             column = list(map(self.remove_leading_zeros, column))
+            if self.robust:
+                median = np.median(column)
+                return abs(1.4826 * np.median(np.abs(np.array(column) - median)) / median * 100)
             mean = sum(column) / len(column)
             variance = sum((val - mean) ** 2 for val in column) / len(column)
             standard_deviation = variance ** 0.5      
@@ -155,19 +178,17 @@ def derivative_ln(concentrations, times):
     Calculate the derivative of the natural logarithm of concentrations with respect to time.
 
     Args:
-        concentrations (list of float): A list containing concentrations of substances.
+        concentrations (list of float or 2-D array): A list containing concentrations of substances,
+            or an array with one column per species.
         times (list of float): A list containing corresponding times.
 
     Returns:
-        list of float: A list containing the derivatives of the natural logarithm of concentrations.
+        list of float: A list containing the derivatives of the natural logarithm of concentrations
+        (an array with one column per species for 2-D concentrations).
     """
-    derivatives_ln = []
-    for i in range(len(concentrations) - 1):
-        d_concentration = math.log(concentrations[i + 1]) - math.log(concentrations[i])
-        dt = times[i + 1] - times[i]
-        derivative = d_concentration / dt
-        derivatives_ln.append(derivative)
-    return derivatives_ln
+    concentrations = np.asarray(concentrations, dtype=float)
+    derivatives_ln = np.diff(np.log(concentrations), axis=0) / time_steps(times, concentrations)
+    return derivatives_ln.tolist() if concentrations.ndim == 1 else derivatives_ln
 
 def calculate_inverse_concentration(concentrations):
     """
@@ -187,21 +208,69 @@ def calculate_derivative_of_inverse_concentration(concentrations, times):
     Calculate the derivative of the inverse of concentrations with respect to time.
 
     Args:
-        concentrations (list of float): A list containing concentrations of substances.
+        concentrations (list of float or 2-D array): A list containing concentrations of substances,
+            or an array with one column per species.
         times (list of float): A list containing corresponding times.
 
     Returns:
-        list of float: A list containing the derivatives of the inverse of concentrations.
+        list of float: A list containing the derivatives of the inverse of concentrations
+        (an array with one column per species for 2-D concentrations).
     """
-    derivatives_inverse = []
-    for i in range(len(concentrations) - 1):
-        delta_concentration = 1 / concentrations[i + 1] - 1 / concentrations[i]
-        dt = times[i + 1] - times[i]
-        derivative = delta_concentration / dt
-        derivatives_inverse.append(derivative)
-    return derivatives_inverse
-
-def main_rate():
+    concentrations = np.asarray(concentrations, dtype=float)
+    derivatives_inverse = np.diff(1 / concentrations, axis=0) / time_steps(times, concentrations)
+    return derivatives_inverse.tolist() if concentrations.ndim == 1 else derivatives_inverse
+
+def determine_order(times, concentrations, robust=False):
+    """
+    Determine the order of a reaction without any prompt.
+
+    The derivatives of the concentrations, of their natural logarithm and of their inverse with
+    respect to time are compared: the most constant one (lowest coefficient of variation, see
+    `TableAnalyzer`) gives the order.
+
+    Args:
+        times (list of float): A list containing time values.
+        concentrations (list of float): A list containing corresponding concentration values.
+        robust (bool): Whether to use the robust coefficient of variation. Defaults to False.
+
+    Returns:
+        int: The order of the reaction (0, 1 or 2).
+    """
+    table = zip(calculate_derivative(times, concentrations),
+                derivative_ln(concentrations, times),
+                calculate_derivative_of_inverse_concentration(concentrations, times))
+    return TableAnalyzer(table, robust).find_most_constant_column([0, 1, 2])
+
+def fit_rate_constant(times, concentrations, order, method='ols'):
+    """
+    Fit the rate constant of a reaction of known order with its integrated rate law.
+
+    The line of [A] (zero order), ln[A] (first order) or 1/[A] (second order) against time has a
+    slope of -k, -k and k respectively. It is fitted by least squares, or robustly to outliers
+    with Huber's M-estimator or RANSAC (-> robust_line).
+
+    Args:
+        times (list of float): A list containing time values.
+        concentrations (list of float): A list containing corresponding concentration values.
+        order (int): The order of the reaction (0, 1 or 2).
+        method (str): 'ols', 'huber' or 'ransac'. Defaults to 'ols'.
+
+    Returns:
+        float: The rate constant k (M.s⁻¹, s⁻¹ or M⁻¹.s⁻¹).
+
+    Raises:
+        ValueError: If the order is not 0, 1 or 2, or the method is unknown.
+    """
+    if order not in (0, 1, 2):
+        raise ValueError(f"Invalid order {order}. Choose between 0, 1 and 2.")
+    values = linearize(np.asarray(concentrations, dtype=float), order)
+    if method == 'ols':
+        slope = np.polyfit(times, values, 1)[0]
+    else:
+        slope = robust_line(np.asarray(times, dtype=float)[None], values[None], method)[0][0]
+    return float(slope if order == 2 else -slope)
+
+def main_rate(fit_method='ols'):
     """
     Perform calculations and analysis based on user concentrations and times input.
 
@@ -210,6 +279,12 @@ def main_rate():
 
     A table showing the various values (with derivatives) is shown. The order is determined and 
     plotting the concentrations as a function of time is offered.
+
+    Args:
+        fit_method (str): 'ols' for least squares, 'huber' or 'ransac' to determine the order and
+            fit the rate constant robustly to outliers. Defaults to 'ols'. The bootstrap interval
+            is printed with the least-squares rate constant it is built on; a robust fit is printed
+            on its own line.
     """
     times, concentrations = manual_or_read()
     derivatives = [None] + calculate_derivative(times, concentrations) 
@@ -228,18 +303,8 @@ def main_rate():
     headers = ["Time", "Concentration", "Derivatives", "ln(Concentrations)", "derivative_ln", "Inverse", "Inverse derivative"]
     print(tabulate(table, headers=headers))
 
-    # Example 
-    # Define the indices of the columns you want to consider
-    column_indices = [0, 1, 2]
-
-    # Combine the data into a table
-    table = zip(derivatives, derivative_ln2, inverse_derivative)
-    
-    # Create an instance of the TableAnalyzer class
-    analyzer = TableAnalyzer(table)
-
-    # Find the index of the column with the lowest average difference
-    most_constant_column_idx = analyzer.find_most_constant_column(column_indices)   
+    # Find the index of the column with the lowest coefficient of variation
+    most_constant_column_idx = determine_order(times, concentrations, robust=fit_method != 'ols')
 
     while True:
 
@@ -286,30 +351,27 @@ def main_rate():
         rate_constant = input("Your response (yes/no): ")
         if rate_constant == 'yes':
             print()
+            # The interval comes from least-squares fits, so it is printed with the least-squares k
+            uncertainty = bootstrap_rate(times, concentrations, most_constant_column_idx)
+            k = uncertainty.rate_constant
+            low, high = uncertainty.rate_constant_interval
+            if fit_method != 'ols':
+                k_robust = fit_rate_constant(times, concentrations, most_constant_column_idx, fit_method)
+                print(f"The {fit_method} fit, robust to outliers, gives k = {round(k_robust,3)}; the least-squares fit and its bootstrap interval follow.")
             if most_constant_column_idx == 0:
-                # Fit a linear function (y = mx + b) to the data
-                x, y = np.polyfit(times, concentrations, 1)
-                # Generate points for the linear function
-                x_fit = np.linspace(min(times), max(times), 100)
-                y_fit = x * x_fit + y
-                print(f"The rate constant k is {round(-x,3)} M.s\u207B\u00B9")
+                print(f"The rate constant k is {round(k,3)} M.s\u207B\u00B9 (95% confidence interval: {round(low,3)} to {round(high,3)})")
                 exit()
 
             elif most_constant_column_idx == 1:
-                # Fit a function to the data
-                x, y = np.polyfit(times, np.log(concentrations), 1)
-                x = np.exp(x)
-                # Generate points for the linear function
-                x_fit = np.linspace(min(times), max(times), 100)
-                y_fit = x * np.exp(y * x_fit)
-                print(f"The rate constant k is {round(-y,3)} s\u207B\u00B9")
+                print(f"The rate constant k is {round(k,3)} s\u207B\u00B9 (95% confidence interval: {round(low,3)} to {round(high,3)})")
                 spacing()
                 print("Would you like to have the half reaction time?")    
                 while True:
                     half_reaction = input("Your response (yes/no): ").lower()
                     if half_reaction == 'yes':
                         print()
-                        print(f"The half reaction time is {round(math.log(2)/abs(x),3)} s.\n")
+                        low, high = uncertainty.half_life_interval
+                        print(f"The half reaction time is {round(uncertainty.half_life,3)} s (95% confidence interval: {round(low,3)} to {round(high,3)} s).\n")
                         break
                     elif half_reaction == 'no':
                         break
@@ -319,16 +381,7 @@ def main_rate():
                 exit()
 
             elif most_constant_column_idx == 2:
-                # Fit a function of the type 1/x(t) = 1/x0 + kt to the data
-                x = np.array(times)
-                y = np.array(concentrations)
-                y0 = y[0]  # Initial value of y
-                k, _ = np.polyfit(x, 1/y, 1)
-
-                # Generate points for the fitted curve
-                x_fit = np.linspace(min(x), max(x), 100)
-                y_fit = 1 / (1/y0 + k * x_fit)
-                print(f"The rate constant k is {round(k,3)} M\u207B\u00B9s\u207B\u00B9")
+                print(f"The rate constant k is {round(k,3)} M\u207B\u00B9s\u207B\u00B9 (95% confidence interval: {round(low,3)} to {round(high,3)})")
                 exit()
 
         elif rate_constant == 'no':
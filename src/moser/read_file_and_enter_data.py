@@ -1,3 +1,9 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+TIME_UNITS = {'s': 1, 'min': 60, 'h': 3600, 'days': 86400}
+
 def spacing():
     """
     Print a visual spacing separator.
@@ -14,6 +20,148 @@ def spacing():
     print("------------------------")
     print()
 
+def to_seconds(times, time_unit='s'):
+    """
+    Convert time values to seconds.
+
+    Args:
+        times (array-like): Time values expressed in `time_unit`.
+        time_unit (str): Unit of the time values, one of TIME_UNITS (s/min/h/days).
+
+    Returns:
+        numpy.ndarray: The time values in seconds.
+
+    Raises:
+        ValueError: If the unit is not one of TIME_UNITS.
+    """
+    if time_unit not in TIME_UNITS:
+        raise ValueError(f"Invalid time unit '{time_unit}'. Pick a given unit ({'/'.join(TIME_UNITS)}).")
+    return np.asarray(times, dtype=float) * TIME_UNITS[time_unit]
+
+def read_text(source):
+    """
+    Read the text of a data source.
+
+    Args:
+        source (str, os.PathLike, bytes, file-like or array-like): A path to the file, the content of
+            the file as bytes or an open text or binary file.
+
+    Returns:
+        str or None: The text of the source, or None if the source holds data rather than text.
+
+    Raises:
+        FileNotFoundError: If the path does not exist.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r') as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source).decode()
+    if hasattr(source, 'read'):
+        text = source.read()
+        return text.decode() if isinstance(text, bytes) else text
+    return None
+
+def load_concentration(source, time_unit='s', skip_header=True):
+    """
+    Load concentration-time data without any prompt.
+
+    The data has the format of the files read by `read_file_concentration`: one header line
+    followed by one "time concentration" pair per line, separated by whitespace. The function
+    neither prints nor reads stdin, so it can be called from thread or process pools and services.
+
+    Args:
+        source (str, os.PathLike, bytes, file-like or array-like): A path to the file, the content of
+            the file as bytes, an open text or binary file, or the data itself as a
+            (times, concentrations) pair or an array of shape (n, 2).
+        time_unit (str): Unit of the time values, one of TIME_UNITS (s/min/h/days). Defaults to 's'.
+        skip_header (bool): Whether the first line of a file holds headers. Defaults to True.
+
+    Returns:
+        tuple: Two numpy arrays - the times in seconds and the concentrations.
+
+    Raises:
+        FileNotFoundError: If the path does not exist.
+        ValueError: If the unit is unknown or the data is not made of (time, concentration) pairs.
+    """
+    text = read_text(source)
+    if text is None:
+        data = np.asarray(source, dtype=float)
+        if data.ndim == 2 and data.shape[1] == 2 and data.shape[0] != 2:
+            data = data.T
+        if data.ndim != 2 or data.shape[0] != 2:
+            raise ValueError("The data must be a (times, concentrations) pair or an array of shape (n, 2).")
+        return to_seconds(data[0], time_unit), data[1].copy()
+
+    lines = text.splitlines()[1 if skip_header else 0:]
+
+    # Fast path: the whole body is converted at once by NumPy, which rejects ragged lines
+    try:
+        data = np.array([line.split() for line in lines if line.strip()], dtype=float)
+        if data.ndim == 2 and data.shape[1] == 2:
+            return to_seconds(data[:, 0], time_unit), data[:, 1].copy()
+    except ValueError:
+        pass
+
+    # Slow path: locate the faulty line
+    times = []
+    concentrations = []
+    for number, line in enumerate(lines, start=2 if skip_header else 1):
+        if not line.strip():
+            continue
+        try:
+            t, c = map(float, line.split())
+        except ValueError:
+            raise ValueError(f"Line {number} is not a (time, concentration) pair: {line!r}") from None
+        times.append(t)
+        concentrations.append(c)
+    return to_seconds(times, time_unit), np.array(concentrations, dtype=float)
+
+def load_concentrations(paths, time_unit='s', max_workers=8, max_in_flight=None):
+    """
+    Load concentration-time data from many files concurrently.
+
+    The files are read and parsed by `load_concentration` on a pool of threads, so that waiting on
+    the disk or the network overlaps. At most `max_in_flight` files are submitted at once, which
+    bounds the memory held by pending reads. A file that cannot be loaded does not interrupt the
+    others: its error is returned instead.
+
+    Args:
+        paths (iterable of str or os.PathLike): Paths of the files to load.
+        time_unit (str): Unit of the time values, one of TIME_UNITS (s/min/h/days). Defaults to 's'.
+        max_workers (int): Number of threads. Defaults to 8.
+        max_in_flight (int, optional): Largest number of files submitted but not yet loaded.
+            Defaults to twice `max_workers`.
+
+    Returns:
+        tuple: Two dicts keyed by path, in the input order - the (times, concentrations) arrays
+        of each file loaded, and the exception raised by each file that could not be loaded.
+    """
+    if max_in_flight is None:
+        max_in_flight = 2 * max_workers
+    paths = list(paths)
+    results = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        next_path = 0
+        while next_path < len(paths) or pending:
+            while next_path < len(paths) and len(pending) < max_in_flight:
+                future = executor.submit(load_concentration, paths[next_path], time_unit)
+                pending[future] = paths[next_path]
+                next_path += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    results[path] = future.result()
+                except Exception as error:
+                    errors[path] = error
+
+    return ({path: results[path] for path in paths if path in results},
+            {path: errors[path] for path in paths if path in errors})
+
 def read_file_concentration(name_file):
     """
     Read concentration-time data from a file.
@@ -30,18 +178,9 @@ def read_file_concentration(name_file):
     """
     
     spacing()
-    times = []
-    concentrations = []
-
     while True:
         try:
-            with open(name_file, 'r') as f:
-                # Ignore the first line containing headers
-                next(f)
-                for line in f:
-                    t, c = map(float, line.split())
-                    times.append(t)
-                    concentrations.append(c)
+            times, concentrations = load_concentration(name_file)
             break
         except FileNotFoundError:
             print("File not found. Please enter a valid name file (make sure to have it in the same folder as the Python code).")
@@ -61,16 +200,8 @@ def read_file_concentration(name_file):
             while True:
                 print("What are your unit? (min/h/days)")
                 units = input("Units = ").lower()
-                if units == 'min':
-                    times = [t * 60 for t in times]
-                    spacing()
-                    break
-                elif units == 'h':
-                    times = [t * 3600 for t in times]
-                    spacing()
-                    break
-                elif units == 'days':
-                    [t * 86400 for t in times]
+                if units in ('min', 'h', 'days'):
+                    times = to_seconds(times, units)
                     spacing()
                     break
                 else:
@@ -82,7 +213,7 @@ def read_file_concentration(name_file):
             spacing()
             print("Error. Please enter either yes or no.")
             continue
-    return times, concentrations
+    return times.tolist(), concentrations.tolist()
 
 def manually_enter_concentration():
     """
@@ -124,9 +255,6 @@ def manual_or_read():
     print("Do you want to load a file for the concentration values or you'll enter them?\n")
     print("∘Manually enter the values --- A")
     print("∘Open a file ----------------- B\n")
-    min_variance_column_idx = 0
-    x_fit = 0 
-    y_fit = 0
     while True:
             print("Enter your choice (A or B)")
             file_main = input("My choice: ").lower()
@@ -138,7 +266,6 @@ def manual_or_read():
                 break
             elif file_main == 'a':
                 times, concentrations = manually_enter_concentration()
-                pass
                 break
             else:
                 print("Wrong value. Please choose between A and B.")
@@ -0,0 +1,190 @@
+import numpy as np
+
+from kinetics_bootstrap import linearize
+from kinetics_fit import linear_fit
+
+def robust_scale(residuals, axis=-1):
+    """
+    Estimate the standard deviation of residuals from their median absolute value (1.4826 MAD).
+
+    Args:
+        residuals (numpy.ndarray): Residuals; NaN entries are ignored.
+        axis (int): Axis along which the scale is estimated. Defaults to the last one.
+
+    Returns:
+        numpy.ndarray: The scale of the residuals.
+    """
+    residuals = np.abs(residuals)
+    median = np.median if not np.isnan(residuals).any() else np.nanmedian
+    return 1.4826 * median(residuals, axis=axis)
+
+def huber_line(x, y, c=1.345, max_iter=50, tol=1e-8):
+    """
+    Fit one line per row with Huber's M-estimator by iteratively reweighted least squares.
+
+    Points whose residual exceeds c times the robust scale of the residuals get the weight
+    c⋅scale/|residual| instead of 1, which bounds the influence of outliers. The default c keeps 95%
+    of the efficiency of least squares on Gaussian noise. Non-finite points get no weight.
+
+    Args:
+        x (numpy.ndarray): Abscissas, of shape (B, N).
+        y (numpy.ndarray): Ordinates, of shape (B, N).
+        c (float): Tuning constant, in units of the scale. Defaults to 1.345.
+        max_iter (int): Largest number of reweightings. Defaults to 50.
+        tol (float): Convergence tolerance on the change of the weights. Defaults to 1e-8.
+
+    Returns:
+        tuple: The slopes and intercepts, of shape (B,), and the final weights, of shape (B, N).
+    """
+    finite = np.isfinite(y)
+    y = np.where(finite, y, 0)
+    weights = finite.astype(float)
+    # Exact data have a null scale; it is floored to keep the weights finite
+    floor = 1e-12 * np.maximum(np.abs(y).max(axis=1), np.finfo(float).tiny)
+    active = np.arange(len(y))
+    for _ in range(max_iter):
+        xa, ya, fa = x[active], y[active], finite[active]
+        slopes, intercepts = linear_fit(xa, ya, weights[active])
+        residuals = ya - intercepts[:, None] - slopes[:, None] * xa
+        scale = np.maximum(robust_scale(np.where(fa, residuals, np.nan)), floor[active])
+        ratio = np.abs(residuals) / (c * scale[:, None])
+        new_weights = np.where(fa, 1 / np.maximum(ratio, 1), 0)
+        changed = np.max(np.abs(new_weights - weights[active]), axis=1) > tol
+        weights[active] = new_weights
+        active = active[changed]
+        if active.size == 0:
+            break
+    slopes, intercepts = linear_fit(x, y, weights)
+    return slopes, intercepts, weights
+
+def ransac_line(x, y, n_trials=64, threshold=None, seed=None, chunk_size=2048):
+    """
+    Fit one line per row by random sample consensus, for heavily contaminated data.
+
+    Each trial draws two distinct points of each row and draws the line through them. With a
+    `threshold`, the line with the most residuals within it wins; without, the line with the
+    least median absolute residual wins (least median of squares) and the threshold is 2.5 times
+    the robust scale of its residuals. The final line is the least-squares line of the inliers.
+    Rows are processed by chunks to bound the memory of the (rows, trials, points) residuals.
+
+    Args:
+        x (numpy.ndarray): Abscissas, of shape (B, N).
+        y (numpy.ndarray): Ordinates, of shape (B, N).
+        n_trials (int): Number of candidate lines per row. Defaults to 64.
+        threshold (float, optional): Largest absolute residual of an inlier. Defaults to the
+            least-median-of-squares estimate.
+        seed (int, optional): Seed of the draws.
+        chunk_size (int): Number of rows processed at once. Defaults to 2048.
+
+    Returns:
+        tuple: The slopes and intercepts, of shape (B,), and the inlier weights (0 or 1), of
+        shape (B, N).
+    """
+    rng = np.random.default_rng(seed)
+    n_rows, n_points = y.shape
+    inliers = np.zeros(y.shape)
+    for start in range(0, n_rows, chunk_size):
+        xc, yc = x[start:start + chunk_size], y[start:start + chunk_size]
+        rows = np.arange(len(yc))[:, None]
+        first = rng.integers(0, n_points, (len(yc), n_trials))
+        second = rng.integers(0, n_points - 1, (len(yc), n_trials))
+        second = second + (second >= first)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (yc[rows, second] - yc[rows, first]) / (xc[rows, second] - xc[rows, first])
+            intercepts = yc[rows, first] - slopes * xc[rows, first]
+            residuals = np.abs(yc[:, None, :] - intercepts[..., None] - slopes[..., None] * xc[:, None, :])
+        residuals = np.where(np.isfinite(residuals), residuals, np.inf)
+
+        if threshold is None:
+            best = np.argmin(np.median(residuals, axis=-1), axis=1)
+            best_residuals = residuals[rows[:, 0], best]
+            # Rousseeuw's small-sample correction of the least-median-of-squares scale
+            scale = 1.4826 * (1 + 5 / max(n_points - 2, 1)) * np.median(best_residuals, axis=-1)
+            floor = 1e-12 * np.abs(np.where(np.isfinite(yc), yc, 0)).max(axis=1)
+            limits = 2.5 * np.maximum(scale, floor)
+        else:
+            best = np.argmax((residuals <= threshold).sum(axis=-1), axis=1)
+            best_residuals = residuals[rows[:, 0], best]
+            limits = np.full(len(yc), float(threshold))
+        inliers[start:start + chunk_size] = best_residuals <= limits[:, None]
+
+    slopes, intercepts = linear_fit(x, np.where(inliers > 0, y, 0), inliers)
+    return slopes, intercepts, inliers
+
+def robust_line(x, y, method='huber', **kwargs):
+    """
+    Fit one line per row by ordinary least squares, Huber IRLS or RANSAC.
+
+    Args:
+        x (numpy.ndarray): Abscissas, of shape (B, N).
+        y (numpy.ndarray): Ordinates, of shape (B, N).
+        method (str): 'ols', 'huber' or 'ransac'. Defaults to 'huber'.
+        **kwargs: Passed to `huber_line` or `ransac_line`.
+
+    Returns:
+        tuple: The slopes and intercepts, of shape (B,), and the weights of the points, of shape (B, N).
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x = np.broadcast_to(x, y.shape)
+    if method == 'ols':
+        return linear_fit(x, y) + (np.ones(y.shape),)
+    if method == 'huber':
+        return huber_line(x, y, **kwargs)
+    if method == 'ransac':
+        return ransac_line(x, y, **kwargs)
+    raise ValueError(f"Invalid method '{method}'. Choose between ols, huber and ransac.")
+
+def robust_orders(times, concentrations):
+    """
+    Determine the order of many datasets at once, insensitive to isolated glitches.
+
+    As in `TableAnalyzer`, the derivatives of c, ln(c) and 1/c are compared, but their spread is
+    measured by the robust coefficient of variation 1.4826 MAD / |median|, which a few spikes do
+    not move.
+
+    Args:
+        times (array-like): Times, of shape (N,) or (B, N).
+        concentrations (array-like): Concentrations, of shape (B, N).
+
+    Returns:
+        numpy.ndarray: The order (0, 1 or 2) of each dataset, of shape (B,).
+    """
+    concentrations = np.asarray(concentrations, dtype=float)
+    times = np.broadcast_to(np.asarray(times, dtype=float), concentrations.shape)
+    columns = np.stack([linearize(concentrations, order) for order in range(3)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derivatives = np.diff(columns, axis=-1) / np.diff(times, axis=-1)
+        derivatives = np.where(np.isfinite(derivatives), derivatives, np.nan)
+        medians = np.nanmedian(derivatives, axis=-1)
+        variations = robust_scale(derivatives - medians[..., None]) / np.abs(medians) * 100
+    return np.argmin(np.nan_to_num(variations, nan=np.inf), axis=0)
+
+def robust_rate_constants(times, concentrations, orders=None, method='huber', **kwargs):
+    """
+    Determine the order and fit the rate constant of many datasets with robust regression.
+
+    Args:
+        times (array-like): Times, of shape (N,) or (B, N).
+        concentrations (array-like): Concentrations, of shape (B, N).
+        orders (int or array-like, optional): Order of each dataset. Defaults to `robust_orders`.
+        method (str): 'ols', 'huber' or 'ransac'. Defaults to 'huber'.
+        **kwargs: Passed to `huber_line` or `ransac_line`.
+
+    Returns:
+        tuple: The orders and the rate constants (M.s⁻¹, s⁻¹ or M⁻¹.s⁻¹), of shape (B,).
+    """
+    concentrations = np.asarray(concentrations, dtype=float)
+    times = np.broadcast_to(np.asarray(times, dtype=float), concentrations.shape)
+    if orders is None:
+        orders = robust_orders(times, concentrations)
+    orders = np.broadcast_to(orders, concentrations.shape[:1])
+    rate_constants = np.empty(len(concentrations))
+    for order in np.unique(orders):
+        rows = orders == order
+        slopes = robust_line(times[rows], linearize(concentrations[rows], order), method, **kwargs)[0]
+        rate_constants[rows] = slopes if order == 2 else -slopes
+    return orders, rate_constants
@@ -0,0 +1,216 @@
+import numpy as np
+from scipy import constants, stats
+
+from kinetics_bootstrap import batch_orders, linearize
+from kinetics_fit import linear_fit
+from read_file_and_enter_data import load_concentrations
+
+def rate_constants_with_errors(l_times, l_concentrations, order=None):
+    """
+    Determine the order and fit the rate constant of many datasets.
+
+    Datasets of the same length are stacked and processed as one batch: their orders are decided
+    as `TableAnalyzer` does and their rate constants are the slopes of the least-squares lines of
+    c, ln(c) or 1/c against time, with the standard errors of the slopes.
+
+    Args:
+        l_times (list of array-like): Times of each dataset.
+        l_concentrations (list of array-like): Concentrations of each dataset.
+        order (int, optional): Common order of the reactions. Defaults to the order decided for
+            most datasets.
+
+    Returns:
+        tuple: The common order, then the order decided for each dataset, its rate constant and
+        the standard error of the rate constant (arrays of len(l_times)).
+
+    Raises:
+        ValueError: If the order is not 0, 1 or 2.
+    """
+    l_times = [np.asarray(times, dtype=float) for times in l_times]
+    l_concentrations = [np.asarray(concentrations, dtype=float) for concentrations in l_concentrations]
+    d_groups = {}
+    for i, times in enumerate(l_times):
+        d_groups.setdefault(times.size, []).append(i)
+
+    orders = np.empty(len(l_times), dtype=int)
+    for indices in d_groups.values():
+        orders[indices] = batch_orders(np.stack([l_times[i] for i in indices]), np.stack([l_concentrations[i] for i in indices]))
+    if order is None:
+        order = int(np.argmax(np.bincount(orders, minlength=3)))
+    if order not in (0, 1, 2):
+        raise ValueError(f"Invalid order {order}. Choose between 0, 1 and 2.")
+
+    rate_constants = np.empty(len(l_times))
+    errors = np.empty(len(l_times))
+    for n_points, indices in d_groups.items():
+        times = np.stack([l_times[i] for i in indices])
+        values = linearize(np.stack([l_concentrations[i] for i in indices]), order)
+        slopes, intercepts = linear_fit(times, values)
+        residuals = values - intercepts[:, None] - slopes[:, None] * times
+        spread = ((times - times.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            errors[indices] = np.sqrt((residuals ** 2).sum(axis=1) / (n_points - 2) / spread)
+        rate_constants[indices] = slopes if order == 2 else -slopes
+    return order, orders, rate_constants, errors
+
+def weighted_line(x, y, sigma=None):
+    """
+    Fit a weighted least-squares line.
+
+    The covariance of the parameters is scaled by the reduced chi-square of the residuals, so
+    that the uncertainties only need to be known relative to each other.
+
+    Args:
+        x (numpy.ndarray): Abscissas.
+        y (numpy.ndarray): Ordinates.
+        sigma (numpy.ndarray, optional): Uncertainties of the ordinates. Ignored (all equal)
+            unless they are all finite and positive.
+
+    Returns:
+        tuple: The slope, the intercept and their 2x2 covariance matrix.
+    """
+    weights = np.ones_like(y)
+    if sigma is not None and np.all(np.isfinite(sigma)) and np.all(sigma > 0):
+        weights = 1 / sigma ** 2
+    design = np.stack([x, np.ones_like(x)], axis=1)
+    normal = design.T @ (weights[:, None] * design)
+    slope, intercept = np.linalg.solve(normal, design.T @ (weights * y))
+    residuals = y - slope * x - intercept
+    dof = len(x) - 2
+    scale = (weights * residuals ** 2).sum() / dof if dof > 0 else np.nan
+    return slope, intercept, np.linalg.inv(normal) * scale
+
+class ArrheniusAnalysis:
+    """
+    Temperature dependence of a rate constant (-> analyze_temperatures).
+
+    The Arrhenius equation k = A exp(-Ea / RT) is fitted as ln(k) against 1/T and the Eyring
+    equation k = (kB T / h) exp(ΔS‡/R) exp(-ΔH‡/RT) as ln(k/T) against 1/T, each point weighted by
+    the inverse variance of ln(k). The activation entropy assumes a standard state of 1 M for
+    orders other than 1.
+
+    Attributes:
+        temperatures (numpy.ndarray): Temperatures, in K.
+        order (int): Common order of the reactions.
+        orders (numpy.ndarray): Order decided at each temperature.
+        rate_constants (numpy.ndarray): Rate constant at each temperature.
+        rate_constant_errors (numpy.ndarray): Standard errors of the rate constants.
+        activation_energy (float): Ea, in J/mol.
+        activation_energy_error (float): Standard error of Ea.
+        activation_energy_interval (tuple): Confidence interval of Ea.
+        pre_exponential_factor (float): A, in the unit of the rate constants.
+        pre_exponential_factor_interval (tuple): Confidence interval of A.
+        activation_enthalpy (float): ΔH‡, in J/mol.
+        activation_enthalpy_error (float): Standard error of ΔH‡.
+        activation_entropy (float): ΔS‡, in J/(mol.K).
+        activation_entropy_error (float): Standard error of ΔS‡.
+        confidence (float): Confidence level of the intervals.
+    """
+
+    def __init__(self, temperatures, order, orders, rate_constants, rate_constant_errors, confidence=0.95):
+        """
+        Initializes an ArrheniusAnalysis instance and fits both equations.
+
+        Args:
+            temperatures (array-like): Temperatures, in K.
+            order (int): Common order of the reactions.
+            orders (array-like): Order decided at each temperature.
+            rate_constants (array-like): Rate constant at each temperature.
+            rate_constant_errors (array-like): Standard errors of the rate constants.
+            confidence (float): Confidence level of the intervals. Defaults to 0.95.
+
+        Raises:
+            ValueError: If there are fewer than two temperatures or a rate constant is not positive.
+        """
+        self.temperatures = np.asarray(temperatures, dtype=float)
+        self.order = order
+        self.orders = np.asarray(orders)
+        self.rate_constants = np.asarray(rate_constants, dtype=float)
+        self.rate_constant_errors = np.asarray(rate_constant_errors, dtype=float)
+        self.confidence = confidence
+        if self.temperatures.size < 2:
+            raise ValueError("At least two temperatures are needed.")
+        if np.any(self.rate_constants <= 0):
+            raise ValueError("The rate constants must be positive.")
+
+        R = constants.R
+        inverse_temperatures = 1 / self.temperatures
+        sigma = self.rate_constant_errors / self.rate_constants
+        quantile = stats.t.ppf((1 + confidence) / 2, self.temperatures.size - 2) if self.temperatures.size > 2 else np.nan
+
+        slope, intercept, covariance = weighted_line(inverse_temperatures, np.log(self.rate_constants), sigma)
+        slope_error, intercept_error = np.sqrt(np.diag(covariance))
+        self.activation_energy = float(-slope * R)
+        self.activation_energy_error = float(slope_error * R)
+        self.activation_energy_interval = (float(self.activation_energy - quantile * self.activation_energy_error),
+                                           float(self.activation_energy + quantile * self.activation_energy_error))
+        self.pre_exponential_factor = float(np.exp(intercept))
+        self.pre_exponential_factor_interval = (float(np.exp(intercept - quantile * intercept_error)),
+                                                float(np.exp(intercept + quantile * intercept_error)))
+
+        slope, intercept, covariance = weighted_line(inverse_temperatures, np.log(self.rate_constants / self.temperatures), sigma)
+        slope_error, intercept_error = np.sqrt(np.diag(covariance))
+        self.activation_enthalpy = float(-slope * R)
+        self.activation_enthalpy_error = float(slope_error * R)
+        self.activation_entropy = float((intercept - np.log(constants.k / constants.h)) * R)
+        self.activation_entropy_error = float(intercept_error * R)
+
+    def rate_constant(self, temperature):
+        """
+        Returns the rate constant predicted by the Arrhenius equation.
+
+        Args:
+            temperature (float or array-like): Temperature, in K.
+
+        Returns:
+            float or numpy.ndarray: The rate constant.
+        """
+        return self.pre_exponential_factor * np.exp(-self.activation_energy / (constants.R * np.asarray(temperature, dtype=float)))
+
+def analyze_temperatures(temperatures, l_times, l_concentrations, order=None, confidence=0.95):
+    """
+    Fit the rate constant at each temperature, then the Arrhenius and Eyring parameters.
+
+    Args:
+        temperatures (array-like): Temperature of each dataset, in K.
+        l_times (list of array-like): Times of each dataset.
+        l_concentrations (list of array-like): Concentrations of each dataset.
+        order (int, optional): Common order of the reactions. Defaults to the order decided for
+            most temperatures.
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+
+    Returns:
+        ArrheniusAnalysis: The rate constants and activation parameters.
+    """
+    order, orders, rate_constants, errors = rate_constants_with_errors(l_times, l_concentrations, order)
+    return ArrheniusAnalysis(temperatures, order, orders, rate_constants, errors, confidence)
+
+def load_temperature_series(sources, time_unit='s', order=None, confidence=0.95, max_workers=8):
+    """
+    Load one kinetics file per temperature concurrently and analyse their temperature dependence.
+
+    Args:
+        sources (dict): Path of the concentration-time file of each temperature, keyed by the
+            temperature in K.
+        time_unit (str): Unit of the time values, one of TIME_UNITS (s/min/h/days). Defaults to 's'.
+        order (int, optional): Common order of the reactions. Defaults to the order decided for
+            most temperatures.
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+        max_workers (int): Number of threads loading the files. Defaults to 8.
+
+    Returns:
+        tuple: The ArrheniusAnalysis of the files loaded, and a dict of the exception raised by
+        each file that could not be loaded, keyed by temperature.
+
+    Raises:
+        ValueError: If fewer than two files could be loaded.
+    """
+    d_paths = {temperature: path for temperature, path in sources.items()}
+    d_data, d_failed = load_concentrations(list(d_paths.values()), time_unit, max_workers=max_workers)
+    temperatures = [temperature for temperature, path in d_paths.items() if path in d_data]
+    d_errors = {temperature: d_failed[path] for temperature, path in d_paths.items() if path in d_failed}
+    if len(temperatures) < 2:
+        raise ValueError(f"At least two temperatures are needed, {len(temperatures)} file(s) could be loaded.")
+    analysis = analyze_temperatures(temperatures, [d_data[d_paths[temperature]][0] for temperature in temperatures],
+                                    [d_data[d_paths[temperature]][1] for temperature in temperatures], order, confidence)
+    return analysis, d_errors
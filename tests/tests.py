@@ -10,14 +10,26 @@ sys.path.append(target_dir_absolute)
 from BalanceEq import *
 from calculate_speed import *
 from Concentration import *
+from decimation import *
 from Decompose import *
+from ElementMatrix import *
+from EquivalencePoint import *
 from HConcentration import *
+from IsotopePattern import *
 from instantaneous_speed import *
+from kinetics_bootstrap import *
+from kinetics_dataset import *
+from kinetics_fit import *
+from kinetics_stream import *
+from mass_action import *
 from MolarMass import *
 from Reaction_constant_activity import *
 from Reaction_constant_concentration import *
+from Reaction_equilibrium import *
 from reaction_order import *
 from read_file_and_enter_data import *
+from robust_fit import *
+from temperature_series import *
 from Titration import *
 
 
@@ -916,5 +928,493 @@ def test_calculate_derivative_of_inverse_concentration():
 
 def test_calculate_reaction_quotient():
    assert calculate_reaction_quotient([1, 0.5], [2, 1], [1, 0.8], [1, 2]) == 1.2800000000000002, "Test failed"
-   
 
+def test_calculate_activity():
+   assert calculate_activity(['solid', 'solute', 'gas', 'other'], [5, 0.1, 2, 0.5], [1, 1, 1, 0.8]).tolist() == [1.0, 0.1, 2.0, 0.4], "Test failed"
+
+def test1_equilibrium_extent():
+   assert round(equilibrium_extent(4, [-1, 1], [1, 0]), 10) == 0.8, "Test failed"
+
+def test2_equilibrium_extent():
+   K = numpy.array([1e-30, 1, 1e30])
+   extents, concentrations = solve_extent(K, [-1, -1, 2], [[1, 2, 0]] * 3)
+   quotients = [calculate_reaction_quotient(c[:2], [1, 1], c[2:], [2]) for c in concentrations]
+   assert numpy.allclose(quotients, K, rtol=1e-9), "Test failed"
+
+def test_equilibrium_extents():
+   concentrations = equilibrium_composition([2, 3], [[-1, 0], [1, -1], [0, 1]], [1, 0, 0])
+   assert numpy.allclose(concentrations, [1/9, 2/9, 6/9], rtol=1e-9), "Test failed"
+
+def test_balance_many():
+   l_results = balance_many([(["C2H5OH", "O2"], ["H2O", "CO2"]), (["H2"], ["O2"]), (["O2", "C2H5OH"], ["CO2", "H2O"])], processes=1)
+   assert l_results[0] == l_results[2] == (['C2H5OH', 'O2'], ['CO2', 'H2O'], [1, 3], [2, 3], [1, 3, 2, 3]), "Test failed"
+   assert isinstance(l_results[1], ValueError), "Test failed"
+   l_results[0][2][0] = 99
+   assert balance_many([(["C2H5OH", "O2"], ["H2O", "CO2"])], processes=1)[0][2] == [1, 3], "Test failed"
+   ClearBalanceCache()
+   assert len(d_balance_cache) == 0, "Test failed"
+
+def test_ElementMatrix():
+   M, l_elements = ElementMatrix(["H2O", "CO2", "CH4"])
+   assert l_elements == ['C', 'H', 'O'] and M.toarray().tolist() == [[0, 2, 1], [1, 0, 2], [1, 4, 0]], "Test failed"
+
+def test_IsBalanced():
+   assert IsBalanced(["C2H5OH", "O2"], ["CO2", "H2O"], [1, 3], [2, 3]) and not IsBalanced(["H2", "O2"], ["H2O"], [1, 1], [1]), "Test failed"
+
+def test_MolarMasses():
+   assert numpy.allclose(MolarMasses(["HOOC-(CHOH)2-COOH", "N(CH2CH3)3"]), [150.086, 101.193]), "Test failed"
+
+def test_SplitCharge():
+   assert [SplitCharge(m) for m in ["Fe2+", "MnO4-", "[SO4]2-", "O2^-", "H2O"]] == [("Fe", 2), ("MnO4", -1), ("SO4", -2), ("O2", -1), ("H2O", 0)], "Test failed"
+
+def test3_BalanceEq():
+   assert BalanceEq(["MnO4-", "Fe2+", "H+"], ["Mn2+", "Fe3+", "H2O"]) == (['Fe2+', 'H+', 'MnO4-'], ['Fe3+', 'H2O', 'Mn2+'], [5, 8, 1], [5, 4, 1], [5, 8, 1, 5, 4, 1]), "Test failed."
+
+def test4_BalanceEq():
+   assert BalanceEq(["H2O"], ["H+", "OH-"]) == (['H2O'], ['H+', 'OH-'], [1], [1, 1], [1, 1, 1]), "Test failed."
+
+def test1_BalanceEqBasis():
+   result = BalanceEqBasis(["C2H5OH", "O2"], ["H2O", "CO2"])
+   assert result.dimension == 1 and result.to_tuple() == BalanceEq(["C2H5OH", "O2"], ["H2O", "CO2"]), "Test failed."
+
+def test2_BalanceEqBasis():
+   result = BalanceEqBasis(["H2", "O2", "H2O2"], ["H2O"])
+   assert result.dimension == 2 and result.basis == [[1, -1, 1, 0], [1, 1, 0, 2]], "Test failed."
+   try:
+      result.coefficients()
+      assert False, "Test failed."
+   except UnderdeterminedReactionError:
+      pass
+
+def test3_BalanceEqBasis():
+   try:
+      BalanceEqBasis(["H2"], ["O2"])
+      assert False, "Test failed."
+   except ElementMismatchError:
+      pass
+
+def test_Decompose_vector():
+   vectors = Decompose(["C2H5OH", "Fe2+"], output="vector")
+   assert vectors.shape == (2, 118) and vectors.dtype == numpy.int32, "Test failed"
+   assert vectors[0, [0, 5, 7]].tolist() == [6, 2, 1] and vectors[1, 25] == 1 and vectors.sum() == 10, "Test failed"
+
+def test_CompileFormula():
+   indices, counts = CompileFormula("N(CH2CH3)3")
+   assert indices.tolist() == [0, 5, 6] and counts.tolist() == [15, 6, 1], "Test failed"
+
+def test_Decompose_hydrates():
+   assert Decompose(["CuSO4·5H2O", "[Cu(NH3)4]SO4", "CaCl2*2H2O"]) == [{'Cu': 1, 'H': 10, 'O': 9, 'S': 1}, {'Cu': 1, 'H': 12, 'N': 4, 'O': 4, 'S': 1}, {'Ca': 1, 'Cl': 2, 'H': 4, 'O': 2}], "Test failed"
+
+def test_Decompose_isotopes():
+   assert Decompose(["[13C]O2", "D2O", "CD3-[13C]H3", "[2H]2O"]) == [{'13C': 1, 'O': 2}, {'2H': 2, 'O': 1}, {'13C': 1, '2H': 3, 'C': 1, 'H': 3}, {'2H': 2, 'O': 1}], "Test failed"
+   assert CompileFormula("[13C]O2")[1].tolist() == [1, 2] and round(MolarMass("D2O"), 4) == 20.0272, "Test failed"
+   assert Decompose(["2H2O", "12CO2", "[13C]"]) == [{'H': 4, 'O': 2}, {'C': 12, 'O': 24}, {'13C': 1}], "Test failed"
+   for molecule in ["[99C]O2", "CD3-13CH3", "[13CO3]2-"]:
+      try:
+         ParseFormula(molecule)
+         assert False, "Test failed"
+      except FormulaError:
+         pass
+   assert numpy.allclose(MolarMasses(["D2O", "CuSO4·5H2O"]), [MolarMass("D2O"), MolarMass("CuSO4·5H2O")]), "Test failed"
+
+def test_ParseFormula_errors():
+   for molecule in ["Xx2", "H2(O", "H2)O"]:
+      try:
+         ParseFormula(molecule)
+         assert False, "Test failed"
+      except ValueError:
+         pass
+
+def test_FormulaError():
+   l_items, error = ParseFormulaSafe("Ca(OH]2")
+   assert l_items is None and (error.position, error.token, error.reason) == (5, "]", "Unbalanced bracket"), "Test failed"
+   assert isinstance(error, ValueError) and ParseFormulaSafe("Ca(OH)2") == ((('Ca', 1), ('H', 2), ('O', 2)), None), "Test failed"
+
+def test_Decompose_collect():
+   l_dics, l_errors = Decompose(["H2O", "Xy2", "NaCl"], errors="collect")
+   assert l_dics == [{'H': 2, 'O': 1}, None, {'Cl': 1, 'Na': 1}], "Test failed"
+   assert [(index, error.token) for index, error in l_errors] == [(1, "Xy")], "Test failed"
+   masses, l_errors = MolarMasses(["H2O", "H2)O", "H2O"], errors="collect")
+   assert numpy.isnan(masses[1]) and masses[0] == masses[2] and [index for index, _ in l_errors] == [1], "Test failed"
+
+def test_MonoisotopicMass():
+   assert round(MonoisotopicMass("C2H6O"), 5) == 46.04186 and round(MonoisotopicMass("[13C]O2"), 5) == 44.99318, "Test failed"
+
+def test_IsotopePattern():
+   masses, abundances = IsotopePattern("CH2Cl2")
+   assert round(masses[0], 4) == 83.9534 and [round(x, 2) for x in abundances[[2, 4]] / abundances[0]] == [0.64, 0.10], "Test failed"
+   masses, abundances = IsotopePattern("C2000H3000N500O600S20")
+   assert abundances.sum() > 0.999 and abs(numpy.dot(masses, abundances) / abundances.sum() - 44289.58) < 0.01, "Test failed"
+   masses, abundances = IsotopePattern("C0H4")
+   reference_masses, reference_abundances = IsotopePattern("H4")
+   assert numpy.allclose(masses, reference_masses) and numpy.allclose(abundances, reference_abundances), "Test failed"
+   masses, abundances = IsotopePattern("0H2O")
+   assert masses.tolist() == [0.0] and abundances.tolist() == [1.0], "Test failed"
+   for function in [IsotopePattern, MonoisotopicMass]:
+      try:
+         function("SnCl2")
+         assert False, "Test failed"
+      except ValueError as error:
+         assert "isotopes of 'Sn'" in str(error), "Test failed"
+
+def test_ConcentrationsB():
+   C = ConcentrationsB(["NaCl", "KCl", "NaCl"], [5.844, 745.5, 58.44], [100, 1000, 500], m_unit="mg", V_unit="mL")
+   assert numpy.allclose(C, [ConcentrationB("NaCl", 5.844e-3, 0.1), ConcentrationB("KCl", 0.7455, 1), ConcentrationB("NaCl", 0.05844, 0.5)]), "Test failed"
+   assert numpy.allclose(ConcentrationsC([1, 2], [10, 20], [100, 100], V_unit="mL"), [0.1, 0.4]), "Test failed"
+
+def test_SolutionProperties():
+   d_properties = SolutionProperties("NaCl", [58.44, 5.844], [1000, 1000], [1.02, 1.0])
+   assert numpy.allclose(d_properties["molality"], [1.0, 0.1], rtol=1e-4) and round(d_properties["ppm"][1]) == 5810, "Test failed"
+   d_mixed = SolutionProperties("NaCl", [58440, 5844], [1, 1], [1020, 1000], m_solute_unit="mg", m_solvent_unit="kg", V_unit="mL")
+   assert all(numpy.allclose(d_mixed[key], d_properties[key]) for key in d_properties), "Test failed"
+
+def test1_PlanDilutions():
+   d_plan = PlanDilutions([[0, 1e-3, 1e-5], [2, 0.5, 1e-4]], 100e-6, [1.0, 0.01])
+   assert d_plan["source"].tolist() == [[-1, 2, 2], [-1, 0, 2]] and numpy.isnan(d_plan["source_volume"][1, 0]), "Test failed"
+   assert numpy.allclose(d_plan["source_volume"][0], [0, 100e-6, 1e-6]) and numpy.allclose(d_plan["intermediates"]["volume"], [111e-6]), "Test failed"
+
+def test2_PlanDilutions():
+   C_targets = numpy.logspace(-2, -9, 16)[:, None] * 0.5 ** numpy.arange(24)
+   d_plan = PlanDilutions(C_targets, 50e-6, [1.0], V_min=1e-6, dead_volume=5e-6)
+   source = d_plan["source"]
+   assert numpy.all(source >= 0) and numpy.allclose(d_plan["source_concentrations"][source] * d_plan["source_volume"] / 50e-6, C_targets), "Test failed"
+   assert numpy.all(d_plan["intermediates"]["parent_volume"] >= 1e-6) and numpy.all(d_plan["source_volume"] >= 1e-6), "Test failed"
+
+def test1_load_concentration():
+   times, concentrations = load_concentration(b"t(min) c(M)\n0 1.0\n1 0.5\n\n2 0.25\n", time_unit='min')
+   assert times.tolist() == [0, 60, 120] and concentrations.tolist() == [1.0, 0.5, 0.25], "Test failed"
+   times, concentrations = load_concentration([[0, 1], [1, 2], [2, 3]], time_unit='days')
+   assert times.tolist() == [0, 86400, 172800] and concentrations.tolist() == [1, 2, 3], "Test failed"
+
+def test2_load_concentration():
+   for source, unit in [(b"t c\n0 1\n1 x\n", 's'), ([[0, 1]], 'weeks'), (b"h\n0 1 0.5 2\n1 0.8 0.4 1.6\n", 's'), (b"h\n0 1 5\n1\n", 's')]:
+      try:
+         load_concentration(source, time_unit=unit)
+         assert False, "Test failed"
+      except ValueError:
+         pass
+
+def test_load_concentrations():
+   import tempfile
+   with tempfile.TemporaryDirectory() as directory:
+      l_paths = [os.path.join(directory, name) for name in ["a.txt", "b.txt", "c.txt"]]
+      for path, content in zip(l_paths, ["t c\n0 1\n1 0.5\n", "t c\n0 1\n1 x\n"]):
+         with open(path, "w") as f:
+            f.write(content)
+      d_data, d_errors = load_concentrations(l_paths, time_unit='h', max_workers=2, max_in_flight=1)
+   assert list(d_data) == [l_paths[0]] and d_data[l_paths[0]][0].tolist() == [0, 3600], "Test failed"
+   assert isinstance(d_errors[l_paths[1]], ValueError) and isinstance(d_errors[l_paths[2]], FileNotFoundError), "Test failed"
+
+def test1_ingest_stream():
+   import asyncio
+   times = numpy.linspace(0, 100, 201)
+   reader = asyncio.StreamReader()
+   reader.feed_data(b"time conc\n" + "".join(f"{t},{0.5 * numpy.exp(-0.03 * t)}\n" for t in times).encode())
+   reader.feed_eof()
+   l_chunks = []
+   analyzer = asyncio.run(ingest_stream(reader, chunk_size=64, on_chunk=lambda analyzer, t, c, d: l_chunks.append(len(t))))
+   assert l_chunks == [64, 64, 64, 9] and analyzer.count == 201 and analyzer.order() == 1, "Test failed"
+   assert abs(analyzer.rate_constant() - 0.03) < 1e-9 and abs(analyzer.half_life() - numpy.log(2) / 0.03) < 1e-6, "Test failed"
+
+def test2_ingest_stream():
+   import asyncio
+   async def serve_and_ingest():
+      async def instrument(reader, writer):
+         writer.write("".join(f"{t} {1 / (2 + 0.1 * t)}\n" for t in range(50)).encode())
+         await writer.drain()
+         writer.close()
+      server = await asyncio.start_server(instrument, "127.0.0.1", 0)
+      async with server:
+         port = server.sockets[0].getsockname()[1]
+         d_connections = {name: await asyncio.open_connection("127.0.0.1", port) for name in "ab"}
+         d_results = await ingest_streams({name: reader for name, (reader, _) in d_connections.items()}, chunk_size=16)
+         for _, writer in d_connections.values():
+            writer.close()
+         return d_results
+   d_results = asyncio.run(serve_and_ingest())
+   assert [d_results[name].order() for name in "ab"] == [2, 2] and abs(d_results["a"].rate_constant() - 0.1) < 1e-9, "Test failed"
+
+def test1_KineticsDataset():
+   dataset = KineticsDataset.from_source(b"t A B C\n" + "".join(f"{t} {1 - 0.01 * t} {numpy.exp(-0.02 * t)} {1 / (1 + 0.05 * t)}\n" for t in range(0, 50, 5)).encode(), time_unit='min')
+   assert dataset.species == ["A", "B", "C"] and dataset.data.shape == (10, 3) and dataset.data.flags.c_contiguous, "Test failed"
+   assert dataset.orders().tolist() == [0, 1, 2] and numpy.allclose(dataset.rate_constants(), [0.01 / 60, 0.02 / 60, 0.05 / 60]), "Test failed"
+
+def test2_KineticsDataset():
+   times = [0, 1, 3, 6]
+   data = numpy.array([[4.0, 1.0], [3.0, 0.5], [1.5, 0.2], [0.5, 0.1]])
+   dataset = KineticsDataset(times, data, ["A", "B"])
+   assert numpy.allclose(dataset.derivatives()[:, 1], calculate_derivative(times, data[:, 1])), "Test failed"
+   assert numpy.allclose(dataset.velocities()[:, 0], velocity_values(times, data[:, 0])) and dataset.velocities('gradient').shape == (4, 2), "Test failed"
+   assert numpy.allclose(dataset.inverse_derivatives()[:, 0], calculate_derivative_of_inverse_concentration(list(data[:, 0]), times)), "Test failed"
+
+def test1_fit_kinetic_model():
+   rng = numpy.random.default_rng(0)
+   times = numpy.linspace(0, 60, 30)
+   k = rng.uniform(0.02, 0.1, 500)
+   y = 2 * numpy.exp(-k[:, None] * times) + rng.normal(0, 0.01, (500, 30))
+   fit = fit_kinetic_model(times, y, 'first')
+   covered = (fit.confidence_intervals[:, 1, 0] <= k) & (k <= fit.confidence_intervals[:, 1, 1])
+   assert fit.parameters.shape == (500, 2) and fit.converged.all() and 0.9 < covered.mean() < 0.99, "Test failed"
+   assert numpy.allclose(fit.predict(times), y, atol=0.05) and numpy.allclose(fit["c0"], 2, atol=0.05), "Test failed"
+
+def test2_fit_kinetic_model():
+   times = numpy.linspace(0, 50, 40)
+   b = 1.5 * 0.2 / (0.05 - 0.2) * (numpy.exp(-0.2 * times) - numpy.exp(-0.05 * times))
+   assert numpy.allclose(fit_kinetic_model(times, b, 'consecutive').parameters, [1.5, 0.2, 0.05]), "Test failed"
+   a = (0.03 + 0.09 * numpy.exp(-0.12 * times)) / 0.12
+   assert numpy.allclose(fit_kinetic_model(times, a, 'reversible').parameters, [1, 0.09, 0.03]), "Test failed"
+   substrate = numpy.array([0.1, 0.2, 0.5, 1, 2, 5])
+   assert numpy.allclose(fit_kinetic_model(substrate, 3 * substrate / (0.4 + substrate), 'michaelis_menten').parameters, [3, 0.4]), "Test failed"
+
+def test_levenberg_marquardt_stalled():
+   x = numpy.linspace(0, 10, 20)[None]
+   y = -0.005 * x + numpy.random.default_rng(2).normal(0, 0.01, x.shape)
+   def kinked(x, p):
+      return numpy.abs(p[:, :1]) * x, (numpy.where(p[:, :1] >= 0, 1.0, -1.0) * x)[:, :, None]
+   p, ssr, converged, iterations = levenberg_marquardt(kinked, x, y, numpy.zeros((1, 1)))
+   assert p[0, 0] == 0 and ssr[0] > 0.01 and converged[0], "Test failed"
+
+def test_levenberg_marquardt_errstate():
+   def failing(x, p):
+      raise RuntimeError("model failure")
+   state = numpy.geterr()
+   try:
+      levenberg_marquardt(failing, numpy.zeros((1, 3)), numpy.zeros((1, 3)), numpy.ones((1, 1)))
+      assert False, "Test failed"
+   except RuntimeError:
+      pass
+   assert numpy.geterr() == state, "Test failed"
+
+def test_fit_rate_constant():
+   times = [0, 10, 20, 30, 40]
+   concentrations = [0.8 * numpy.exp(-0.05 * t) for t in times]
+   assert determine_order(times, concentrations) == 1 and abs(fit_rate_constant(times, concentrations, 1) - 0.05) < 1e-9, "Test failed"
+   assert determine_order(times, [1 / (1 + 0.2 * t) for t in times]) == 2, "Test failed"
+
+def test1_ReactionNetwork():
+   network = ReactionNetwork.from_equations([(["N2O4"], ["NO2"])], reversible=True)
+   assert network.species == ["N2O4", "NO2"] and network.orders.tolist() == [[1, 0], [0, 2]] and network.stoichiometry.tolist() == [[-1, 2], [1, -2]], "Test failed"
+   times, concentrations = network.simulate(numpy.linspace(0, 20, 41), {"N2O4": 1.0}, [1.0, 2.0])
+   assert concentrations.shape == (41, 2) and abs(concentrations[-1, 1] ** 2 / concentrations[-1, 0] - 0.5) < 1e-4, "Test failed"
+   assert numpy.allclose(calculate_derivative(times, concentrations)[:, 0], numpy.diff(concentrations[:, 0]) / 0.5), "Test failed"
+
+def test2_ReactionNetwork():
+   network = ReactionNetwork([(["A"], ["B"], [1], [1]), (["B"], ["C"], [1], [1])])
+   k = numpy.array([[1.0, 0.5], [2.0, 0.1], [0.3, 0.3]])
+   times, concentrations = network.simulate(numpy.linspace(0, 5, 11), [1.0, 0.0, 0.0], k, rtol=1e-9)
+   assert concentrations.shape == (11, 3, 3) and numpy.allclose(concentrations.sum(axis=-1), 1), "Test failed"
+   assert numpy.allclose(concentrations[:, :, 0], numpy.exp(-numpy.outer(times, k[:, 0])), atol=1e-7), "Test failed"
+   assert numpy.allclose(concentrations[:, 0], network.simulate(times, [1.0, 0.0, 0.0], k[0], rtol=1e-9)[1], atol=1e-7), "Test failed"
+
+def test1_bootstrap_rate():
+   rng = numpy.random.default_rng(1)
+   times = numpy.linspace(0, 60, 15)
+   concentrations = 0.8 * numpy.exp(-0.05 * times) * (1 + rng.normal(0, 0.02, 15))
+   uncertainty = bootstrap_rate(times, concentrations, n_resamples=3000, seed=7)
+   low, high = uncertainty.rate_constant_interval
+   assert uncertainty.order == 1 and low < uncertainty.rate_constant < high and low < 0.05 < high, "Test failed"
+   assert uncertainty.rate_constants.shape == (3000,) and uncertainty.order_frequencies[1] > 0.95, "Test failed"
+   assert uncertainty.half_life_interval[0] < numpy.log(2) / 0.05 < uncertainty.half_life_interval[1], "Test failed"
+
+def test2_bootstrap_rate():
+   times = numpy.arange(10.0)
+   concentrations = 1 / (1 + 0.2 * times) + numpy.random.default_rng(2).normal(0, 0.005, 10)
+   serial = bootstrap_rate(times, concentrations, order=2, n_resamples=1200, method="points", seed=3, chunk_size=400)
+   pooled = bootstrap_rate(times, concentrations, order=2, n_resamples=1200, method="points", seed=3, chunk_size=400, processes=2)
+   assert numpy.array_equal(serial.rate_constants, pooled.rate_constants), "Test failed"
+   jackknife = jackknife_rate(times, concentrations, order=2)
+   assert jackknife.rate_constants.shape == (10,) and jackknife.rate_constant_interval[0] < 0.2 < jackknife.rate_constant_interval[1], "Test failed"
+
+def test1_analyze_temperatures():
+   temperatures = numpy.array([290.0, 300.0, 310.0, 320.0])
+   k = 2e7 * numpy.exp(-55000 / (8.314462618 * temperatures))
+   l_times = [numpy.linspace(0, 3 / rate, 10 + 5 * i) for i, rate in enumerate(k)]
+   analysis = analyze_temperatures(temperatures, l_times, [numpy.exp(-rate * times) for rate, times in zip(k, l_times)])
+   assert analysis.order == 1 and numpy.allclose(analysis.rate_constants, k), "Test failed"
+   assert abs(analysis.activation_energy - 55000) < 1e-3 and abs(analysis.pre_exponential_factor / 2e7 - 1) < 1e-6, "Test failed"
+   assert abs(analysis.activation_enthalpy - 55000 + 8.314462618 * 305) < 100 and numpy.isclose(analysis.rate_constant(300), k[1]), "Test failed"
+
+def test2_load_temperature_series():
+   import tempfile
+   rng = numpy.random.default_rng(4)
+   with tempfile.TemporaryDirectory() as directory:
+      d_sources = {}
+      for temperature in [298.0, 308.0, 318.0, 328.0]:
+         k = 1e5 * numpy.exp(-40000 / (8.314462618 * temperature))
+         times = numpy.linspace(0, 2 / k, 15)
+         d_sources[temperature] = os.path.join(directory, f"{temperature}.txt")
+         with open(d_sources[temperature], "w") as f:
+            f.write("t c\n" + "".join(f"{t} {c}\n" for t, c in zip(times, (1 - 0.5 * k * times) * (1 + rng.normal(0, 0.005, 15)))))
+      d_sources[338.0] = os.path.join(directory, "missing.txt")
+      analysis, d_errors = load_temperature_series(d_sources)
+   low, high = analysis.activation_energy_interval
+   assert analysis.order == 0 and list(d_errors) == [338.0] and low < 40000 < high and high - low < 4000, "Test failed"
+
+def test1_robust_rate_constants():
+   rng = numpy.random.default_rng(3)
+   times = numpy.linspace(0, 60, 40)
+   k = rng.uniform(0.02, 0.08, 2000)
+   concentrations = numpy.exp(-k[:, None] * times) * (1 + rng.normal(0, 0.003, (2000, 40)))
+   glitches = rng.random((2000, 40)) < 0.1
+   concentrations = numpy.where(glitches, concentrations * rng.uniform(0.3, 1.7, (2000, 40)), concentrations)
+   orders, huber = robust_rate_constants(times, concentrations, method="huber")
+   ransac = robust_rate_constants(times, concentrations, orders=1, method="ransac", seed=0)[1]
+   ols = robust_rate_constants(times, concentrations, orders=1, method="ols")[1]
+   assert (orders == 1).mean() > 0.99 and numpy.median(numpy.abs(huber / k - 1)) < 0.005 and numpy.median(numpy.abs(ransac / k - 1)) < 0.005, "Test failed"
+   assert numpy.median(numpy.abs(ols / k - 1)) > 5 * numpy.median(numpy.abs(huber / k - 1)), "Test failed"
+
+def test2_robust_rate_constants():
+   times = list(range(0, 50, 5))
+   concentrations = [1 / (1 + 0.1 * t) for t in times]
+   concentrations[4] = 0.9
+   assert determine_order(times, concentrations, robust=True) == 2, "Test failed"
+   assert abs(fit_rate_constant(times, concentrations, 2, "ransac") - 0.1) < 1e-9 and abs(fit_rate_constant(times, concentrations, 2, "huber") - 0.1) < 0.005, "Test failed"
+   data = numpy.array([[1 - 0.01 * t, numpy.exp(-0.02 * t)] for t in times])
+   data[3] = [2.0, 0.1]
+   assert numpy.allclose(KineticsDataset(times, data).rate_constants([0, 1], method="ransac"), [0.01, 0.02]), "Test failed"
+
+def test1_downsample():
+   x = numpy.linspace(0, 2, 1000001)
+   y = numpy.where(x < 1, 3 + x, 11 + x)
+   y[123457] = 20
+   for method in ["minmax", "lttb"]:
+      x_kept, y_kept = downsample(x, y, n_out=1000, method=method)
+      jump = numpy.searchsorted(x_kept, 1)
+      assert len(x_kept) <= 1002 and x_kept[0] == 0 and x_kept[-1] == 2 and y_kept.max() == 20, "Test failed"
+      assert y_kept[jump - 1] < 4.01 and y_kept[jump] >= 12, "Test failed"
+   assert downsample([0, 1, 2], [5, 6, 7])[1].tolist() == [5, 6, 7], "Test failed"
+
+def test2_downsample():
+   import matplotlib.pyplot as plt
+   times = numpy.linspace(0, 100, 100000)
+   velocities = numpy.stack([numpy.exp(-times), numpy.exp(-2 * times)], axis=1)
+   plt.close("all")
+   display_graph(times, velocities)
+   assert len(plt.gca().lines) == 2 and len(plt.gca().lines[0].get_xdata()) <= 4002, "Test failed"
+   plt.close("all")
+   display_graph(times, velocities[:, 0], decimate=False)
+   assert len(plt.gca().lines[0].get_xdata()) == 100000, "Test failed"
+   plt.close("all")
+
+def test1_titration_renderer():
+   renderer = TitrationRenderer(pyplot=False)
+   renderer.render(TitrationData_dAsB("H2A", 2, 7, 0.02, "NaOH", 0.1, 0.02))
+   l_lines = list(renderer.axes.lines)
+   d_curve = TitrationData_wBsA("NH3", 9.2, 0.02, "HCl", 0.1, 0.02)
+   renderer.render(d_curve)
+   assert renderer.axes.lines[:] == l_lines and sum(line.get_visible() for line in l_lines) == 4, "Test failed"
+   assert renderer.axes.get_title() == d_curve["title"] == "Titration of 0.1 M NH3 with 0.1 M HCl", "Test failed"
+   legend = renderer.d_legends[((0, 1), "upper right")]
+   assert legend.get_visible() and not renderer.d_legends[((0, 2, 4), "lower right")].get_visible(), "Test failed"
+   assert [text.get_text() for text in legend.get_texts()][:2] == ["pH of weak base", "pH of strong acid"], "Test failed"
+   assert len(renderer.l_lines[0].get_xdata()) <= 2002, "Test failed"
+
+def test2_titration_renderer():
+   import tempfile
+   l_curves = [d_titration_data["sAsB"]("HCl", 0.02, "NaOH", 0.1, 0.02), d_titration_data["wAsB"]("AcOH", 4.76, 0.02, "NaOH", 0.1, 0.02)]
+   with tempfile.TemporaryDirectory() as directory:
+      pdf = os.path.join(directory, "curves.pdf")
+      assert ExportTitrations(l_curves, pdf) == [pdf] and b"/Count 2" in open(pdf, "rb").read(), "Test failed"
+      l_paths = ExportTitrations(l_curves, os.path.join(directory, "svg"), format="svg")
+      assert len(l_paths) == 2 and all(open(path).read().startswith("<?xml") for path in l_paths), "Test failed"
+   try:
+      ExportTitrations(l_curves, "curves.png", format="png")
+      assert False, "Test failed"
+   except ValueError:
+      pass
+
+def test1_export_titration_table():
+   import tempfile
+   l_specs = [("sAsB", "HCl", 0.02, "NaOH", 0.1, 0.02), ("xx", 1), {"mode": "wBsA", "base": "NH3", "pKa": 9.2, "Vb": 0.02, "acid": "HCl", "Ctit": 0.1, "Veq": 0.02}]
+   with tempfile.TemporaryDirectory() as directory:
+      l_manifest = ExportTitrationTable(l_specs, directory, dpi=50, processes=2, chunk_size=1)
+      assert [d_row["index"] for d_row in l_manifest] == [0, 1, 2] and l_manifest[1]["path"] is None and "Invalid mode" in l_manifest[1]["error"], "Test failed"
+      assert l_manifest[2]["path"] == os.path.join(directory, "0002_wBsA_Titration of 0.1 M NH3 with 0.1 M HCl.png") and os.path.isfile(l_manifest[2]["path"]), "Test failed"
+      assert sorted(os.listdir(directory)) == ["0000_sAsB_Titration of 0.1 M HCl with 0.1 M NaOH.png", "0002_wBsA_Titration of 0.1 M NH3 with 0.1 M HCl.png", "manifest.csv"], "Test failed"
+
+def test2_export_titration_table():
+   import csv
+   import tempfile
+   l_specs = [("sBsA", "KOH", 0.01, "H2SO4/2", 0.05, 0.01)] * 3
+   with tempfile.TemporaryDirectory() as directory:
+      l_manifest = ExportTitrationTable(l_specs, directory, format="svg", processes=1, manifest="qc.csv")
+      assert all(d_row["error"] is None and d_row["path"].endswith(".svg") and "/2" not in os.path.basename(d_row["path"]) for d_row in l_manifest), "Test failed"
+      with open(os.path.join(directory, "qc.csv"), newline="") as file:
+         l_rows = list(csv.DictReader(file))
+      assert [row["path"] for row in l_rows] == [d_row["path"] for d_row in l_manifest], "Test failed"
+
+def titration_curve(V, Va, Ca, Ctit, pKa):
+   low = numpy.zeros(numpy.broadcast(V, pKa).shape)
+   high = numpy.full(low.shape, 14.0)
+   for _ in range(60):
+      middle = (low + high) / 2
+      h = 10 ** -middle
+      balance = h + Ctit * V / (Va + V) - 1e-14 / h - Ca * Va / (Va + V) * 10 ** -pKa / (10 ** -pKa + h)
+      high = numpy.where(balance < 0, middle, high)
+      low = numpy.where(balance < 0, low, middle)
+   return (low + high) / 2
+
+def test1_equivalence_point():
+   rng = numpy.random.default_rng(0)
+   V = numpy.linspace(0, 0.04, 201)
+   pKa = rng.uniform(3.5, 6.5, (300, 1))
+   pH = titration_curve(V, 0.02, 0.1, 0.1, pKa) + rng.normal(0, 0.01, (300, 201))
+   analysis = AnalyseTitrations([V] * 300, list(pH), 0.02, 0.1)
+   assert analysis.weak.all() and numpy.max(numpy.abs(analysis.Veq[:, 0] - 0.02)) < 5e-5, "Test failed"
+   assert numpy.median(numpy.abs(analysis.pKa - pKa[:, 0])) < 0.01 and numpy.median(numpy.abs(analysis.Veq_gran - 0.02)) < 2e-4, "Test failed"
+   assert numpy.median(numpy.abs(analysis.K_gran / 10 ** -pKa[:, 0] - 1)) < 0.05, "Test failed"
+   assert numpy.allclose(analysis.pH_eq_model, 7 + pKa[:, 0] / 2 + pH4(0.02, 0.1, 0.02, 1), atol=0.05), "Test failed"
+
+def test2_equivalence_point():
+   V = numpy.linspace(0, 0.04, 41) + 0.0003
+   Veq, pH_eq = EquivalencePoints(V, titration_curve(V, 0.02, 0.1, 0.1, numpy.array(4.76)), window=5)
+   assert abs(Veq[0, 0] - 0.02) < 0.0003 and 7 < pH_eq[0, 0] < 10, "Test failed"
+   V = numpy.linspace(0, 0.03, 301)
+   analysis = AnalyseTitrations([V, V[:200]], [titration_curve(V, 0.02, 0.1, 0.1, numpy.array(-3.0)), titration_curve(V[:200], 0.02, 0.05, 0.1, numpy.array(-3.0))], 0.02, 0.1)
+   assert not analysis.weak.any() and numpy.allclose(analysis.Veq[:, 0], [0.02, 0.01], atol=2e-5) and numpy.all(analysis.pH_eq_model == 7), "Test failed"
+   assert numpy.allclose(analysis.Veq_gran, [0.02, 0.01], atol=2e-4) and numpy.allclose(analysis.K_gran, 0.1, rtol=0.05), "Test failed"
+
+def test1_titration_curve():
+   V = numpy.linspace(0, 0.04, 4001)
+   assert numpy.abs(TitrationCurve(V, 0.02, 0.1, [4.76], 0.1) - titration_curve(V, 0.02, 0.1, 0.1, numpy.array(4.76))).max() < 1e-8, "Test failed"
+   assert numpy.allclose(TitrationCurve(numpy.array([0, 0.01, 0.02, 0.03]), 0.02, 0.1, [], 0.1), [1, 1 + numpy.log10(3), 7, 14 + numpy.log10(0.02)]), "Test failed"
+   assert numpy.allclose(TitrationCurve(0.01, 0.02, 0.1, [9.25], 0.1, analyte="base"), 9.25, atol=0.01), "Test failed"
+   assert numpy.allclose(TitrationCurve(0.02, 0.02, 0.1, [4.76], 0.1, [9.25]), 7.005, atol=0.01), "Test failed"
+   assert TitrationCurve(numpy.zeros((3, 5)), 0.02, 0.1, [2.15, 7.2, 12.35], 0.1).shape == (3, 5), "Test failed"
+
+def test2_titration_curve():
+   d_curve = d_titration_data["exact"]("H3PO4", [2.15, 7.20, 12.35], 0.02, "NaOH", 0.1, 0.02)
+   assert len(d_curve["segments"]) == 4 and d_curve["xmax"] == 4 and d_curve["segments"][1][0][0] == 1, "Test failed"
+   assert numpy.allclose([pH_eq for xi, pH_eq in d_curve["equivalences"]], [4.70, 9.66, 12.18], atol=0.01), "Test failed"
+   renderer = TitrationRenderer(pyplot=False)
+   renderer.render(d_curve)
+   assert renderer.axes.get_xlim() == (0, 4) and sum(line.get_visible() for line in renderer.l_lines) == 4, "Test failed"
+   renderer.render(TitrationData_exact("NH3", [9.25], 0.02, "HCl", 0.1, 0.02, kind="base"))
+   assert renderer.axes.get_xlim() == (0, 2) and 5.2 < renderer.l_levels[0].get_ydata()[0] < 5.35, "Test failed"
+
+def test5_BalanceEq():
+   try:
+      BalanceEq(["Fe2+"], ["Fe3+"])
+      assert False, "Test failed."
+   except NoBalanceError:
+      pass
+   result = balance_many([(["Fe2+"], ["Fe3+"])], processes=1)[0]
+   assert isinstance(result, NoBalanceError) and CanonicalReaction(["Fe2+"], ["Fe3+"]) not in d_balance_cache, "Test failed."
+
+def test6_BalanceEq():
+   try:
+      BalanceEq(["H2", "O2"], ["H2O", "H2O2"])
+      assert False, "Test failed."
+   except UnderdeterminedReactionError:
+      pass
+   l_results = balance_many([(["H2", "O2"], ["H2O", "H2O2"]), (["H2"], ["O2"])], processes=1)
+   assert isinstance(l_results[0], UnderdeterminedReactionError) and isinstance(l_results[1], ElementMismatchError), "Test failed."
+   assert BalanceEq(["KMnO4", "HCl"], ["KCl", "MnCl2", "H2O", "Cl2"])[4] == [16, 2, 5, 8, 2, 2], "Test failed."
+
+def test3_ReactionNetwork():
+   for equation, error in [((["H2"], ["O2"]), ElementMismatchError), ((["Fe2+"], ["Fe3+"]), NoBalanceError), ((["H2", "O2"], ["H2O", "H2O2"]), UnderdeterminedReactionError)]:
+      try:
+         ReactionNetwork.from_equations([equation])
+         assert False, "Test failed"
+      except error:
+         pass